@@ -0,0 +1,214 @@
+"""Performance benchmarks of the Enigma machine, with regression baselines.
+
+Measures encryption throughput against message size, rotor count and
+predefined machine, machine construction latency, peak memory, and the
+cost of every component. With the package installed:
+
+    python benchmarks/bench_machine.py --save baseline.json
+    python benchmarks/bench_machine.py --compare baseline.json --threshold 0.2
+
+The second command exits with status 1 if any benchmark is slower than
+the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    RecordingTracer,
+)
+from enigma import vectorized
+
+SIZES = [10, 1_000, 100_000, 10_000_000, 100_000_000]
+ROTOR_COUNTS = [3, 4, 5, 6, 8, 10]
+ENGINES = ["object", "compiled", "vectorized"]
+
+
+def random_wiring(rng: random.Random) -> str:
+    return "".join(rng.sample(LETTERS, 26))
+
+
+def random_machine(n_rotors: int, seed: int = 0) -> EnigmaMachine:
+    rng = random.Random(seed)
+    return EnigmaMachine(
+        rotor_wirings=[random_wiring(rng) for _ in range(n_rotors)],
+        rotor_offsets=[rng.randrange(26) for _ in range(n_rotors)],
+        reflector_wirings=REFLECTOR_CONFIGURATIONS["B"].wiring,
+        plugboard_wirings={"A": "Z", "Z": "A", "Q": "W", "W": "Q"},
+        rotor_names=[f"R{i}" for i in range(n_rotors)],
+    )
+
+
+def timed(function, *args, repeat: int = 1) -> tuple:
+    """Best wall time of a call and the peak memory it allocates.
+
+    The peak memory is measured in a separate call, as tracing allocations
+    slows the call down.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def encrypt_case(machine: EnigmaMachine, engine: str, size: int, repeat: int) -> dict:
+    message = (LETTERS * (size // 26 + 1))[:size]
+    if engine == "compiled":
+        machine.compile()
+        function, data = machine.encrypt, message
+    elif engine == "vectorized":
+        function = machine.encrypt_array
+        data = vectorized.np.frombuffer(
+            message.encode("ascii"), dtype=vectorized.np.uint8
+        )
+    else:
+        function, data = machine.encrypt, message
+    elapsed, peak = timed(function, data, repeat=repeat)
+    return {
+        "seconds": elapsed,
+        "letters_per_second": size / elapsed,
+        "peak_memory": peak,
+    }
+
+
+def component_costs(machine: EnigmaMachine, letters: int = 2000) -> dict:
+    """Time per letter spent in every component, in nanoseconds."""
+    tracer = RecordingTracer(record_components=False)
+    machine.attach_tracer(tracer)
+    machine.encrypt((LETTERS * (letters // 26 + 1))[:letters])
+    machine.detach_tracer()
+    return {
+        name: 1e9 * stats["elapsed"] / stats["letters"]
+        for name, stats in tracer.summary()["components"].items()
+    }
+
+
+def run(
+    sizes, rotor_counts, engines, max_object_size, repeat, case_size, setup_calls
+) -> dict:
+    results = {}
+    for engine in engines:
+        if engine == "vectorized" and vectorized.np is None:
+            continue
+        limit = max_object_size if engine == "object" else max(sizes)
+        for size in sizes:
+            if size <= limit:
+                results[f"encrypt/{engine}/size={size}"] = encrypt_case(
+                    random_machine(3), engine, size, repeat
+                )
+        size = min(case_size, limit)
+        for n_rotors in rotor_counts:
+            results[f"encrypt/{engine}/rotors={n_rotors}"] = encrypt_case(
+                random_machine(n_rotors), engine, size, repeat
+            )
+        for name, rotor_config in ROTOR_CONFIGURATIONS.items():
+            machine = EnigmaMachine.from_configuration(
+                rotor_config, [0] * len(rotor_config), REFLECTOR_CONFIGURATIONS["B"]
+            )
+            results[f"encrypt/{engine}/machine={name}"] = encrypt_case(
+                machine, engine, size, repeat
+            )
+
+    rotor_config = ROTOR_CONFIGURATIONS["Enigma I"]
+    for name, function in [
+        ("construct", lambda: random_machine(3)),
+        (
+            "from_configuration",
+            lambda: EnigmaMachine.from_configuration(
+                rotor_config, [0, 0, 0], REFLECTOR_CONFIGURATIONS["B"]
+            ),
+        ),
+        (
+            "from_configuration+compile",
+            lambda: EnigmaMachine.from_configuration(
+                rotor_config, [0, 0, 0], REFLECTOR_CONFIGURATIONS["B"]
+            ).compile(),
+        ),
+    ]:
+        elapsed, peak = timed(
+            lambda: [function() for _ in range(setup_calls)], repeat=repeat
+        )
+        results[f"setup/{name}"] = {
+            "seconds": elapsed / setup_calls,
+            "peak_memory": peak / setup_calls,
+        }
+
+    results["components"] = component_costs(random_machine(3))
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """List the benchmarks slower than the baseline by more than the threshold."""
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if name == "components" or not reference:
+            continue
+        ratio = result["seconds"] / reference["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {ratio:.2f}x slower than baseline")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--rotor-counts", type=int, nargs="+", default=ROTOR_COUNTS)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    parser.add_argument(
+        "--max-object-size",
+        type=int,
+        default=1_000_000,
+        help="Largest message encrypted with the object engine",
+    )
+    parser.add_argument(
+        "--case-size",
+        type=int,
+        default=100_000,
+        help="Message size of the rotor count and predefined machine benchmarks",
+    )
+    parser.add_argument("--setup-calls", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", help="Write the results to this JSON baseline")
+    parser.add_argument("--compare", help="Compare the results to this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(
+        args.sizes,
+        args.rotor_counts,
+        args.engines,
+        args.max_object_size,
+        args.repeat,
+        args.case_size,
+        args.setup_calls,
+    )
+    if args.save:
+        with open(args.save, "w") as fh:
+            json.dump(results, fh, indent=2)
+    print(json.dumps(results, indent=2))
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(results, json.load(fh), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
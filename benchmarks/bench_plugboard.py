@@ -0,0 +1,93 @@
+"""Benchmark of the plugboard hill-climbing solver.
+
+Measures restarts per second and the success rate (message fully recovered)
+against ciphertext length, with a fixed seed so runs are reproducible. With
+the package installed:
+
+    python benchmarks/bench_plugboard.py --lengths 100 200 400 --trials 10
+"""
+
+import argparse
+import json
+import random
+import time
+
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+)
+from enigma.hillclimb import CORPUS, recover_plugboard
+
+
+def run(lengths, trials, restarts, pairs, n, workers, seed):
+    rng = random.Random(seed)
+    with open(CORPUS) as fh:
+        text = "".join(l for l in fh.read().upper() if l in LETTERS)
+    rotors = ROTOR_CONFIGURATIONS["Enigma I"]
+    reflector = REFLECTOR_CONFIGURATIONS["B"]
+
+    results = []
+    for length in lengths:
+        successes, elapsed = 0, 0.0
+        for _ in range(trials):
+            start = rng.randrange(len(text) - length)
+            plaintext = text[start : start + length]
+            letters = rng.sample(LETTERS, 2 * pairs)
+            plugboard = {}
+            for a, b in zip(letters[::2], letters[1::2]):
+                plugboard[a], plugboard[b] = b, a
+            offsets = [rng.randrange(26) for _ in rotors]
+            ciphertext = EnigmaMachine.from_configuration(
+                rotors, offsets, reflector, plugboard
+            ).encrypt(plaintext)
+
+            tic = time.perf_counter()
+            candidate = recover_plugboard(
+                ciphertext,
+                rotors,
+                offsets,
+                reflector,
+                n=n,
+                restarts=restarts,
+                max_pairs=pairs,
+                seed=rng.randrange(2**31),
+                workers=workers,
+            )
+            elapsed += time.perf_counter() - tic
+            successes += candidate.machine().encrypt(ciphertext) == plaintext
+        results.append(
+            {
+                "length": length,
+                "success_rate": successes / trials,
+                "restarts_per_second": trials * restarts / elapsed,
+            }
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 200, 400])
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument("--restarts", type=int, default=8)
+    parser.add_argument("--pairs", type=int, default=10)
+    parser.add_argument("--n", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    results = run(
+        args.lengths,
+        args.trials,
+        args.restarts,
+        args.pairs,
+        args.n,
+        args.workers,
+        args.seed,
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,16 @@
+from .batch import *
+from .binary import *
+from .bombe import *
+from .cache import *
+from .hillclimb import *
+from .compiled import *
 from .configurations import *
+from .frozen import *
 from .machine import *
-from .object import *
\ No newline at end of file
+from .normalize import *
+from .object import *
+from .search import *
+from .stepping import *
+from .store import *
+from .tracing import *
+from .vectorized import *
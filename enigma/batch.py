@@ -0,0 +1,277 @@
+from dataclasses import dataclass, field
+
+from .configurations import ReflectorConfig, RotorConfig
+from .object import LETTERS, STEPPING_MODELS, is_capital_letters
+from .stepping import stepping_table
+from .vectorized import np, require_numpy
+
+__all__ = ["EnigmaKey", "stack_keys", "encrypt_padded", "encrypt_batch"]
+
+# Maximum number of messages encrypted together in one padded block
+BATCH_SIZE = 4096
+
+
+@dataclass
+class EnigmaKey:
+    """Settings of an Enigma machine, without building its components.
+
+    The fields match the arguments of ``EnigmaMachine``: with
+    ``stepping="notch"`` the rotors step through their notches and their
+    wirings turn with them, and ``ring_settings`` default to all 0.
+    """
+
+    rotor_wirings: list[str]
+    rotor_offsets: list[int]
+    reflector_wiring: str
+    plugboard_wirings: dict = field(default_factory=dict)
+    rotor_notches: list[str] = None
+    stepping: str = "odometer"
+    ring_settings: list[int] = None
+
+    @classmethod
+    def from_configuration(
+        cls,
+        rotor_config: list[RotorConfig],
+        rotor_offsets: list[int],
+        reflector_config: ReflectorConfig,
+        plugboard_wirings: dict = None,
+        stepping: str = "odometer",
+        ring_settings: list[int] = None,
+    ):
+        """Create a key from configuration settings.
+
+        Parameters
+        ----------
+        rotor_config : list[RotorConfig]
+            List of RotorConfig objects representing the rotor configurations.
+        rotor_offsets : list[int]
+            List of rotor offsets.
+        reflector_config : ReflectorConfig
+            ReflectorConfig object representing the reflector configuration.
+        plugboard_wirings : dict, optional
+            Dictionary representing the plugboard wirings, by default None
+        stepping : str, optional
+            Stepping model, "odometer" (default) or "notch".
+        ring_settings : list[int], optional
+            Ring settings (0 for A), fastest rotor first, by default all 0.
+
+        Returns
+        -------
+        EnigmaKey
+            The key of a machine with the provided configurations.
+        """
+        return cls(
+            rotor_wirings=[r_c.wiring for r_c in rotor_config],
+            rotor_offsets=list(rotor_offsets),
+            reflector_wiring=reflector_config.wiring,
+            plugboard_wirings=plugboard_wirings or {},
+            rotor_notches=[r_c.notches for r_c in rotor_config],
+            stepping=stepping,
+            ring_settings=None if ring_settings is None else list(ring_settings),
+        )
+
+
+def _letters(rows: list[str]) -> "np.ndarray":
+    """Convert equal length strings of capital letters to a 2-D index array."""
+    data = "".join(rows).encode("ascii")
+    return (np.frombuffer(data, dtype=np.uint8) - 65).reshape(len(rows), -1)
+
+
+def stack_keys(keys: list[EnigmaKey]) -> dict:
+    """Stack the wirings of keys with the same number of rotors into arrays.
+
+    Parameters
+    ----------
+    keys : list[EnigmaKey]
+        The keys to stack, all with the same number of rotors.
+
+    Returns
+    -------
+    dict
+        ``forward`` and ``inverse`` of shape (keys, rotors, 26), ``offsets``
+        and ``rings`` of shape (keys, rotors), ``reflector`` and
+        ``plugboard`` of shape (keys, 26), all integer indexes, and for the
+        notch model ``notch``, a boolean array of shape (keys,), and
+        ``notches``, the notch letters of every key.
+
+    Raises
+    ------
+    AssertionError
+        If the keys don't have the same number of rotors or any wiring is
+        not a valid permutation of LETTERS.
+    """
+    require_numpy()
+    n_rotors = len(keys[0].rotor_wirings)
+    assert all(
+        len(key.rotor_wirings) == n_rotors and len(key.rotor_offsets) == n_rotors
+        for key in keys
+    ), "All keys must have the same number of rotors and offsets"
+    assert all(
+        len(wiring) == 26
+        for key in keys
+        for wiring in key.rotor_wirings + [key.reflector_wiring]
+    ), "Letter ordering must contain exactly 26 letters"
+
+    forward = _letters([w for key in keys for w in key.rotor_wirings])
+    reflector = _letters([key.reflector_wiring for key in keys])
+    identity = np.arange(26)
+    assert np.all(np.sort(forward, axis=1) == identity) and np.all(
+        np.sort(reflector, axis=1) == identity
+    ), "Letter ordering must contain exactly 26 letters"
+    assert all(
+        key_ in LETTERS and value in LETTERS
+        for key in keys
+        for key_, value in key.plugboard_wirings.items()
+    ), "Wiring must be a dictionary containing english letters"
+
+    plugboard = _letters(
+        [
+            "".join(key.plugboard_wirings.get(letter, letter) for letter in LETTERS)
+            for key in keys
+        ]
+    )
+    offsets = np.array([key.rotor_offsets for key in keys], dtype=np.int64)
+    assert np.all(
+        (offsets >= 0) & (offsets <= 25)
+    ), "Rotor position must be between 0 and 25"
+    rings = np.array(
+        [key.ring_settings or [0] * n_rotors for key in keys], dtype=np.int64
+    ).reshape(len(keys), n_rotors)
+    assert np.all((rings >= 0) & (rings <= 25)), "Ring setting must be between 0 and 25"
+    assert all(
+        key.stepping in STEPPING_MODELS for key in keys
+    ), f"Stepping must be one of {STEPPING_MODELS}"
+    notches = [tuple(key.rotor_notches or [""] * n_rotors) for key in keys]
+    assert all(
+        len(key_notches) == n_rotors and set("".join(key_notches)) <= set(LETTERS)
+        for key_notches in notches
+    ), "Notches must be capital english letters, one string per rotor"
+    return {
+        "forward": forward.reshape(len(keys), n_rotors, 26),
+        "inverse": np.argsort(forward, axis=1)
+        .astype(np.uint8)
+        .reshape(len(keys), n_rotors, 26),
+        "reflector": reflector,
+        "plugboard": plugboard,
+        "offsets": offsets.reshape(len(keys), n_rotors),
+        "rings": rings,
+        "notch": np.array([key.stepping == "notch" for key in keys]),
+        "notches": notches,
+    }
+
+
+def encrypt_padded(tables: dict, letters: "np.ndarray") -> "np.ndarray":
+    """Encrypt a padded block of messages, one row per key.
+
+    Parameters
+    ----------
+    tables : dict
+        Stacked key tables, as returned by ``stack_keys``.
+    letters : np.ndarray
+        uint8 array of shape (keys, length) with the ASCII codes of the
+        messages. Padding may hold any capital letter and is encrypted too.
+
+    Returns
+    -------
+    np.ndarray
+        uint8 array of shape (keys, length) with the ASCII codes of the
+        encrypted messages.
+    """
+    require_numpy()
+    length = letters.shape[1]
+    x = np.take_along_axis(tables["plugboard"], letters.astype(np.intp) - 65, axis=1)
+    # The wiring of a rotor is shifted by its offset minus its ring setting;
+    # with the notch model the signal is shifted back on its way out too
+    shifts = _rotor_offsets(tables, length) - tables["rings"][:, :, None]
+    exits = tables["notch"][:, None].astype(np.int64)
+    for r in range(shifts.shape[1]):
+        x = np.take_along_axis(tables["forward"][:, r], (x + shifts[:, r]) % 26, axis=1)
+        x = (x - shifts[:, r] * exits) % 26
+    x = np.take_along_axis(tables["reflector"], x.astype(np.intp), axis=1)
+    for r in reversed(range(shifts.shape[1])):
+        x = (x + shifts[:, r] * exits) % 26
+        x = (
+            np.take_along_axis(tables["inverse"][:, r], x.astype(np.intp), axis=1)
+            - shifts[:, r]
+        ) % 26
+    x = np.take_along_axis(tables["plugboard"], x.astype(np.intp), axis=1)
+    return (x + 65).astype(np.uint8)
+
+
+def _rotor_offsets(tables: dict, length: int) -> "np.ndarray":
+    """Offsets of every rotor of every key while each letter is encrypted.
+
+    Odometer keys are computed in closed form, carrying the position from
+    one rotor to the next; notch keys are read from their stepping tables.
+    """
+    offsets = np.empty(tables["offsets"].shape + (length,), dtype=np.int64)
+    quotients = np.arange(length, dtype=np.int64)
+    for r in range(offsets.shape[1]):
+        offsets[:, r] = (tables["offsets"][:, [r]] + quotients) % 26
+        quotients //= 26
+    for row in np.flatnonzero(tables["notch"]):
+        table = stepping_table(
+            tuple(tables["offsets"][row].tolist()), tables["notches"][row]
+        )
+        offsets[row] = table.offsets_array(0, length)
+    return offsets
+
+
+def encrypt_batch(pairs: list, batch_size: int = BATCH_SIZE) -> list:
+    """Encrypt many messages, each one with its own key, in vectorized passes.
+
+    Messages are grouped by number of rotors and sorted by length, so that
+    each padded block wastes little space.
+
+    Parameters
+    ----------
+    pairs : list
+        List of (EnigmaKey, message) pairs. Messages are ``str`` or ASCII
+        ``bytes`` of capital English letters.
+    batch_size : int, optional
+        Maximum number of messages per padded block, by default 4096.
+
+    Returns
+    -------
+    list
+        The encrypted messages, in the order of ``pairs`` and of the same
+        type as the input messages.
+
+    Raises
+    ------
+    AssertionError
+        If any letter is not a capital English letter or any key is invalid.
+    """
+    require_numpy()
+    data = [
+        message.encode("ascii") if isinstance(message, str) else bytes(message)
+        for _, message in pairs
+    ]
+    assert all(
+        is_capital_letters(message) for message in data
+    ), "Letter must be a capital english letter"
+
+    results = [None] * len(pairs)
+    order = sorted(
+        range(len(pairs)),
+        key=lambda i: (len(pairs[i][0].rotor_wirings), len(data[i])),
+    )
+    for start in range(0, len(order), batch_size):
+        block = order[start : start + batch_size]
+        # Split the block where the number of rotors changes
+        groups = {}
+        for i in block:
+            groups.setdefault(len(pairs[i][0].rotor_wirings), []).append(i)
+        for indexes in groups.values():
+            tables = stack_keys([pairs[i][0] for i in indexes])
+            length = max(len(data[i]) for i in indexes)
+            letters = np.full((len(indexes), length), 65, dtype=np.uint8)
+            for row, i in enumerate(indexes):
+                letters[row, : len(data[i])] = np.frombuffer(data[i], dtype=np.uint8)
+            encrypted = encrypt_padded(tables, letters)
+            for row, i in enumerate(indexes):
+                result = encrypted[row, : len(data[i])].tobytes()
+                results[i] = (
+                    result.decode("ascii") if isinstance(pairs[i][1], str) else result
+                )
+    return results
@@ -0,0 +1,268 @@
+import random
+from time import perf_counter
+
+from .compiled import advance_offsets
+from .machine import RotorMachine
+from .object import BYTES, PlugBoard, Reflector, Rotor, RotorMechanism
+from .tracing import PrintTracer
+
+__all__ = ["ByteEnigmaMachine"]
+
+# Number of bytes translated per pass, bounds temporary memory
+CHUNK_SIZE = 1 << 20
+
+
+def _shift(steps: int) -> bytes:
+    """Translation table adding ``steps`` to every byte value, modulo 256."""
+    steps %= 256
+    return BYTES[steps:] + BYTES[:steps]
+
+
+class ByteEnigmaMachine(RotorMachine):
+    """Enigma machine over the 256 byte values, for binary payloads.
+
+    The components are the regular ones with the BYTES alphabet, so the
+    rotors step like an odometer in base 256. Encryption doesn't walk them:
+    for every offset, each rotor is a 256-byte ``bytes.translate`` table.
+    The fastest rotor is applied to strided slices (all the bytes that see
+    the same fast offset at once) and the slow rotors and reflector, which
+    only change every 256 bytes, are composed into one table per run.
+    """
+
+    def __init__(
+        self,
+        rotor_wirings: list[bytes],
+        rotor_offsets: list[int],
+        reflector_wiring: bytes,
+        plugboard_wirings: dict = None,
+        rotor_names: list[str] = None,
+        reflector_name: str = None,
+    ):
+        """Initialize the machine and its translation tables.
+
+        Parameters
+        ----------
+        rotor_wirings : list[bytes]
+            Rotor wirings, permutations of the 256 byte values, fastest
+            rotor first.
+        rotor_offsets : list[int]
+            Rotor offsets, between 0 and 255.
+        reflector_wiring : bytes
+            Reflector wiring, a permutation of the 256 byte values. It should
+            be an involution for decryption to be encryption.
+        plugboard_wirings : dict, optional
+            Plugboard wiring between byte values, by default None.
+        rotor_names : list[str], optional
+            Rotor names, by default None.
+        reflector_name : str, optional
+            Reflector name, by default None.
+
+        Raises
+        ------
+        AssertionError
+            If the offsets don't match the wirings, or any wiring or offset
+            is invalid.
+        """
+        assert len(rotor_wirings) == len(
+            rotor_offsets
+        ), "Rotor wirings and offsets must have the same length"
+        rotor_wirings = [bytes(wiring) for wiring in rotor_wirings]
+        reflector_wiring = bytes(reflector_wiring)
+        rotor_names = rotor_names or [None] * len(rotor_wirings)
+        rotors = [
+            Rotor(offset=offset, wiring=wiring, name=name, alphabet=BYTES)
+            for offset, wiring, name in zip(rotor_offsets, rotor_wirings, rotor_names)
+        ]
+        super().__init__(
+            [
+                PlugBoard(wiring=plugboard_wirings, alphabet=BYTES),
+                RotorMechanism(rotors=rotors, alphabet=BYTES),
+                Reflector(wiring=reflector_wiring, name=reflector_name, alphabet=BYTES),
+                RotorMechanism(rotors=rotors, inversed=True, alphabet=BYTES),
+                PlugBoard(wiring=plugboard_wirings, alphabet=BYTES),
+            ]
+        )
+
+        plugboard_wirings = plugboard_wirings or {}
+        self._plugboard = bytes(plugboard_wirings.get(i, i) for i in BYTES)
+        self._reflector = reflector_wiring
+        # Forward rotor at offset o maps x to W[(x + o) % 256]: W rotated by o
+        self._forward = [
+            [wiring[offset:] + wiring[:offset] for offset in range(256)]
+            for wiring in rotor_wirings
+        ]
+        # Inverse rotor at offset o maps y to (W^-1[y] - o) % 256
+        self._inverse = []
+        for wiring in rotor_wirings:
+            inverse = bytes(wiring.index(i) for i in BYTES)
+            self._inverse.append(
+                [inverse.translate(_shift(-offset)) for offset in range(256)]
+            )
+        self.initial_state = self.snapshot()
+
+    def __str__(self):
+        return f"ByteEnigmaMachine instance with {len(self._forward)} rotors"
+
+    @classmethod
+    def generate(cls, n_rotors: int = 3, seed=None, rotor_offsets: list[int] = None):
+        """Create a machine with random wirings.
+
+        Parameters
+        ----------
+        n_rotors : int, optional
+            Number of rotors, by default 3.
+        seed : optional
+            Seed of the wirings. The same seed always gives the same machine.
+        rotor_offsets : list[int], optional
+            Rotor offsets, by default all 0.
+
+        Returns
+        -------
+        ByteEnigmaMachine
+            A machine with random rotors and a random reflector without
+            fixed points, so that decryption is encryption.
+        """
+        rng = random.Random(seed)
+        rotor_wirings = [bytes(rng.sample(BYTES, 256)) for _ in range(n_rotors)]
+        values = rng.sample(BYTES, 256)
+        reflector = bytearray(256)
+        for a, b in zip(values[::2], values[1::2]):
+            reflector[a], reflector[b] = b, a
+        return cls(rotor_wirings, rotor_offsets or [0] * n_rotors, bytes(reflector))
+
+    def encrypt(self, data, verbose: bool = False):
+        """Encrypt binary data.
+
+        Parameters
+        ----------
+        data : bytes-like
+            The bytes to encrypt.
+        verbose : bool, optional
+            If True, prints the encryption process. Verbose mode, like an
+            attached tracer, walks the components byte by byte.
+
+        Returns
+        -------
+        bytes or bytearray
+            The encrypted bytes, a bytearray if ``data`` is one.
+        """
+        if verbose or self.tracer is not None:
+            encrypted = self._encrypt_traced(
+                bytes(data), PrintTracer() if verbose else self.tracer
+            )
+        else:
+            encrypted = bytearray(memoryview(data).nbytes)
+            self.encrypt_into(data, encrypted)
+        return encrypted if isinstance(data, bytearray) else bytes(encrypted)
+
+    def encrypt_text(self, text, keep_non_letters: bool = False):
+        """Reject text: binary machines encrypt every byte, see ``encrypt``.
+
+        Raises
+        ------
+        TypeError
+            Always, as there are no letters to normalize.
+        """
+        raise TypeError(
+            "ByteEnigmaMachine encrypts raw bytes, use encrypt instead of encrypt_text"
+        )
+
+    def encrypt_into(self, data, out) -> int:
+        """Encrypt binary data into a preallocated buffer.
+
+        Parameters
+        ----------
+        data : bytes-like
+            The bytes to encrypt.
+        out : writable bytes-like
+            Buffer receiving the encrypted bytes, at least as long as
+            ``data``. It may be ``data`` itself.
+
+        Returns
+        -------
+        int
+            The number of bytes encrypted.
+
+        Raises
+        ------
+        AssertionError
+            If ``out`` is read-only or too small.
+        """
+        source = memoryview(data).cast("B")
+        target = memoryview(out).cast("B")
+        assert not target.readonly, "Output buffer must be writable"
+        assert len(target) >= len(source), "Output buffer is smaller than the data"
+        if self.tracer is not None:
+            target[: len(source)] = self._encrypt_traced(bytes(source), self.tracer)
+            return len(source)
+        offsets, clicks = self._rotor_state()
+        for start in range(0, len(source), CHUNK_SIZE):
+            chunk = source[start : start + CHUNK_SIZE]
+            target[start : start + len(chunk)] = self._translate(
+                bytes(chunk),
+                advance_offsets(offsets, clicks, start, 256),
+                clicks + start,
+            )
+        self._advance(offsets, clicks, len(source))
+        return len(source)
+
+    def _encrypt_traced(self, data: bytes, tracer) -> bytes:
+        """Encrypt bytes walking the components and reporting to a tracer."""
+        start = perf_counter()
+        encrypted = bytearray()
+        for byte in data:
+            byte_ = byte
+            for component in self.config:
+                byte_ = component.trace(byte_, tracer)
+            tracer.letter(byte, byte_)
+            encrypted.append(byte_)
+        tracer.call(self, len(data), perf_counter() - start)
+        return bytes(encrypted)
+
+    def _translate(self, data: bytes, offsets: list[int], clicks: int) -> bytearray:
+        """Encrypt bytes from a rotor state without moving the rotors."""
+        x = bytearray(data.translate(self._plugboard))
+        if not self._forward:
+            return bytearray(x.translate(self._reflector).translate(self._plugboard))
+
+        fast = offsets[0]
+        for j in range(min(256, len(x))):
+            x[j::256] = x[j::256].translate(self._forward[0][(fast + j) % 256])
+        # Runs of constant slow rotors end where the click counter reaches a
+        # multiple of 256. The second rotor steps at every run, the following
+        # ones only every 65536 clicks, so their composition is kept
+        forward, inverse = self._forward[1:2], self._inverse[1:2]
+        position, run = 0, 256 - clicks % 256
+        while position < len(x):
+            if position == 0 or (clicks + position) % 65536 == 0:
+                slow = advance_offsets(offsets, clicks, position, 256)[1:]
+                middle = self._middle(tuple(slow[1:]))
+            elif forward:
+                slow[0] = (slow[0] + 1) % 256
+            if forward:
+                core = (
+                    forward[0][slow[0]].translate(middle).translate(inverse[0][slow[0]])
+                )
+            else:
+                core = middle
+            x[position : position + run] = x[position : position + run].translate(core)
+            position += run
+            run = 256
+        for j in range(min(256, len(x))):
+            x[j::256] = x[j::256].translate(self._inverse[0][(fast + j) % 256])
+        return bytearray(x.translate(self._plugboard))
+
+    def _middle(self, offsets: tuple) -> bytes:
+        """Composition of the rotors after the second one and the reflector."""
+        middle = BYTES
+        for rotor, offset in enumerate(offsets, start=2):
+            middle = middle.translate(self._forward[rotor][offset])
+        middle = middle.translate(self._reflector)
+        for rotor, offset in reversed(list(enumerate(offsets, start=2))):
+            middle = middle.translate(self._inverse[rotor][offset])
+        return middle
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of byte chunks, carrying the rotor state across them."""
+        for chunk in chunks:
+            yield self.encrypt(chunk)
@@ -0,0 +1,338 @@
+import itertools
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .configurations import REFLECTOR_CONFIGURATIONS, ReflectorConfig, RotorConfig
+from .object import LETTERS, is_capital_letters
+from .search import Candidate, SearchReport
+from .vectorized import np, require_numpy, scrambler_tables
+
+__all__ = ["build_menu", "crib_positions", "crib_unit", "crib_attack"]
+
+# Number of starting rotor positions tested together in one vectorized pass
+BLOCK_SIZE = 2048
+
+# Crib offsets scanned together, bounds the temporary masks of crib_positions
+SCAN_CHUNK_SIZE = 1 << 20
+
+
+def build_menu(ciphertext: str, crib: str, crib_offset: int = 0) -> list[tuple]:
+    """Build the menu graph linking crib letters to ciphertext letters.
+
+    Parameters
+    ----------
+    ciphertext : str
+        The ciphertext, in capital English letters.
+    crib : str
+        The suspected plaintext, in capital English letters.
+    crib_offset : int, optional
+        Position of the crib in the ciphertext, by default 0.
+
+    Returns
+    -------
+    list[tuple]
+        Edges ``(plain_index, cipher_index, position)`` where ``position``
+        is the stream position of the pair.
+
+    Raises
+    ------
+    AssertionError
+        If the crib doesn't fit in the ciphertext, or a crib letter is
+        encrypted to itself, which the reflector makes impossible.
+    """
+    assert crib_offset + len(crib) <= len(ciphertext), "Crib must fit in ciphertext"
+    cipher = ciphertext[crib_offset : crib_offset + len(crib)]
+    assert all(
+        p != c for p, c in zip(crib, cipher)
+    ), "A letter can never be encrypted to itself"
+    return [
+        (LETTERS.index(p), LETTERS.index(c), crib_offset + i)
+        for i, (p, c) in enumerate(zip(crib, cipher))
+    ]
+
+
+def crib_positions(
+    ciphertext: "np.ndarray", cribs: list[str], chunk_size: int = SCAN_CHUNK_SIZE
+) -> dict:
+    """Find every offset where a crib can sit in a ciphertext.
+
+    No letter ever encrypts to itself, so a crib can only be at offsets
+    where it doesn't share a letter with the ciphertext at the same
+    position. The crib slides over the ciphertext one chunk of offsets at a
+    time: each ciphertext letter is compared once per chunk with each crib
+    letter, and the shifted comparisons are combined, so memory stays
+    bounded whatever the size of the ciphertext.
+
+    Parameters
+    ----------
+    ciphertext : np.ndarray
+        Integer array with the letter indexes (0 to 25) of the ciphertext,
+        possibly a read-only ``np.memmap`` of a large corpus.
+    cribs : list[str]
+        The suspected plaintexts, in capital English letters.
+    chunk_size : int, optional
+        Number of offsets scanned per pass, by default 1 << 20.
+
+    Returns
+    -------
+    dict
+        For every crib, the int64 array of its admissible offsets, in
+        increasing order.
+
+    Raises
+    ------
+    AssertionError
+        If any crib is empty or not made of capital English letters.
+    """
+    require_numpy()
+    cribs = list(dict.fromkeys(cribs))
+    for crib in cribs:
+        assert crib and is_capital_letters(
+            crib
+        ), "Letter must be a capital english letter"
+    codes = {
+        crib: np.frombuffer(crib.encode("ascii"), dtype=np.uint8) - 65 for crib in cribs
+    }
+    longest = max((len(crib) for crib in cribs), default=0)
+    found = {crib: [] for crib in cribs}
+
+    for start in range(0, len(ciphertext), chunk_size):
+        window = np.asarray(ciphertext[start : start + chunk_size + longest - 1])
+        # Positions of every letter in the window, shared by the cribs
+        matches = {}
+        for crib in cribs:
+            count = min(chunk_size, len(ciphertext) - len(crib) + 1 - start)
+            if count <= 0:
+                continue
+            blocked = np.zeros(count, dtype=bool)
+            for i, letter in enumerate(codes[crib]):
+                if letter not in matches:
+                    matches[letter] = window == letter
+                blocked |= matches[letter][i : i + count]
+            found[crib].append(np.flatnonzero(~blocked) + start)
+    return {
+        crib: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        for crib, parts in found.items()
+    }
+
+
+def _test_letter(menu: list[tuple]) -> tuple:
+    """Most connected letter of the menu and the edges of its component."""
+    degree = Counter(letter for a, b, _ in menu for letter in (a, b))
+    test_letter = degree.most_common(1)[0][0]
+    component, edges = {test_letter}, []
+    remaining = list(menu)
+    while True:
+        linked = [
+            edge for edge in remaining if edge[0] in component or edge[1] in component
+        ]
+        if not linked:
+            return test_letter, edges
+        for edge in linked:
+            component.update(edge[:2])
+            edges.append(edge)
+            remaining.remove(edge)
+
+
+def _propagate(tables: "np.ndarray", edges: list[tuple], test_letter: int) -> tuple:
+    """Propagate plugboard hypotheses through the menu, bombe style.
+
+    Every row of ``tables`` is a starting rotor position. For each of them,
+    the 26 hypotheses for the partner of the test letter are tested at once.
+    A hypothesis is rejected as soon as a letter is deduced to be plugged to
+    two different letters, including through the symmetry of the plugboard
+    (the diagonal board of the bombe).
+
+    Returns
+    -------
+    tuple
+        Indexes of the surviving rows of ``tables * 26`` hypotheses and the
+        deduced plugboard of each of them (-1 where unknown).
+    """
+    n_positions = len(tables)
+    rows = np.arange(n_positions * 26)
+    plugs = np.full((len(rows), 26), -1, dtype=np.int8)
+    plugs[:, test_letter] = rows % 26
+    plugs[rows, rows % 26] = test_letter
+
+    alive = np.ones(len(rows), dtype=bool)
+    changed = True
+    while changed:
+        changed = False
+        keep = np.flatnonzero(alive)
+        rows, plugs, alive = rows[keep], plugs[keep], alive[keep]
+        position = rows // 26
+        for a, b, step in edges:
+            for source, target in ((a, b), (b, a)):
+                known = plugs[:, source] >= 0
+                value = tables[position, step, plugs[:, source].clip(0)]
+                existing = plugs[:, target]
+                alive &= ~(known & (existing >= 0) & (existing != value))
+                new = known & (existing < 0)
+                if new.any():
+                    changed = True
+                    plugs[new, target] = value[new]
+        # The plugboard is symmetric: S(x) = u implies S(u) = x
+        for letter in range(26):
+            known = np.flatnonzero(plugs[:, letter] >= 0)
+            partner = plugs[known, letter]
+            existing = plugs[known, partner]
+            alive[known[(existing >= 0) & (existing != letter)]] = False
+            new = known[existing < 0]
+            if len(new):
+                changed = True
+                plugs[new, plugs[new, letter]] = letter
+    return rows[alive], plugs[alive]
+
+
+def crib_unit(
+    ciphertext: str,
+    crib: str,
+    crib_offset: int,
+    rotor_config: list[RotorConfig],
+    reflector_config: ReflectorConfig,
+) -> list[Candidate]:
+    """Test every starting position of one rotor order and reflector.
+
+    Parameters
+    ----------
+    ciphertext : str
+        The ciphertext, in capital English letters.
+    crib : str
+        The suspected plaintext, in capital English letters.
+    crib_offset : int
+        Position of the crib in the ciphertext.
+    rotor_config : list[RotorConfig]
+        The rotor order, fastest rotor first.
+    reflector_config : ReflectorConfig
+        The reflector.
+
+    Returns
+    -------
+    list[Candidate]
+        The surviving settings. Their plugboard wiring holds the deduced
+        connections and their score is the number of deduced letters.
+    """
+    require_numpy()
+    menu = build_menu(ciphertext, crib, crib_offset)
+    test_letter, edges = _test_letter(menu)
+    steps = sorted({step for _, _, step in edges})
+    edges = [(a, b, steps.index(step)) for a, b, step in edges]
+
+    n_rotors = len(rotor_config)
+    total = 26**n_rotors
+    survivors = []
+    for start in range(0, total, BLOCK_SIZE):
+        index = np.arange(start, min(start + BLOCK_SIZE, total))
+        positions = np.stack([index // 26**r % 26 for r in range(n_rotors)], axis=1)
+        tables = scrambler_tables(
+            [r_c.wiring for r_c in rotor_config],
+            reflector_config.wiring,
+            positions,
+            np.array(steps),
+        )
+        rows, plugs = _propagate(tables, edges, test_letter)
+        for row, plug in zip(rows, plugs):
+            wiring = {
+                LETTERS[i]: LETTERS[j] for i, j in enumerate(plug) if j >= 0 and i != j
+            }
+            survivors.append(
+                Candidate(
+                    score=float((plug >= 0).sum()),
+                    rotor_config=list(rotor_config),
+                    rotor_offsets=[int(p) for p in positions[row // 26]],
+                    reflector_config=reflector_config,
+                    plugboard_wirings=wiring,
+                )
+            )
+    return survivors
+
+
+def _crib_unit(args: tuple) -> list[Candidate]:
+    return crib_unit(*args)
+
+
+def crib_attack(
+    ciphertext: str,
+    crib: str,
+    rotor_set: list[RotorConfig],
+    crib_offset: int = 0,
+    n_rotors: int = 3,
+    reflectors: list[ReflectorConfig] = None,
+    workers: int = None,
+    crib_offsets: list[int] = None,
+) -> SearchReport:
+    """Known-plaintext attack in the manner of Turing's bombe.
+
+    Every rotor order drawn from ``rotor_set``, every starting position and
+    every reflector is tested against the menu built from the crib. Each
+    (crib offset, rotor order, reflector) triple is a unit of work for a
+    process pool. The rotors step like an odometer with all ring settings
+    at 0, see ``scrambler_tables``.
+
+    Parameters
+    ----------
+    ciphertext : str
+        The ciphertext, in capital English letters.
+    crib : str
+        The suspected plaintext, in capital English letters.
+    rotor_set : list[RotorConfig]
+        Rotors to draw the rotor orders from, e.g. an entry of
+        ROTOR_CONFIGURATIONS.
+    crib_offset : int, optional
+        Position of the crib in the ciphertext, by default 0.
+    n_rotors : int, optional
+        Number of rotors in the machine, by default 3.
+    reflectors : list[ReflectorConfig], optional
+        Reflectors to try, by default every entry of REFLECTOR_CONFIGURATIONS.
+    workers : int, optional
+        Number of worker processes, by default ``os.cpu_count()``. With a
+        single worker the attack runs in this process.
+    crib_offsets : list[int], optional
+        Positions to try the crib at instead of ``crib_offset``, e.g. the
+        admissible offsets found by ``crib_positions``.
+
+    Returns
+    -------
+    SearchReport
+        Every surviving setting with its partial plugboard, most deduced
+        letters first, with the number of settings tested and the elapsed
+        time.
+
+    Raises
+    ------
+    AssertionError
+        If the crib can't be at one of its offsets or any letter is not a
+        capital English letter.
+    """
+    require_numpy()
+    for text in (ciphertext, crib):
+        assert text and is_capital_letters(
+            text
+        ), "Letter must be a capital english letter"
+    offsets = [crib_offset] if crib_offsets is None else [int(o) for o in crib_offsets]
+    for offset in offsets:
+        build_menu(ciphertext, crib, offset)
+    reflectors = reflectors or list(REFLECTOR_CONFIGURATIONS.values())
+    units = [
+        (ciphertext, crib, offset, list(order), reflector)
+        for offset in offsets
+        for order in itertools.permutations(rotor_set, n_rotors)
+        for reflector in reflectors
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        candidates = list(itertools.chain.from_iterable(map(_crib_unit, units)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_crib_unit, units)
+            candidates = list(itertools.chain.from_iterable(results))
+    return SearchReport(
+        candidates=sorted(candidates, reverse=True),
+        tested=len(units) * 26**n_rotors,
+        elapsed=time.perf_counter() - start,
+    )
@@ -0,0 +1,151 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from .configurations import ReflectorConfig, RotorConfig
+from .machine import EnigmaMachine
+
+__all__ = ["MachineCache", "MACHINE_CACHE"]
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class MachineCache:
+    """LRU cache of validated, compiled machines keyed by their wirings.
+
+    Every entry is a compiled template machine. ``machine`` hands out
+    independent clones of it, positioned at the requested rotor offsets,
+    so repeated keys skip validation and compilation entirely.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """Initialize the cache.
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            Maximum number of cached machines, by default 256.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return (
+            f"MachineCache instance with {len(self._entries)}/{self.maxsize} machines"
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def cache_info(self) -> CacheInfo:
+        """Return the hit and miss counters and the size of the cache."""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def resize(self, maxsize: int):
+        """Change the maximum size, evicting the least recently used entries."""
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def machine(
+        self,
+        rotor_wirings: list[str],
+        rotor_offsets: list[int],
+        reflector_wirings: str,
+        plugboard_wirings: dict = None,
+        rotor_names: list[str] = None,
+        reflector_name: str = None,
+        rotor_notches: list[str] = None,
+        stepping: str = "odometer",
+        ring_settings: list[int] = None,
+    ) -> EnigmaMachine:
+        """Return a compiled machine positioned at the given rotor offsets.
+
+        Parameters are the same as for ``EnigmaMachine``. Names are only
+        used when the machine is not in the cache yet.
+
+        Returns
+        -------
+        EnigmaMachine
+            A new machine, independent from every other one handed out.
+        """
+        plugboard_wirings = plugboard_wirings or {}
+        rotor_notches = rotor_notches or [""] * len(rotor_wirings)
+        ring_settings = ring_settings or [0] * len(rotor_wirings)
+        key = (
+            tuple(rotor_wirings),
+            reflector_wirings,
+            frozenset(plugboard_wirings.items()),
+            tuple(rotor_notches),
+            stepping,
+            tuple(ring_settings),
+        )
+        with self._lock:
+            template = self._entries.get(key)
+            if template is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            else:
+                self.misses += 1
+        if template is None:
+            template = EnigmaMachine(
+                rotor_wirings=list(rotor_wirings),
+                rotor_offsets=[0] * len(rotor_wirings),
+                reflector_wirings=reflector_wirings,
+                plugboard_wirings=dict(plugboard_wirings),
+                rotor_names=rotor_names or [None] * len(rotor_wirings),
+                reflector_name=reflector_name,
+                rotor_notches=list(rotor_notches),
+                stepping=stepping,
+                ring_settings=list(ring_settings),
+            ).compile()
+            with self._lock:
+                template = self._entries.setdefault(key, template)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return template.clone(rotor_offsets=rotor_offsets)
+
+    def from_configuration(
+        self,
+        rotor_config: list[RotorConfig],
+        rotor_offsets: list[int],
+        reflector_config: ReflectorConfig,
+        plugboard_wirings: dict = None,
+        stepping: str = "odometer",
+        ring_settings: list[int] = None,
+    ) -> EnigmaMachine:
+        """Return a compiled machine built from configuration settings.
+
+        Parameters are the same as for ``EnigmaMachine.from_configuration``.
+
+        Returns
+        -------
+        EnigmaMachine
+            A new machine, independent from every other one handed out.
+        """
+        return self.machine(
+            rotor_wirings=[r_c.wiring for r_c in rotor_config],
+            rotor_offsets=rotor_offsets,
+            reflector_wirings=reflector_config.wiring,
+            plugboard_wirings=plugboard_wirings,
+            rotor_names=[r_c.name for r_c in rotor_config],
+            reflector_name=reflector_config.name,
+            rotor_notches=[r_c.notches for r_c in rotor_config],
+            stepping=stepping,
+            ring_settings=ring_settings,
+        )
+
+
+# Process-wide cache
+MACHINE_CACHE = MachineCache()
@@ -0,0 +1,232 @@
+import argparse
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from .configurations import REFLECTOR_CONFIGURATIONS, ROTOR_CONFIGURATIONS
+from .machine import EnigmaMachine
+from .normalize import casefold, merge_letters, split_letters
+from .object import STEPPING_MODELS
+from . import vectorized
+
+# Number of letters encrypted per mapped slice
+CHUNK_SIZE = 1 << 22
+
+
+def parse_plugboard(pairs: str) -> dict:
+    """Parse plugboard pairs such as ``"AB,CD"`` into a symmetric wiring."""
+    wiring = {}
+    for pair in filter(None, pairs.upper().split(",")):
+        if len(pair) != 2:
+            raise argparse.ArgumentTypeError(f"Invalid plugboard pair: {pair}")
+        wiring[pair[0]] = pair[1]
+        wiring[pair[1]] = pair[0]
+    return wiring
+
+
+def parse_ints(values: str) -> list[int]:
+    """Parse a comma separated list of integers."""
+    try:
+        return [int(value) for value in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid list of integers: {values}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="enigmachine",
+        description=(
+            "Encrypt text files with an Enigma machine. Letters are uppercased and "
+            "encrypted, any other byte is passed through unchanged."
+        ),
+    )
+    parser.add_argument("input", help="File to encrypt")
+    parser.add_argument(
+        "-o", "--output", help="Output file, by default the input is encrypted in place"
+    )
+    parser.add_argument(
+        "-r",
+        "--rotors",
+        required=True,
+        choices=list(ROTOR_CONFIGURATIONS),
+        help="Name of the rotor set",
+    )
+    parser.add_argument(
+        "--rotor-order",
+        type=parse_ints,
+        help="Indexes of the rotors of the set to use, fastest first, e.g. 2,0,1",
+    )
+    parser.add_argument(
+        "-f",
+        "--reflector",
+        required=True,
+        choices=list(REFLECTOR_CONFIGURATIONS),
+        help="Name of the reflector",
+    )
+    parser.add_argument(
+        "--offsets", type=parse_ints, help="Rotor offsets, by default all 0"
+    )
+    parser.add_argument(
+        "--rings", type=parse_ints, help="Ring settings (0 for A), by default all 0"
+    )
+    parser.add_argument(
+        "-p",
+        "--plugboard",
+        type=parse_plugboard,
+        default={},
+        help="Plugboard pairs, e.g. AB,CD",
+    )
+    parser.add_argument(
+        "--stepping",
+        choices=STEPPING_MODELS,
+        default="odometer",
+        help="Rotor stepping model, by default odometer",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_SIZE, help="Bytes per mapped slice"
+    )
+    return parser
+
+
+def machine_from_args(args: argparse.Namespace) -> EnigmaMachine:
+    rotor_set = ROTOR_CONFIGURATIONS[args.rotors]
+    order = args.rotor_order or range(len(rotor_set))
+    rotor_config = [rotor_set[i] for i in order]
+    return EnigmaMachine.from_configuration(
+        rotor_config=rotor_config,
+        rotor_offsets=args.offsets or [0] * len(rotor_config),
+        reflector_config=REFLECTOR_CONFIGURATIONS[args.reflector],
+        plugboard_wirings=args.plugboard,
+        stepping=args.stepping,
+        ring_settings=args.rings,
+    ).compile()
+
+
+def encrypt_chunk(machine: EnigmaMachine, chunk: bytes):
+    """Encrypt the letters of a chunk of text, passing other bytes through.
+
+    Lowercase English letters are uppercased. Any other byte keeps its
+    position and doesn't advance the rotors.
+
+    Returns
+    -------
+    tuple
+        The encrypted chunk, as a bytes-like object of the same length, and
+        the number of letters encrypted.
+    """
+    np = vectorized.np
+    if np is None:
+        letters, pieces = split_letters(chunk)
+        return merge_letters(machine.encrypt_bytes(letters), pieces), len(letters)
+    codes = np.frombuffer(casefold(chunk), dtype=np.uint8).copy()
+    letters = (codes >= 65) & (codes <= 90)
+    codes[letters] = machine.encrypt_array(codes[letters])
+    return codes, int(np.count_nonzero(letters))
+
+
+def encrypt_mapped(
+    machine: EnigmaMachine, source: mmap.mmap, sink: mmap.mmap, chunk_size: int
+) -> int:
+    """Encrypt a mapped file into another mapping.
+
+    Slices are copied out of the mapping one chunk at a time so that no
+    buffer export outlives the mappings.
+
+    Returns
+    -------
+    int
+        The number of letters encrypted.
+    """
+    total = 0
+    for start in range(0, len(source), chunk_size):
+        end = min(start + chunk_size, len(source))
+        sink[start:end], letters = encrypt_chunk(machine, source[start:end])
+        total += letters
+    return total
+
+
+def _umask() -> int:
+    """Return the file mode creation mask of the process."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def encrypt_file(
+    machine: EnigmaMachine, input: str, output: str = None, chunk_size: int = CHUNK_SIZE
+) -> int:
+    """Encrypt a text file through memory mappings.
+
+    Letters are uppercased and encrypted, any other byte (newlines,
+    punctuation) is passed through unchanged without advancing the rotors.
+    The output is written to a temporary file that replaces the target once
+    complete, so a failure never leaves a partly encrypted file behind. It
+    keeps the mode of the file it replaces, or gets the default mode of new
+    files.
+
+    Parameters
+    ----------
+    machine : EnigmaMachine
+        The machine used to encrypt.
+    input : str
+        Path of the file to encrypt.
+    output : str, optional
+        Path of the output file. By default the input is replaced by its
+        encryption.
+    chunk_size : int, optional
+        Number of bytes encrypted per slice of the mapping.
+
+    Returns
+    -------
+    int
+        The number of letters encrypted.
+    """
+    output = output or input
+    size = os.path.getsize(input)
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "r+b") as out:
+            out.truncate(size)
+            letters = 0
+            if size:
+                with open(input, "rb") as fh, mmap.mmap(
+                    fh.fileno(), 0, access=mmap.ACCESS_READ
+                ) as source, mmap.mmap(out.fileno(), 0) as sink:
+                    letters = encrypt_mapped(machine, source, sink, chunk_size)
+                    sink.flush()
+        if os.path.exists(output):
+            shutil.copymode(output, temporary)
+        else:
+            os.chmod(temporary, 0o666 & ~_umask())
+        os.replace(temporary, output)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return letters
+
+
+def main(argv: list[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        machine = machine_from_args(args)
+        start = time.perf_counter()
+        letters = encrypt_file(machine, args.input, args.output, args.chunk_size)
+    except (AssertionError, IndexError, OSError) as error:
+        print(f"enigmachine: error: {error}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"Encrypted {letters} letters in {elapsed:.3f}s "
+        f"({letters / max(elapsed, 1e-9) / 1e6:.2f} M letters/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def run():
+    sys.exit(main())
@@ -0,0 +1,387 @@
+from functools import lru_cache
+
+from .object import LETTERS, is_capital_letters
+
+__all__ = ["advance_offsets", "odometer_runs", "CompiledEnigma"]
+
+# Translation table mapping the ASCII codes of LETTERS to 0..25
+TO_INDEX = bytes.maketrans(LETTERS.encode("ascii"), bytes(range(26)))
+
+IDENTITY = bytes(range(26))
+
+# Letters validated and translated per slice of a buffer
+CHUNK_SIZE = 1 << 16
+
+
+def _translation(permutation) -> bytes:
+    """Extend a 26-entry permutation to a ``bytes.translate`` table."""
+    return bytes(permutation) + bytes(230)
+
+
+def advance_offsets(
+    offsets: list[int], clicks: int, steps: int, size: int = 26
+) -> list[int]:
+    """Compute the rotor offsets after a number of keypresses.
+
+    The rotor mechanism steps like an odometer: rotor ``i`` advances every
+    time the click counter reaches a multiple of ``size**i``, so the offsets
+    after any number of keypresses have a closed form.
+
+    Parameters
+    ----------
+    offsets : list[int]
+        The current rotor offsets.
+    clicks : int
+        The current click counter of the rotor mechanism.
+    steps : int
+        The number of keypresses to advance.
+    size : int, optional
+        The number of symbols of the rotors, by default 26.
+
+    Returns
+    -------
+    list[int]
+        The rotor offsets after ``steps`` keypresses.
+    """
+    return [
+        (offset + (clicks + steps) // size**i - clicks // size**i) % size
+        for i, offset in enumerate(offsets)
+    ]
+
+
+def odometer_runs(offsets: list[int], clicks: int, length: int, size: int = 26):
+    """Rotor positions of consecutive letters of an odometer mechanism.
+
+    Parameters
+    ----------
+    offsets : list[int]
+        The rotor offsets before the first letter, fastest rotor first.
+    clicks : int
+        The click counter of the rotor mechanism before the first letter.
+    length : int
+        The number of letters.
+    size : int, optional
+        The number of symbols of the rotors, by default 26.
+
+    Yields
+    ------
+    tuple
+        ``(slow_offsets, fast_offset, run)``: ``run`` letters, at most
+        ``size``, are encrypted with the slow rotors at ``slow_offsets`` while the
+        fastest rotor advances by one per letter from ``fast_offset``.
+    """
+    # Offset of rotor i at click c is (base[i] + c // size**i) % size
+    bases = [offset - clicks // size**i for i, offset in enumerate(offsets)]
+    fast_base = bases[0] if bases else 0
+    while length > 0:
+        run = min(size - clicks % size, length)
+        slow = tuple(
+            (base + clicks // size**i) % size for i, base in enumerate(bases) if i
+        )
+        yield slow, (fast_base + clicks) % size, run
+        clicks += run
+        length -= run
+
+
+class CompiledEnigma:
+    """Lookup-table engine equivalent to the components of an EnigmaMachine.
+
+    All the wirings are converted once to integer permutations (including
+    the inverse rotor wirings). For every rotor position the plugboard,
+    rotors, reflector, inverse rotors and plugboard are collapsed into a
+    single 26-entry substitution, so encrypting a letter is one lookup.
+    """
+
+    def __init__(
+        self,
+        rotor_wirings: list[str],
+        reflector_wiring: str,
+        plugboard_wirings: dict = None,
+        cache_size: int = 4096,
+        rings: list[int] = None,
+        exit_shift: bool = False,
+    ):
+        """Build the permutation tables.
+
+        Parameters
+        ----------
+        rotor_wirings : list[str]
+            List of rotor wirings, fastest rotor first.
+        reflector_wiring : str
+            Reflector wiring.
+        plugboard_wirings : dict, optional
+            Plugboard wiring, by default None.
+        cache_size : int, optional
+            Maximum number of substitution pages kept in memory,
+            by default 4096.
+        rings : list[int], optional
+            Ring setting of every rotor, by default all 0.
+        exit_shift : bool, optional
+            If True, the rotor wirings turn with the rotors like in the
+            historical machines (see ``Rotor``), by default False.
+
+        Raises
+        ------
+        AssertionError
+            If any wiring is not a valid permutation of LETTERS, or there
+            isn't one ring setting between 0 and 25 per rotor.
+        """
+        for wiring in list(rotor_wirings) + [reflector_wiring]:
+            assert all(
+                [len(wiring) == 26, set(wiring) == set(LETTERS)]
+            ), "Letter ordering must contain exactly 26 letters"
+        plugboard_wirings = plugboard_wirings or {}
+        assert all(
+            [
+                key in LETTERS and value in LETTERS
+                for key, value in plugboard_wirings.items()
+            ]
+        ), "Wiring must be a dictionary containing english letters"
+        rings = list(rings or [0] * len(rotor_wirings))
+        assert len(rings) == len(rotor_wirings) and all(
+            0 <= ring <= 25 for ring in rings
+        ), "Ring settings must be between 0 and 25, one per rotor"
+
+        self.rotor_tables = [
+            tuple(LETTERS.index(letter) for letter in wiring)
+            for wiring in rotor_wirings
+        ]
+        self.inverse_tables = [
+            tuple(wiring.index(letter) for letter in LETTERS)
+            for wiring in rotor_wirings
+        ]
+        self.reflector_table = tuple(LETTERS.index(l) for l in reflector_wiring)
+        self.plugboard_table = tuple(
+            LETTERS.index(plugboard_wirings.get(letter, letter)) for letter in LETTERS
+        )
+        self.rings = tuple(rings)
+        self.exit_shift = exit_shift
+        # Permutation of every rotor at every offset, in both directions
+        self.forward_offset_tables = []
+        self.inverse_offset_tables = []
+        for table, inverse, ring in zip(self.rotor_tables, self.inverse_tables, rings):
+            shifts = [(offset - ring) % 26 for offset in range(26)]
+            exits = shifts if exit_shift else [0] * 26
+            self.forward_offset_tables.append(
+                [
+                    tuple((table[(i + shift) % 26] - out) % 26 for i in range(26))
+                    for shift, out in zip(shifts, exits)
+                ]
+            )
+            self.inverse_offset_tables.append(
+                [
+                    tuple((inverse[(i + out) % 26] - shift) % 26 for i in range(26))
+                    for shift, out in zip(shifts, exits)
+                ]
+            )
+        # 256-entry translation tables for every rotor at every offset
+        self._forward = [
+            [_translation(permutation) for permutation in tables]
+            for tables in self.forward_offset_tables
+        ]
+        self._inverse = [
+            [_translation(permutation) for permutation in tables]
+            for tables in self.inverse_offset_tables
+        ]
+        self._plugboard = _translation(self.plugboard_table)
+        self._output = _translation([65 + i for i in self.plugboard_table])
+        self._page = lru_cache(maxsize=cache_size)(self._build_page)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["cache_size"] = self._page.cache_info().maxsize
+        del state["_page"]
+        return state
+
+    def __setstate__(self, state):
+        cache_size = state.pop("cache_size")
+        self.__dict__.update(state)
+        self._page = lru_cache(maxsize=cache_size)(self._build_page)
+
+    def __str__(self):
+        return f"CompiledEnigma instance with {len(self.rotor_tables)} rotors"
+
+    def _build_page(self, slow_offsets: tuple) -> tuple:
+        """Substitutions for every offset of the fastest rotor.
+
+        Permutations are composed with ``bytes.translate`` so that building
+        a page costs a few dozen C-level calls.
+
+        Parameters
+        ----------
+        slow_offsets : tuple
+            Offsets of every rotor except the fastest one.
+
+        Returns
+        -------
+        tuple
+            26 substitutions (one per fast rotor offset) as bytes mapping
+            letter indexes to ASCII capital letters.
+        """
+        core = IDENTITY
+        for rotor, offset in enumerate(slow_offsets, start=1):
+            core = core.translate(self._forward[rotor][offset])
+        core = core.translate(_translation(self.reflector_table))
+        for rotor, offset in reversed(list(enumerate(slow_offsets, start=1))):
+            core = core.translate(self._inverse[rotor][offset])
+        core = _translation(core)
+
+        plugged = IDENTITY.translate(self._plugboard)
+        if not self.rotor_tables:
+            return (plugged.translate(core).translate(self._output),) * 26
+        return tuple(
+            plugged.translate(forward)
+            .translate(core)
+            .translate(inverse)
+            .translate(self._output)
+            for forward, inverse in zip(self._forward[0], self._inverse[0])
+        )
+
+    def substitution(self, offsets: list[int]) -> str:
+        """Return the full substitution alphabet for the given rotor offsets.
+
+        Parameters
+        ----------
+        offsets : list[int]
+            The rotor offsets, fastest rotor first.
+
+        Returns
+        -------
+        str
+            The encrypted letter for every letter in LETTERS.
+        """
+        fast = offsets[0] if offsets else 0
+        return self._page(tuple(offsets[1:]))[fast].decode("ascii")
+
+    def encrypt(
+        self, letters: str, offsets: list[int], clicks: int = 0, stepping=None
+    ) -> str:
+        """Encrypt letters starting from the given rotor state.
+
+        The engine is stateless: use ``advance_offsets`` (or the stepping
+        table) to compute the rotor offsets after the encryption.
+
+        Parameters
+        ----------
+        letters : str
+            The letters to encrypt.
+        offsets : list[int]
+            The rotor offsets before the first letter, fastest rotor first.
+        clicks : int, optional
+            The click counter of the rotor mechanism, by default 0.
+        stepping : SteppingTable, optional
+            Stepping table of a notched mechanism, by default None (the
+            rotors step like an odometer).
+
+        Returns
+        -------
+        str
+            The encrypted letters.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        if not letters:
+            return ""
+        assert is_capital_letters(letters), "Letter must be a capital english letter"
+        return self.encrypt_bytes(
+            letters.encode("ascii"), offsets, clicks, stepping
+        ).decode("ascii")
+
+    def encrypt_bytes(
+        self, letters, offsets: list[int], clicks: int = 0, stepping=None
+    ) -> bytearray:
+        """Encrypt ASCII letters held in a bytes-like object.
+
+        Parameters
+        ----------
+        letters : bytes-like
+            The ASCII codes of the letters to encrypt.
+        offsets : list[int]
+            The rotor offsets before the first letter, fastest rotor first.
+        clicks : int, optional
+            The click counter of the rotor mechanism, by default 0.
+        stepping : SteppingTable, optional
+            Stepping table of a notched mechanism, by default None (the
+            rotors step like an odometer).
+
+        Returns
+        -------
+        bytearray
+            The ASCII codes of the encrypted letters.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        encrypted = bytearray(memoryview(letters).nbytes)
+        self.encrypt_into(letters, encrypted, offsets, clicks, stepping)
+        return encrypted
+
+    def encrypt_into(
+        self, letters, out, offsets: list[int], clicks: int = 0, stepping=None
+    ) -> int:
+        """Encrypt ASCII letters from a buffer into another one.
+
+        The letters are read and the results written one slice at a time,
+        so no copy of the whole message is made. ``out`` may be ``letters``
+        itself to encrypt in place.
+
+        Parameters
+        ----------
+        letters : bytes-like
+            The ASCII codes of the letters to encrypt.
+        out : writable bytes-like
+            Buffer receiving the ASCII codes of the encrypted letters, at
+            least as long as ``letters``.
+        offsets : list[int]
+            The rotor offsets before the first letter, fastest rotor first.
+        clicks : int, optional
+            The click counter of the rotor mechanism, by default 0.
+        stepping : SteppingTable, optional
+            Stepping table of a notched mechanism, by default None (the
+            rotors step like an odometer).
+
+        Returns
+        -------
+        int
+            The number of letters encrypted.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter, or ``out`` is
+            read-only or too small. Nothing is written in that case.
+        """
+        source = memoryview(letters).cast("B")
+        target = memoryview(out).cast("B")
+        assert not target.readonly, "Output buffer must be writable"
+        assert len(target) >= len(source), "Output buffer is smaller than the letters"
+        for start in range(0, len(source), CHUNK_SIZE):
+            assert is_capital_letters(
+                source[start : start + CHUNK_SIZE]
+            ), "Letter must be a capital english letter"
+
+        for start in range(0, len(source), CHUNK_SIZE):
+            indexes = bytes(source[start : start + CHUNK_SIZE]).translate(TO_INDEX)
+            if stepping is None:
+                runs = odometer_runs(
+                    advance_offsets(offsets, clicks, start),
+                    clicks + start,
+                    len(indexes),
+                )
+            else:
+                runs = stepping.runs(clicks + start, len(indexes))
+            position = 0
+            for slow, fast, run in runs:
+                page = self._page(slow)
+                page = page[fast:] + page[:fast]
+                segment = indexes[position : position + run]
+                target[start + position : start + position + run] = bytes(
+                    table[index] for table, index in zip(page, segment)
+                )
+                position += run
+        return len(source)
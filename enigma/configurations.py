@@ -1,13 +1,23 @@
 from dataclasses import dataclass
 
+__all__ = [
+    "RotorConfig",
+    "ROTOR_CONFIGURATIONS",
+    "ReflectorConfig",
+    "REFLECTOR_CONFIGURATIONS",
+]
+
 
 class RotorConfig:
     wiring: str
     name: str
+    notches: str
 
-    def __init__(self, wiring: str, name: str):
+    def __init__(self, wiring: str, name: str, notches: str = ""):
         self.wiring = wiring
         self.name = name
+        # Letters shown in the window when the rotor carries to the next one
+        self.notches = notches
 
 
 ROTOR_CONFIGURATIONS = {
@@ -17,32 +27,32 @@ ROTOR_CONFIGURATIONS = {
         RotorConfig(wiring="UQNTLSZFMREHDPXKIBVYGJCWOA", name="IIIC"),
     ],
     "German Railway (Rocket)": [
-        RotorConfig(wiring="JGDQOXUSCAMIFRVTPNEWKBLZYH", name="I"),
-        RotorConfig(wiring="NTZPSFBOKMWRCJDIVLAEYUXHGQ", name="II"),
-        RotorConfig(wiring="JVIUBHTCDYAKEQZPOSGXNRMWFL", name="III"),
+        RotorConfig(wiring="JGDQOXUSCAMIFRVTPNEWKBLZYH", name="I", notches="N"),
+        RotorConfig(wiring="NTZPSFBOKMWRCJDIVLAEYUXHGQ", name="II", notches="E"),
+        RotorConfig(wiring="JVIUBHTCDYAKEQZPOSGXNRMWFL", name="III", notches="Y"),
         RotorConfig(wiring="QYHOGNECVPUZTFDJAXWMKISRBL", name="UKW"),
         RotorConfig(wiring="QWERTZUIOASDFGHJKPYXCVBNML", name="ETW"),
     ],
     "Swiss K": [
-        RotorConfig(wiring="PEZUOHXSCVFMTBGLRINQJWAYDK", name="I-K"),
-        RotorConfig(wiring="ZOUESYDKFWPCIQXHMVBLGNJRAT", name="II-K"),
-        RotorConfig(wiring="EHRVXGAOBQUSIMZFLYNWKTPDJC", name="III-K"),
+        RotorConfig(wiring="PEZUOHXSCVFMTBGLRINQJWAYDK", name="I-K", notches="Y"),
+        RotorConfig(wiring="ZOUESYDKFWPCIQXHMVBLGNJRAT", name="II-K", notches="E"),
+        RotorConfig(wiring="EHRVXGAOBQUSIMZFLYNWKTPDJC", name="III-K", notches="N"),
         RotorConfig(wiring="IMETCGFRAYSQBZXWLHKDVUPOJN", name="UKW-K"),
         RotorConfig(wiring="QWERTZUIOASDFGHJKPYXCVBNML", name="ETW-K"),
     ],
     "Enigma I": [
-        RotorConfig(wiring="EKMFLGDQVZNTOWYHXUSPAIBRCJ", name="I"),
-        RotorConfig(wiring="AJDKSIRUXBLHWTMCQGZNPYFVOE", name="II"),
-        RotorConfig(wiring="BDFHJLCPRTXVZNYEIWGAKMUSQO", name="III"),
+        RotorConfig(wiring="EKMFLGDQVZNTOWYHXUSPAIBRCJ", name="I", notches="Q"),
+        RotorConfig(wiring="AJDKSIRUXBLHWTMCQGZNPYFVOE", name="II", notches="E"),
+        RotorConfig(wiring="BDFHJLCPRTXVZNYEIWGAKMUSQO", name="III", notches="V"),
     ],
     "M3 Army": [
-        RotorConfig(wiring="ESOVPZJAYQUIRHXLNFTGKDCMWB", name="IV"),
-        RotorConfig(wiring="VZBRGITYUPSDNHLXAWMJQOFECK", name="V"),
+        RotorConfig(wiring="ESOVPZJAYQUIRHXLNFTGKDCMWB", name="IV", notches="J"),
+        RotorConfig(wiring="VZBRGITYUPSDNHLXAWMJQOFECK", name="V", notches="Z"),
     ],
     "M3 & M4 Naval (FEB 1942)": [
-        RotorConfig(wiring="JPGVOUMFYQBENHZRDKASXLICTW", name="VI"),
-        RotorConfig(wiring="NZJHGRCXMYSWBOUFAIVLPEKQDT", name="VII"),
-        RotorConfig(wiring="FKQHTLXOCBJSPDZRAMEWNIUYGV", name="VIII"),
+        RotorConfig(wiring="JPGVOUMFYQBENHZRDKASXLICTW", name="VI", notches="ZM"),
+        RotorConfig(wiring="NZJHGRCXMYSWBOUFAIVLPEKQDT", name="VII", notches="ZM"),
+        RotorConfig(wiring="FKQHTLXOCBJSPDZRAMEWNIUYGV", name="VIII", notches="ZM"),
     ],
     "M4 R2": [
         RotorConfig(wiring="LEYJVCNIXWPBQMDRTAKZGFUHOS", name="Beta"),
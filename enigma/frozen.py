@@ -0,0 +1,240 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .compiled import CompiledEnigma, advance_offsets
+from .configurations import ReflectorConfig, RotorConfig
+from .machine import VECTORIZED_SIZE, EnigmaMachine
+from .stepping import SteppingTable
+from .vectorized import encrypt_array, np, require_numpy
+
+__all__ = ["FrozenEnigma"]
+
+
+@dataclass(frozen=True)
+class FrozenEnigma:
+    """Immutable compiled machine, safe to share between threads.
+
+    The machine has no rotor state: every call takes the stream position of
+    its first letter, counted from the initial rotor state, and returns the
+    position after its last letter. Nothing is mutated while encrypting
+    (the page cache of the engine and the stepping table are only memos),
+    so one instance can serve any number of threads, on free-threaded
+    builds too. Long messages go through NumPy kernels, which release the
+    GIL on regular builds.
+    """
+
+    engine: CompiledEnigma
+    offsets: tuple
+    clicks: int = 0
+    stepping: SteppingTable = None
+
+    def __str__(self):
+        return (
+            f"FrozenEnigma instance with {len(self.offsets)} rotors at offsets "
+            f"{list(self.offsets)}"
+        )
+
+    @classmethod
+    def from_machine(cls, machine: EnigmaMachine) -> "FrozenEnigma":
+        """Freeze the key of a machine, from its initial rotor state.
+
+        The machine is compiled if needed. Position ``p`` of the frozen
+        machine is position ``p`` of ``machine.seek``.
+        """
+        engine = machine.engine or machine.compile().engine
+        state = machine.initial_state
+        return cls(
+            engine,
+            tuple(state.offsets),
+            state.clicks,
+            machine.initial_stepping_table(),
+        )
+
+    @classmethod
+    def from_configuration(
+        cls,
+        rotor_config: list[RotorConfig],
+        rotor_offsets: list[int],
+        reflector_config: ReflectorConfig,
+        plugboard_wirings: dict = None,
+        stepping: str = "odometer",
+        ring_settings: list[int] = None,
+    ) -> "FrozenEnigma":
+        """Create a frozen machine from configuration settings.
+
+        Parameters are the same as for ``EnigmaMachine.from_configuration``.
+        """
+        return cls.from_machine(
+            EnigmaMachine.from_configuration(
+                rotor_config,
+                rotor_offsets,
+                reflector_config,
+                plugboard_wirings,
+                stepping,
+                ring_settings,
+            )
+        )
+
+    def state(self, position: int) -> tuple:
+        """Rotor offsets and click counter at a stream position.
+
+        Raises
+        ------
+        AssertionError
+            If the position is negative.
+        """
+        assert position >= 0, "Stream position must be positive"
+        clicks = self.clicks + position
+        if self.stepping is None:
+            return advance_offsets(list(self.offsets), self.clicks, position), clicks
+        return self.stepping.offsets(clicks), clicks
+
+    def encrypt(self, letters: str, start: int = 0) -> tuple:
+        """Encrypt letters from a stream position.
+
+        Parameters
+        ----------
+        letters : str
+            The letters to encrypt.
+        start : int, optional
+            Stream position of the first letter, by default 0.
+
+        Returns
+        -------
+        tuple
+            The encrypted letters and the stream position after them.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter or the position is
+            negative.
+        """
+        offsets, clicks = self.state(start)
+        encrypted = self.engine.encrypt(letters, offsets, clicks, self.stepping)
+        return encrypted, start + len(letters)
+
+    def encrypt_into(self, letters, out, start: int = 0) -> int:
+        """Encrypt ASCII letters from a buffer into a preallocated one.
+
+        Parameters
+        ----------
+        letters : bytes-like
+            The ASCII codes of the letters to encrypt.
+        out : writable bytes-like
+            Buffer receiving the encrypted letters, at least as long as
+            ``letters``. It may be ``letters`` itself.
+        start : int, optional
+            Stream position of the first letter, by default 0.
+
+        Returns
+        -------
+        int
+            The stream position after the last letter.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter, ``out`` is
+            read-only or too small, or the position is negative.
+        """
+        offsets, clicks = self.state(start)
+        length = memoryview(letters).nbytes
+        if np is not None and length >= VECTORIZED_SIZE:
+            target = np.frombuffer(out, dtype=np.uint8)
+            assert len(target) >= length, "Output buffer is smaller than the letters"
+            assert target.flags.writeable, "Output buffer must be writable"
+            encrypt_array(
+                self.engine,
+                np.frombuffer(letters, dtype=np.uint8),
+                offsets,
+                clicks,
+                self.stepping,
+                out=target[:length],
+            )
+        else:
+            self.engine.encrypt_into(letters, out, offsets, clicks, self.stepping)
+        return start + length
+
+    def encrypt_array(self, letters, start: int = 0, out=None) -> tuple:
+        """Encrypt a uint8 array of ASCII letters with NumPy kernels.
+
+        Parameters
+        ----------
+        letters : np.ndarray
+            uint8 array with the ASCII codes of the letters to encrypt.
+        start : int, optional
+            Stream position of the first letter, by default 0.
+        out : np.ndarray, optional
+            Array receiving the encrypted letters, by default a new one.
+
+        Returns
+        -------
+        tuple
+            The uint8 array of encrypted letters and the stream position
+            after them.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter or the position is
+            negative.
+        ImportError
+            If NumPy is not installed.
+        """
+        require_numpy()
+        offsets, clicks = self.state(start)
+        encrypted = encrypt_array(
+            self.engine, letters, offsets, clicks, self.stepping, out
+        )
+        return encrypted, start + len(encrypted)
+
+    def _encrypt_message(self, message, start: int) -> tuple:
+        if isinstance(message, str):
+            encrypted = bytearray(len(message))
+            end = self.encrypt_into(message.encode("ascii"), encrypted, start)
+            return encrypted.decode("ascii"), end
+        encrypted = bytearray(memoryview(message).nbytes)
+        end = self.encrypt_into(message, encrypted, start)
+        return bytes(encrypted), end
+
+    def encrypt_many(
+        self,
+        messages: list,
+        starts: list[int] = None,
+        workers: int = None,
+        executor=None,
+    ) -> list:
+        """Encrypt many messages with the same key in a thread pool.
+
+        Parameters
+        ----------
+        messages : list
+            Messages as ``str`` or ASCII bytes-like objects.
+        starts : list[int], optional
+            Stream position of every message, by default 0 for all of them.
+        workers : int, optional
+            Number of threads of the pool created for the call, by default
+            the ``ThreadPoolExecutor`` default.
+        executor : Executor, optional
+            Existing executor to run the messages on instead.
+
+        Returns
+        -------
+        list
+            ``(encrypted, end)`` pairs in the order of the messages, the
+            encrypted message having the type of the input (``bytes`` for
+            bytes-like inputs).
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter, any position is
+            negative, or there isn't one position per message.
+        """
+        starts = [0] * len(messages) if starts is None else list(starts)
+        assert len(starts) == len(messages), "There must be one start per message"
+        if executor is not None:
+            return list(executor.map(self._encrypt_message, messages, starts))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._encrypt_message, messages, starts))
@@ -0,0 +1,431 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from .configurations import ReflectorConfig, RotorConfig
+from .object import LETTERS, is_capital_letters
+from .search import Candidate
+from .vectorized import np, require_numpy, scrambler_tables
+
+__all__ = [
+    "NgramTable",
+    "ngram_codes",
+    "english_ngrams",
+    "PlugboardClimber",
+    "recover_plugboard",
+]
+
+# Bundled quadgram counts of English text, one "ABCD count" pair per line
+QUADGRAMS = os.path.join(os.path.dirname(__file__), "data", "english_quadgrams.txt")
+
+
+class NgramTable:
+    """Log-probabilities of n-grams stored as a flat array of 26**n floats."""
+
+    def __init__(self, log_probs: "np.ndarray", n: int):
+        """Initialize the table.
+
+        Parameters
+        ----------
+        log_probs : np.ndarray
+            Flat array with the log-probability of every n-gram, indexed by
+            the base-26 number formed by its letter indexes.
+        n : int
+            Length of the n-grams.
+
+        Raises
+        ------
+        AssertionError
+            If the array doesn't have 26**n entries.
+        """
+        require_numpy()
+        assert len(log_probs) == 26**n, "N-gram table must have 26**n entries"
+        self.log_probs = np.asarray(log_probs, dtype=np.float32)
+        self.n = n
+
+    def __str__(self):
+        return f"NgramTable instance of {self.n}-grams"
+
+    @classmethod
+    def from_text(cls, text: str, n: int, floor: float = 0.01):
+        """Count the n-grams of a text.
+
+        Parameters
+        ----------
+        text : str
+            Training text. Characters outside the English alphabet are
+            dropped and letters are uppercased.
+        n : int
+            Length of the n-grams.
+        floor : float, optional
+            Pseudo-count given to unseen n-grams, by default 0.01.
+
+        Returns
+        -------
+        NgramTable
+            The table of log-probabilities.
+        """
+        require_numpy()
+        letters = "".join(l for l in text.upper() if l in LETTERS)
+        indexes = np.frombuffer(letters.encode("ascii"), dtype=np.uint8) - 65
+        return cls.from_counts(
+            np.bincount(ngram_codes(indexes, n), minlength=26**n), n, floor
+        )
+
+    @classmethod
+    def from_counts(cls, counts: "np.ndarray", n: int, floor: float = 0.01):
+        """Build the table from n-gram counts.
+
+        Parameters
+        ----------
+        counts : np.ndarray
+            Flat array with the count of every n-gram, indexed like
+            ``log_probs``.
+        n : int
+            Length of the n-grams.
+        floor : float, optional
+            Pseudo-count given to unseen n-grams, by default 0.01.
+
+        Returns
+        -------
+        NgramTable
+            The table of log-probabilities.
+        """
+        require_numpy()
+        counts = np.asarray(counts, dtype=np.float64) + floor
+        return cls(np.log(counts / counts.sum()), n)
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a table saved with ``save``."""
+        require_numpy()
+        log_probs = np.load(path)
+        return cls(log_probs, round(math.log(len(log_probs), 26)))
+
+    def save(self, path: str):
+        """Save the table as a ``.npy`` file."""
+        np.save(path, self.log_probs)
+
+    def score(self, indexes: "np.ndarray") -> float:
+        """Sum of the log-probabilities of the n-grams of a text.
+
+        Parameters
+        ----------
+        indexes : np.ndarray
+            Integer array with the letter indexes (0 to 25) of the text.
+
+        Returns
+        -------
+        float
+            The log-probability of the text.
+        """
+        return float(self.log_probs[ngram_codes(indexes, self.n)].sum())
+
+
+def ngram_codes(indexes: "np.ndarray", n: int) -> "np.ndarray":
+    """Base-26 code of every n-gram of a text of letter indexes."""
+    indexes = np.asarray(indexes, dtype=np.int64)
+    length = max(len(indexes) - n + 1, 0)
+    codes = np.zeros(length, dtype=np.int64)
+    for k in range(n):
+        codes = codes * 26 + indexes[k : k + length]
+    return codes
+
+
+@lru_cache(maxsize=None)
+def english_ngrams(n: int = 2) -> NgramTable:
+    """N-gram table of English, built once per process.
+
+    The tables are marginalized from the bundled quadgram counts, so ``n``
+    goes from 1 to 4.
+    """
+    require_numpy()
+    assert 1 <= n <= 4, "N-grams must have between 1 and 4 letters"
+    counts = np.zeros(26**4, dtype=np.int64)
+    with open(QUADGRAMS) as fh:
+        for line in fh:
+            quadgram, count = line.split()
+            code = 0
+            for letter in quadgram:
+                code = code * 26 + ord(letter) - 65
+            counts[code] = int(count)
+    return NgramTable.from_counts(counts.reshape(26**n, -1).sum(axis=1), n)
+
+
+class PlugboardClimber:
+    """Hill-climbing search of the plugboard for known rotor settings.
+
+    The ciphertext is decrypted with integer tables and a swap is scored
+    incrementally: the climber indexes the positions of every ciphertext
+    letter and of every letter entering the rotors, so only the positions
+    that go through a changed plug, and the n-grams that contain them, are
+    looked at.
+    """
+
+    def __init__(
+        self, ciphertext: "np.ndarray", scrambler: "np.ndarray", ngrams: NgramTable
+    ):
+        """Initialize the climber.
+
+        Parameters
+        ----------
+        ciphertext : np.ndarray
+            Integer array with the letter indexes (0 to 25) of the ciphertext.
+        scrambler : np.ndarray
+            Array of shape (length, 26) with the permutation of the rotors
+            and reflector at every position, see ``scrambler_tables``.
+        ngrams : NgramTable
+            The fitness table.
+        """
+        self.ciphertext = np.asarray(ciphertext, dtype=np.intp)
+        self.scrambler = np.asarray(scrambler, dtype=np.intp)
+        self.ngrams = ngrams
+        self.positions = np.arange(len(self.ciphertext))
+        self.by_cipher = _positions_by_letter(self.ciphertext)
+        self.reset(np.arange(26))
+
+    def reset(self, plugboard: "np.ndarray"):
+        """Set the current plugboard and score it from scratch."""
+        self.plugboard = np.array(plugboard, dtype=np.intp)
+        self.inner = self.scrambler[self.positions, self.plugboard[self.ciphertext]]
+        # Positions grouped by the letter entering the rotors, kept sorted as
+        # the keys letter * length + position
+        self.inner_keys = np.sort(self.inner * len(self.inner) + self.positions)
+        self.plaintext = self.plugboard[self.inner]
+        self.windows = self.ngrams.log_probs[ngram_codes(self.plaintext, self.ngrams.n)]
+        self.score = float(self.windows.sum())
+
+    def evaluate(self, plugboard: "np.ndarray") -> tuple:
+        """Score a plugboard that differs from the current one in a few plugs.
+
+        Returns
+        -------
+        tuple
+            The score and the data needed by ``accept``.
+        """
+        changed = np.flatnonzero(plugboard != self.plugboard)
+        affected = _sorted_unique(
+            np.concatenate(
+                [self.by_cipher[l] for l in changed]
+                + [self._inner_positions(l) for l in changed]
+            )
+        )
+        inner = self.scrambler[affected, plugboard[self.ciphertext[affected]]]
+        plaintext = plugboard[inner]
+
+        n = self.ngrams.n
+        windows = _sorted_unique((affected[:, None] - np.arange(n)).ravel())
+        windows = windows[(windows >= 0) & (windows < len(self.windows))]
+        # Read the new n-grams through the current plaintext, patched in place
+        # at the affected positions and restored right after
+        previous = self.plaintext[affected]
+        self.plaintext[affected] = plaintext
+        codes = np.zeros(len(windows), dtype=np.int64)
+        for k in range(n):
+            codes = codes * 26 + self.plaintext[windows + k]
+        self.plaintext[affected] = previous
+        scores = self.ngrams.log_probs[codes]
+        score = self.score + float(scores.sum() - self.windows[windows].sum())
+        return score, (plugboard, affected, inner, plaintext, windows, scores)
+
+    def accept(self, score: float, change: tuple):
+        """Make an evaluated plugboard the current one."""
+        plugboard, affected, inner, plaintext, windows, scores = change
+        moved = inner != self.inner[affected]
+        length = len(self.inner)
+        leaving = np.sort(self.inner[affected[moved]] * length + affected[moved])
+        entering = np.sort(inner[moved] * length + affected[moved])
+        keys = np.delete(self.inner_keys, np.searchsorted(self.inner_keys, leaving))
+        self.inner_keys = np.insert(keys, np.searchsorted(keys, entering), entering)
+        self.plugboard = plugboard
+        self.inner[affected] = inner
+        self.plaintext[affected] = plaintext
+        self.windows[windows] = scores
+        self.score = score
+
+    def _inner_positions(self, letter: int) -> "np.ndarray":
+        """Sorted positions whose letter entering the rotors is ``letter``."""
+        length = len(self.inner)
+        start, stop = np.searchsorted(
+            self.inner_keys, [letter * length, (letter + 1) * length]
+        )
+        return self.inner_keys[start:stop] - letter * length
+
+    def climb(
+        self,
+        rng: random.Random,
+        max_pairs: int = 10,
+        temperature: float = 0.0,
+        cooling: float = 0.8,
+        max_sweeps: int = 50,
+    ) -> float:
+        """Improve the current plugboard until no swap helps.
+
+        Parameters
+        ----------
+        rng : random.Random
+            Source of randomness for the order of the swaps.
+        max_pairs : int, optional
+            Maximum number of plugged pairs, by default 10.
+        temperature : float, optional
+            Initial simulated-annealing temperature. With 0 only improving
+            swaps are accepted, by default 0.0.
+        cooling : float, optional
+            Factor applied to the temperature after every sweep.
+        max_sweeps : int, optional
+            Maximum number of sweeps over all the swaps, by default 50.
+
+        Returns
+        -------
+        float
+            The score of the final plugboard.
+        """
+        pairs = [(a, b) for a in range(26) for b in range(a + 1, 26)]
+        for _ in range(max_sweeps):
+            improved = False
+            rng.shuffle(pairs)
+            for a, b in pairs:
+                plugboard = _swap(self.plugboard, a, b)
+                if (plugboard != np.arange(26)).sum() > 2 * max_pairs:
+                    continue
+                score, change = self.evaluate(plugboard)
+                delta = score - self.score
+                if delta > 1e-9 or (
+                    temperature > 0 and rng.random() < math.exp(delta / temperature)
+                ):
+                    improved |= delta > 1e-9
+                    self.accept(score, change)
+            temperature *= cooling
+            if not improved and temperature < 1e-3:
+                break
+        return self.score
+
+
+def _swap(plugboard: "np.ndarray", a: int, b: int) -> "np.ndarray":
+    """Plug a and b together, or unplug them if they already are."""
+    plugboard = plugboard.copy()
+    if plugboard[a] == b:
+        plugboard[a], plugboard[b] = a, b
+        return plugboard
+    for letter in (a, b):
+        plugboard[plugboard[letter]] = plugboard[letter]
+    plugboard[a], plugboard[b] = b, a
+    return plugboard
+
+
+def _positions_by_letter(indexes: "np.ndarray") -> list:
+    """Sorted positions of every letter index (0 to 25) in a text."""
+    order = np.argsort(indexes, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(indexes, minlength=26))[:-1])
+
+
+def _sorted_unique(values: "np.ndarray") -> "np.ndarray":
+    """Sorted distinct values of an array, cheaper than ``np.unique`` here."""
+    values = np.sort(values)
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _random_plugboard(rng: random.Random, pairs: int) -> "np.ndarray":
+    letters = rng.sample(range(26), 2 * pairs)
+    plugboard = np.arange(26)
+    for a, b in zip(letters[::2], letters[1::2]):
+        plugboard[a], plugboard[b] = b, a
+    return plugboard
+
+
+def _restart(args: tuple) -> tuple:
+    ciphertext, scrambler, n, seed, max_pairs, temperature = args
+    rng = random.Random(seed)
+    climber = PlugboardClimber(ciphertext, scrambler, english_ngrams(n))
+    climber.reset(_random_plugboard(rng, rng.randrange(max_pairs + 1)))
+    score = climber.climb(rng, max_pairs=max_pairs, temperature=temperature)
+    return score, climber.plugboard.tolist()
+
+
+def recover_plugboard(
+    ciphertext: str,
+    rotor_config: list[RotorConfig],
+    rotor_offsets: list[int],
+    reflector_config: ReflectorConfig,
+    n: int = 2,
+    restarts: int = 8,
+    max_pairs: int = 10,
+    temperature: float = 0.0,
+    seed: int = 0,
+    workers: int = None,
+) -> Candidate:
+    """Recover the plugboard of a message whose rotor settings are known.
+
+    The rotors step like an odometer with all ring settings at 0, see
+    ``scrambler_tables``.
+
+    Parameters
+    ----------
+    ciphertext : str
+        The ciphertext, in capital English letters.
+    rotor_config : list[RotorConfig]
+        The rotor order, fastest rotor first.
+    rotor_offsets : list[int]
+        The starting rotor offsets.
+    reflector_config : ReflectorConfig
+        The reflector.
+    n : int, optional
+        Length of the n-grams of the fitness table, by default 2.
+    restarts : int, optional
+        Number of independent climbs from random plugboards, by default 8.
+    max_pairs : int, optional
+        Maximum number of plugged pairs, by default 10.
+    temperature : float, optional
+        Initial simulated-annealing temperature, by default 0.0 (pure hill
+        climbing).
+    seed : int, optional
+        Seed of the restarts, by default 0.
+    workers : int, optional
+        Number of worker processes for the restarts, by default
+        ``os.cpu_count()``. With a single worker they run in this process.
+
+    Returns
+    -------
+    Candidate
+        The best plugboard, scored by the n-gram log-probability of the
+        decrypted message.
+
+    Raises
+    ------
+    AssertionError
+        If any letter is not a capital English letter.
+    """
+    require_numpy()
+    assert ciphertext and is_capital_letters(
+        ciphertext
+    ), "Letter must be a capital english letter"
+    letters = np.frombuffer(ciphertext.encode("ascii"), dtype=np.uint8) - 65
+    scrambler = scrambler_tables(
+        [r_c.wiring for r_c in rotor_config],
+        reflector_config.wiring,
+        np.array([rotor_offsets]),
+        np.arange(len(letters)),
+    )[0]
+    units = [
+        (letters, scrambler, n, seed * 1_000_003 + i, max_pairs, temperature)
+        for i in range(restarts)
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = list(map(_restart, units))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_restart, units))
+
+    score, plugboard = max(results)
+    return Candidate(
+        score=score,
+        rotor_config=list(rotor_config),
+        rotor_offsets=list(rotor_offsets),
+        reflector_config=reflector_config,
+        plugboard_wirings={
+            LETTERS[i]: LETTERS[j] for i, j in enumerate(plugboard) if i != j
+        },
+    )
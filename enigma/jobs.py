@@ -0,0 +1,435 @@
+"""Batch encryption of message files listed in a JSONL manifest.
+
+Every manifest line is a job with its own key::
+
+    {"input": "msg-001.txt", "rotors": "Enigma I", "rotor_order": [2, 0, 1],
+     "reflector": "B", "rotor_offsets": [4, 19, 11], "plugboard": "AZ,QW"}
+
+``input`` is relative to the manifest, ``output`` (by default the name of
+the input) to the output directory, and ``id`` defaults to the input path.
+``rotor_order``, ``rotor_offsets``, ``rings``, ``plugboard`` and
+``stepping`` are optional, as in the encryption service. Files are
+encrypted as by ``enigmachine``: letters are uppercased and encrypted, and
+any other byte, such as the final newline, passes through unchanged.
+
+Jobs sharing a key (everything but the offsets) are grouped so that each
+worker process builds and compiles their machine once. Groups are split
+into tasks of bounded size and run in a process pool, with a bounded
+number of input bytes in flight. Every output is written to a temporary
+file and moved into place, and completed jobs are appended to a journal in
+the output directory, so a run that crashed resumes with the remaining
+jobs.
+
+Run a manifest with ``python -m enigma.jobs manifest.jsonl outputs/``.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+
+from tabulate import tabulate
+
+from .cache import MACHINE_CACHE
+from .cli import encrypt_file, parse_plugboard
+from .configurations import REFLECTOR_CONFIGURATIONS, ROTOR_CONFIGURATIONS
+from .machine import EnigmaMachine
+from .object import STEPPING_MODELS
+
+# Journal of the completed jobs, in the output directory
+JOURNAL_NAME = ".enigma-jobs.jsonl"
+
+# Input bytes of a task: larger groups are split across workers
+TASK_SIZE = 1 << 26
+
+# Input bytes submitted to the pool and not finished yet
+MAX_IN_FLIGHT = 1 << 28
+
+
+@dataclass
+class Job:
+    """One message file and the key to encrypt it with."""
+
+    id: str
+    input: str
+    output: str
+    rotors: str
+    reflector: str
+    rotor_order: list[int] = None
+    rotor_offsets: list[int] = None
+    plugboard: dict = field(default_factory=dict)
+    stepping: str = "odometer"
+    rings: list[int] = None
+
+    @property
+    def key(self) -> tuple:
+        """Settings shared by the jobs that can reuse one machine."""
+        return (
+            self.rotors,
+            tuple(self.rotor_order or ()),
+            self.reflector,
+            tuple(sorted(self.plugboard.items())),
+            self.stepping,
+            tuple(self.rings or ()),
+        )
+
+    @property
+    def digest(self) -> str:
+        """Digest of the job, to rerun jobs whose manifest line changed."""
+        return hashlib.sha256(
+            json.dumps(asdict(self), sort_keys=True).encode()
+        ).hexdigest()
+
+    def machine(self) -> EnigmaMachine:
+        """Compiled machine of the job, from the process-wide cache."""
+        rotor_set = ROTOR_CONFIGURATIONS[self.rotors]
+        rotor_config = [rotor_set[i] for i in self.rotor_order or range(len(rotor_set))]
+        return MACHINE_CACHE.from_configuration(
+            rotor_config=rotor_config,
+            rotor_offsets=self.rotor_offsets or [0] * len(rotor_config),
+            reflector_config=REFLECTOR_CONFIGURATIONS[self.reflector],
+            plugboard_wirings=self.plugboard,
+            stepping=self.stepping,
+            ring_settings=self.rings,
+        )
+
+
+@dataclass
+class JobResult:
+    """Outcome and timing of a job."""
+
+    id: str
+    input: str
+    output: str
+    letters: int = 0
+    seconds: float = 0.0
+    skipped: bool = False
+    error: str = None
+
+    @property
+    def rate(self) -> float:
+        """Letters encrypted per second."""
+        return self.letters / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class BatchReport:
+    """Results of a manifest run, in the order of the manifest."""
+
+    results: list[JobResult]
+    elapsed: float
+
+    @property
+    def letters(self) -> int:
+        """Letters encrypted in this run."""
+        return sum(result.letters for result in self.results)
+
+    @property
+    def rate(self) -> float:
+        """Letters encrypted per second of the run."""
+        return self.letters / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def failed(self) -> list[JobResult]:
+        """Jobs that raised an error, to be retried by the next run."""
+        return [result for result in self.results if result.error is not None]
+
+    def slowest(self, n: int = 10) -> list[JobResult]:
+        """The jobs of this run that took the longest."""
+        done = [result for result in self.results if not result.skipped]
+        return sorted(done, key=lambda result: result.seconds, reverse=True)[:n]
+
+    def summary(self, n: int = 10) -> str:
+        """Counts of the run and a table of its slowest jobs."""
+        skipped = sum(result.skipped for result in self.results)
+        table = [
+            [
+                result.id,
+                result.letters,
+                f"{result.seconds:.4f}",
+                f"{result.rate:,.0f}",
+                result.error or "",
+            ]
+            for result in self.slowest(n)
+        ]
+        headers = ["Job", "Letters", "Seconds", "Letters/s", "Error"]
+        encrypted = len(self.results) - skipped - len(self.failed)
+        return (
+            f"{len(self.results)} jobs: {encrypted} encrypted, "
+            f"{skipped} already done, {len(self.failed)} failed, "
+            f"{self.letters} letters in {self.elapsed:.2f} s\n"
+            + tabulate(table, headers=headers, tablefmt="grid")
+        )
+
+
+def read_manifest(manifest: str, output_dir: str) -> list[Job]:
+    """Parse the jobs of a JSONL manifest.
+
+    Parameters
+    ----------
+    manifest : str
+        Path of the manifest, one JSON job per line. Blank lines are
+        ignored.
+    output_dir : str
+        Directory of the outputs.
+
+    Returns
+    -------
+    list[Job]
+        The jobs, with the input and output paths resolved.
+
+    Raises
+    ------
+    AssertionError
+        If a line is not a valid job, or two jobs share an id or an output.
+    """
+    base = os.path.dirname(os.path.abspath(manifest))
+    jobs = []
+    with open(manifest) as file:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+                plugboard = spec.get("plugboard") or {}
+                if isinstance(plugboard, str):
+                    plugboard = parse_plugboard(plugboard)
+                job = Job(
+                    id=str(spec.get("id", spec["input"])),
+                    input=os.path.join(base, spec["input"]),
+                    output=os.path.join(
+                        output_dir, spec.get("output", os.path.basename(spec["input"]))
+                    ),
+                    rotors=spec["rotors"],
+                    reflector=spec["reflector"],
+                    rotor_order=spec.get("rotor_order"),
+                    rotor_offsets=spec.get("rotor_offsets"),
+                    plugboard=plugboard,
+                    stepping=spec.get("stepping", "odometer"),
+                    rings=spec.get("rings"),
+                )
+            except (
+                ValueError,
+                KeyError,
+                TypeError,
+                argparse.ArgumentTypeError,
+            ) as error:
+                raise AssertionError(f"{manifest}:{number}: invalid job: {error}")
+            assert (
+                job.rotors in ROTOR_CONFIGURATIONS
+            ), f"{manifest}:{number}: unknown rotor set"
+            assert (
+                job.reflector in REFLECTOR_CONFIGURATIONS
+            ), f"{manifest}:{number}: unknown reflector"
+            assert (
+                job.stepping in STEPPING_MODELS
+            ), f"{manifest}:{number}: unknown stepping"
+            jobs.append(job)
+    assert len({job.id for job in jobs}) == len(jobs), "Job ids must be unique"
+    assert len({os.path.abspath(job.output) for job in jobs}) == len(
+        jobs
+    ), "Job outputs must be unique"
+    return jobs
+
+
+def _read_journal(path: str) -> dict:
+    """Digests of the completed jobs, by id. A torn last line is ignored."""
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path) as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            completed[entry["id"]] = entry["digest"]
+    return completed
+
+
+def _tasks(jobs: list[Job], task_size: int) -> list[tuple]:
+    """Group jobs by key and split the groups into (jobs, size) tasks."""
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.key, []).append(job)
+    tasks = []
+    for group in groups.values():
+        task, size = [], 0
+        for job in group:
+            try:
+                job_size = os.path.getsize(job.input)
+            except OSError:
+                # Reported by the worker
+                job_size = 0
+            if task and size + job_size > task_size:
+                tasks.append((task, size))
+                task, size = [], 0
+            task.append(job)
+            size += job_size
+        tasks.append((task, size))
+    return tasks
+
+
+def run_task(jobs: list[Job]) -> list[JobResult]:
+    """Encrypt the files of jobs, each one atomically.
+
+    Parameters
+    ----------
+    jobs : list[Job]
+        The jobs to run.
+
+    Returns
+    -------
+    list[JobResult]
+        The result of every job. A failed job has an ``error`` and leaves
+        no output behind.
+    """
+    results = []
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            machine = job.machine()
+            os.makedirs(os.path.dirname(os.path.abspath(job.output)), exist_ok=True)
+            letters = encrypt_file(machine, job.input, job.output)
+            results.append(
+                JobResult(
+                    job.id, job.input, job.output, letters, time.perf_counter() - start
+                )
+            )
+        except (AssertionError, OSError, KeyError, IndexError) as error:
+            results.append(
+                JobResult(
+                    job.id,
+                    job.input,
+                    job.output,
+                    seconds=time.perf_counter() - start,
+                    error=str(error) or type(error).__name__,
+                )
+            )
+    return results
+
+
+def run_manifest(
+    manifest: str,
+    output_dir: str,
+    workers: int = None,
+    max_in_flight: int = MAX_IN_FLIGHT,
+    task_size: int = TASK_SIZE,
+) -> BatchReport:
+    """Encrypt every job of a manifest that isn't done yet.
+
+    Parameters
+    ----------
+    manifest : str
+        Path of the JSONL manifest.
+    output_dir : str
+        Directory of the outputs and of the journal of completed jobs.
+    workers : int, optional
+        Number of worker processes, by default ``os.cpu_count()``. With a
+        single worker the jobs run in this process.
+    max_in_flight : int, optional
+        Input bytes submitted to the workers and not finished yet, by
+        default 256 MiB. A task larger than this runs alone.
+    task_size : int, optional
+        Input bytes per task, by default 64 MiB.
+
+    Returns
+    -------
+    BatchReport
+        The result and timing of every job, in the order of the manifest.
+        Jobs completed by a previous run with the same manifest line and
+        whose output exists are skipped.
+
+    Raises
+    ------
+    AssertionError
+        If the manifest is invalid.
+    """
+    start = time.perf_counter()
+    jobs = read_manifest(manifest, output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    journal_path = os.path.join(output_dir, JOURNAL_NAME)
+    completed = _read_journal(journal_path)
+
+    results = {}
+    pending = []
+    for job in jobs:
+        if completed.get(job.id) == job.digest and os.path.exists(job.output):
+            results[job.id] = JobResult(job.id, job.input, job.output, skipped=True)
+        else:
+            pending.append(job)
+    digests = {job.id: job.digest for job in pending}
+    workers = workers or os.cpu_count() or 1
+
+    with open(journal_path, "a") as journal:
+
+        def record(task_results: list[JobResult]):
+            for result in task_results:
+                results[result.id] = result
+                if result.error is None:
+                    entry = {"id": result.id, "digest": digests[result.id]}
+                    journal.write(json.dumps(entry) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+        tasks = _tasks(pending, task_size)
+        if workers == 1:
+            for task, _ in tasks:
+                record(run_task(task))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                in_flight = {}
+                for task, size in tasks:
+                    while in_flight and sum(in_flight.values()) + size > max_in_flight:
+                        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            del in_flight[future]
+                            record(future.result())
+                    in_flight[executor.submit(run_task, task)] = size
+                for future in wait(in_flight).done:
+                    record(future.result())
+
+    return BatchReport(
+        results=[results[job.id] for job in jobs], elapsed=time.perf_counter() - start
+    )
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="enigmachine-jobs",
+        description="Encrypt the message files of a JSONL manifest.",
+    )
+    parser.add_argument("manifest", help="JSONL manifest, one job per line")
+    parser.add_argument("output_dir", help="Directory of the encrypted files")
+    parser.add_argument(
+        "--workers", type=int, help="Worker processes, by default one per CPU"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=MAX_IN_FLIGHT >> 20,
+        help="MiB of input submitted to the workers at once",
+    )
+    parser.add_argument("--slowest", type=int, default=10, help="Slow jobs to list")
+    args = parser.parse_args(argv)
+    try:
+        report = run_manifest(
+            args.manifest, args.output_dir, args.workers, args.max_in_flight << 20
+        )
+    except (AssertionError, OSError) as error:
+        print(f"enigmachine-jobs: error: {error}", file=sys.stderr)
+        return 1
+    print(report.summary(args.slowest))
+    return 1 if report.failed else 0
+
+
+def run():
+    sys.exit(main())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,722 @@
+"""Resumable key search distributed over worker processes and nodes.
+
+The keyspace of a ciphertext-only search (every rotor order of the rotor
+sets of ROTOR_CONFIGURATIONS, every reflector and every starting position)
+is split into deterministic work units, one per rotor order and reflector,
+numbered in the order of the configuration catalog. A coordinator leases
+the units to workers over a TCP or Unix socket (``multiprocessing``
+connections, authenticated with a secret key) and checkpoints the
+completed units and the best candidates to a JSON file after every unit,
+so an interrupted search resumes where it stopped. Leases of workers that
+disappear expire and their units are handed out again.
+
+Connections unpickle what the other side sends, so the key must stay
+secret: anyone holding it can run code on the coordinator. A coordinator
+started without a key generates one and prints it.
+
+Run a coordinator and any number of workers, on any number of nodes::
+
+    export ENIGMA_SEARCH_AUTHKEY=$(openssl rand -hex 32)
+    python -m enigma.keyspace --host 0.0.0.0 serve CIPHERTEXT --checkpoint search.json
+    python -m enigma.keyspace --host coordinator.local work
+"""
+
+import argparse
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Client, Listener
+
+from .cli import parse_plugboard
+from .configurations import (
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    ReflectorConfig,
+    RotorConfig,
+)
+from .object import is_capital_letters
+from .search import Candidate, SearchReport, search_unit
+from .vectorized import np, require_numpy
+
+# Version of the checkpoint layout
+CHECKPOINT_VERSION = 1
+
+# Seconds before the unit of a silent worker is leased again
+LEASE_TIMEOUT = 600.0
+
+# Seconds a worker waits for leased units to be completed or expire
+POLL_INTERVAL = 1.0
+
+# Coordinator methods callable by workers
+OPERATIONS = ("job", "lease", "complete", "progress")
+
+
+@dataclass
+class WorkUnit:
+    """One rotor order and reflector, searched over every starting position."""
+
+    index: int
+    rotor_set: str
+    rotor_config: list[RotorConfig]
+    reflector_config: ReflectorConfig
+
+    def __str__(self):
+        return (
+            f"WorkUnit {self.index}: {self.rotor_set} rotors "
+            f"{[r_c.name for r_c in self.rotor_config]}, reflector "
+            f"{self.reflector_config.name}"
+        )
+
+
+def keyspace_units(
+    rotor_sets: list[str] = None, n_rotors: int = 3, reflectors: list[str] = None
+) -> list[WorkUnit]:
+    """Partition a keyspace into numbered work units.
+
+    The numbering only depends on the arguments and the configuration
+    catalog, so every process derives the same units.
+
+    Parameters
+    ----------
+    rotor_sets : list[str], optional
+        Names of ROTOR_CONFIGURATIONS entries to draw the rotor orders from,
+        by default every entry with at least ``n_rotors`` rotors.
+    n_rotors : int, optional
+        Number of rotors in the machine, by default 3.
+    reflectors : list[str], optional
+        Names of REFLECTOR_CONFIGURATIONS entries, by default all of them.
+
+    Returns
+    -------
+    list[WorkUnit]
+        The units, ``units[i].index == i``.
+
+    Raises
+    ------
+    AssertionError
+        If any name is not in the configuration catalog.
+    """
+    rotor_sets = rotor_sets or [
+        name for name, rotors in ROTOR_CONFIGURATIONS.items() if len(rotors) >= n_rotors
+    ]
+    reflectors = reflectors or list(REFLECTOR_CONFIGURATIONS)
+    assert all(name in ROTOR_CONFIGURATIONS for name in rotor_sets), "Unknown rotor set"
+    assert all(
+        name in REFLECTOR_CONFIGURATIONS for name in reflectors
+    ), "Unknown reflector"
+    units = []
+    for rotor_set in rotor_sets:
+        for order in itertools.permutations(ROTOR_CONFIGURATIONS[rotor_set], n_rotors):
+            for reflector in reflectors:
+                units.append(
+                    WorkUnit(
+                        len(units),
+                        rotor_set,
+                        list(order),
+                        REFLECTOR_CONFIGURATIONS[reflector],
+                    )
+                )
+    return units
+
+
+class KeyspaceCoordinator:
+    """Lease work units to workers and keep the best candidates on disk.
+
+    The methods are thread-safe: a ``CoordinatorServer`` calls them from
+    one thread per worker connection.
+    """
+
+    def __init__(
+        self,
+        ciphertext: str,
+        checkpoint: str = None,
+        rotor_sets: list[str] = None,
+        n_rotors: int = 3,
+        reflectors: list[str] = None,
+        plugboard_wirings: dict = None,
+        top_k: int = 10,
+        lease_timeout: float = LEASE_TIMEOUT,
+    ):
+        """Partition the keyspace, resuming from a checkpoint if it exists.
+
+        Parameters
+        ----------
+        ciphertext : str
+            The ciphertext, in capital English letters.
+        checkpoint : str, optional
+            JSON file with the completed units and best candidates, written
+            after every unit. By default the search isn't checkpointed.
+        rotor_sets, n_rotors, reflectors
+            The keyspace, as in ``keyspace_units``.
+        plugboard_wirings : dict, optional
+            Known plugboard wiring, by default None.
+        top_k : int, optional
+            Number of candidates to keep, by default 10.
+        lease_timeout : float, optional
+            Seconds before a leased unit that wasn't completed is leased
+            again, by default 600.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter, or the checkpoint
+            belongs to another search.
+        """
+        assert ciphertext and is_capital_letters(
+            ciphertext
+        ), "Letter must be a capital english letter"
+        self.ciphertext = ciphertext
+        self.checkpoint = checkpoint
+        self.n_rotors = n_rotors
+        self.plugboard_wirings = dict(plugboard_wirings or {})
+        self.top_k = top_k
+        self.lease_timeout = lease_timeout
+        self.units = keyspace_units(rotor_sets, n_rotors, reflectors)
+        self.fingerprint = self._fingerprint()
+
+        self.completed = set()
+        # Best results as (score, unit index, rotor offsets)
+        self._best = []
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self._load()
+        self._pending = deque(
+            unit.index for unit in self.units if unit.index not in self.completed
+        )
+        self._leases = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        if not self._pending:
+            self._finished.set()
+        self._completed_here = 0
+        self._start = time.perf_counter()
+
+    def __str__(self):
+        return (
+            f"KeyspaceCoordinator instance with {len(self.completed)} of "
+            f"{len(self.units)} units completed"
+        )
+
+    def _fingerprint(self) -> str:
+        """Digest of everything that determines the results of the search."""
+        search = {
+            "ciphertext": self.ciphertext,
+            "plugboard": sorted(self.plugboard_wirings.items()),
+            "top_k": self.top_k,
+            "units": [
+                [
+                    [r_c.wiring for r_c in unit.rotor_config],
+                    unit.reflector_config.wiring,
+                ]
+                for unit in self.units
+            ],
+        }
+        return hashlib.sha256(json.dumps(search).encode()).hexdigest()
+
+    def _load(self):
+        with open(self.checkpoint) as file:
+            state = json.load(file)
+        assert (
+            state.get("version") == CHECKPOINT_VERSION
+            and state.get("fingerprint") == self.fingerprint
+        ), f"Checkpoint {self.checkpoint} belongs to another search"
+        self.completed = set(state["completed"])
+        self._best = [
+            (result["score"], result["unit"], result["rotor_offsets"])
+            for result in state["candidates"]
+        ]
+
+    def _save(self):
+        """Write the checkpoint to a temporary file and move it into place."""
+        state = {
+            "version": CHECKPOINT_VERSION,
+            "fingerprint": self.fingerprint,
+            "completed": sorted(self.completed),
+            "candidates": [
+                {"score": score, "unit": unit, "rotor_offsets": offsets}
+                for score, unit, offsets in self._best
+            ],
+        }
+        directory = os.path.dirname(os.path.abspath(self.checkpoint))
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(state, file)
+            os.replace(temporary, self.checkpoint)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def job(self) -> dict:
+        """Ciphertext and search parameters shared by every unit."""
+        return {
+            "ciphertext": self.ciphertext,
+            "plugboard_wirings": self.plugboard_wirings,
+            "top_k": self.top_k,
+        }
+
+    def lease(self) -> WorkUnit:
+        """Lease the next unit to a worker.
+
+        Returns
+        -------
+        WorkUnit
+            The unit to search, or None if every remaining unit is leased
+            (the worker should poll again until ``progress`` says finished).
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._pending:
+                index = self._pending.popleft()
+            else:
+                expired = [i for i, deadline in self._leases.items() if deadline <= now]
+                if not expired:
+                    return None
+                index = min(expired)
+            self._leases[index] = now + self.lease_timeout
+            return self.units[index]
+
+    def complete(self, index: int, results: list[tuple]):
+        """Record the results of a unit and checkpoint them.
+
+        Results of a unit that was already completed, by a worker whose
+        lease had expired, are ignored.
+
+        Parameters
+        ----------
+        index : int
+            The index of the unit.
+        results : list[tuple]
+            The best ``(score, rotor_offsets)`` pairs of the unit.
+
+        Raises
+        ------
+        AssertionError
+            If the index or the results don't belong to the search.
+        """
+        assert isinstance(index, int) and 0 <= index < len(
+            self.units
+        ), f"Unknown work unit {index!r}"
+        results = [(float(score), list(offsets)) for score, offsets in results]
+        assert all(
+            len(offsets) == self.n_rotors
+            and all(isinstance(offset, int) and 0 <= offset < 26 for offset in offsets)
+            for _, offsets in results
+        ), "Rotor offsets must be one letter index per rotor"
+        with self._lock:
+            if index in self.completed:
+                return
+            self._leases.pop(index, None)
+            self.completed.add(index)
+            self._completed_here += 1
+            self._best = heapq.nlargest(
+                self.top_k,
+                self._best + [(score, index, offsets) for score, offsets in results],
+            )
+            if self.checkpoint is not None:
+                self._save()
+            if len(self.completed) == len(self.units):
+                self._finished.set()
+
+    def progress(self) -> dict:
+        """Completed, leased and total units, and whether the search is finished."""
+        with self._lock:
+            return {
+                "completed": len(self.completed),
+                "leased": len(self._leases),
+                "total": len(self.units),
+                "finished": self._finished.is_set(),
+            }
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until every unit is completed, returning whether they are."""
+        return self._finished.wait(timeout)
+
+    def report(self) -> SearchReport:
+        """Best candidates so far, with the throughput of this run.
+
+        Returns
+        -------
+        SearchReport
+            The best candidates, highest index of coincidence first. The
+            tested count and elapsed time cover the units completed since
+            this coordinator was created, not those of the checkpoint.
+        """
+        with self._lock:
+            best = list(self._best)
+            completed_here = self._completed_here
+        candidates = [
+            Candidate(
+                score=score,
+                rotor_config=list(self.units[index].rotor_config),
+                rotor_offsets=list(offsets),
+                reflector_config=self.units[index].reflector_config,
+                plugboard_wirings=dict(self.plugboard_wirings),
+            )
+            for score, index, offsets in best
+        ]
+        return SearchReport(
+            candidates=candidates,
+            tested=completed_here * 26**self.n_rotors,
+            elapsed=time.perf_counter() - self._start,
+        )
+
+
+class CoordinatorServer:
+    """Serve a coordinator to workers from background threads."""
+
+    def __init__(
+        self,
+        coordinator: KeyspaceCoordinator,
+        address=("127.0.0.1", 0),
+        authkey: bytes = None,
+    ):
+        """Listen for workers.
+
+        Parameters
+        ----------
+        coordinator : KeyspaceCoordinator
+            The coordinator to serve.
+        address : tuple or str, optional
+            ``(host, port)`` to listen on over TCP, or the path of a Unix
+            socket. By default a free port on the loopback interface; the
+            bound address is ``self.address``.
+        authkey : bytes, optional
+            Secret key shared with the workers, by default a random one,
+            available as ``self.authkey``.
+        """
+        self.coordinator = coordinator
+        self.authkey = authkey or secrets.token_hex().encode()
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+
+    def __str__(self):
+        return f"CoordinatorServer instance on {self.address}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self) -> "CoordinatorServer":
+        """Start accepting workers."""
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop accepting workers and close the socket."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._thread.is_alive():
+            # Wake up the blocking accept with a last connection
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            self._thread.join()
+        self._listener.close()
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                continue
+            if self._closed.is_set():
+                connection.close()
+                break
+            threading.Thread(
+                target=self._handle, args=(connection,), daemon=True
+            ).start()
+
+    def _handle(self, connection):
+        with connection:
+            while True:
+                try:
+                    operation, args = connection.recv()
+                except (EOFError, OSError):
+                    return
+                if operation not in OPERATIONS:
+                    response = (False, f"Unknown operation {operation!r}")
+                else:
+                    try:
+                        response = (True, getattr(self.coordinator, operation)(*args))
+                    except (
+                        AssertionError,
+                        TypeError,
+                        ValueError,
+                        KeyError,
+                        IndexError,
+                    ) as error:
+                        response = (False, str(error))
+                connection.send(response)
+
+
+class CoordinatorClient:
+    """Connection of a worker to a coordinator server."""
+
+    def __init__(self, address, authkey: bytes):
+        self._connection = Client(address, authkey=authkey)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def request(self, operation: str, *args):
+        """Call a coordinator method.
+
+        Raises
+        ------
+        AssertionError
+            If the coordinator rejects the call.
+        """
+        self._connection.send((operation, args))
+        ok, result = self._connection.recv()
+        assert ok, result
+        return result
+
+
+def run_worker(
+    address,
+    authkey: bytes,
+    max_units: int = None,
+    poll_interval: float = POLL_INTERVAL,
+) -> int:
+    """Search the units leased by a coordinator until the keyspace is covered.
+
+    Parameters
+    ----------
+    address : tuple or str
+        Address of the coordinator server.
+    authkey : bytes
+        Secret key of the coordinator server.
+    max_units : int, optional
+        Stop after this many units, by default when the search is finished.
+    poll_interval : float, optional
+        Seconds to wait when every remaining unit is leased to other
+        workers, by default 1.
+
+    Returns
+    -------
+    int
+        The number of units this worker completed. The worker also stops
+        when the coordinator closes the connection.
+    """
+    require_numpy()
+    completed = 0
+    with CoordinatorClient(address, authkey) as client:
+        job = client.request("job")
+        letters = np.frombuffer(job["ciphertext"].encode("ascii"), dtype=np.uint8) - 65
+        try:
+            while max_units is None or completed < max_units:
+                unit = client.request("lease")
+                if unit is None:
+                    if client.request("progress")["finished"]:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                candidates = search_unit(
+                    letters,
+                    unit.rotor_config,
+                    unit.reflector_config,
+                    job["plugboard_wirings"],
+                    job["top_k"],
+                )
+                client.request(
+                    "complete",
+                    unit.index,
+                    [
+                        (candidate.score, candidate.rotor_offsets)
+                        for candidate in candidates
+                    ],
+                )
+                completed += 1
+        except (EOFError, ConnectionError):
+            # The coordinator finished or stopped, its checkpoint resumes it
+            pass
+    return completed
+
+
+def distributed_search(
+    ciphertext: str,
+    checkpoint: str = None,
+    workers: int = None,
+    rotor_sets: list[str] = None,
+    n_rotors: int = 3,
+    reflectors: list[str] = None,
+    plugboard_wirings: dict = None,
+    top_k: int = 10,
+    address=("127.0.0.1", 0),
+    authkey: bytes = None,
+) -> SearchReport:
+    """Search a keyspace with a coordinator and local worker processes.
+
+    Workers on other nodes can join the search at ``address`` while it
+    runs. If the search is interrupted, calling it again with the same
+    arguments and checkpoint resumes it.
+
+    Parameters
+    ----------
+    ciphertext : str
+        The ciphertext, in capital English letters.
+    checkpoint : str, optional
+        JSON file of the completed units and best candidates.
+    workers : int, optional
+        Number of local worker processes, by default ``os.cpu_count()``.
+    rotor_sets, n_rotors, reflectors, plugboard_wirings, top_k
+        The search, as in ``KeyspaceCoordinator``.
+    address : tuple or str, optional
+        Address of the coordinator server, by default a free local port.
+    authkey : bytes, optional
+        Secret key shared with the workers, by default a random one.
+
+    Returns
+    -------
+    SearchReport
+        The best candidates, highest index of coincidence first.
+
+    Raises
+    ------
+    AssertionError
+        If any letter is not a capital English letter, or the checkpoint
+        belongs to another search.
+    """
+    coordinator = KeyspaceCoordinator(
+        ciphertext,
+        checkpoint,
+        rotor_sets,
+        n_rotors,
+        reflectors,
+        plugboard_wirings,
+        top_k,
+    )
+    workers = workers or os.cpu_count() or 1
+    with CoordinatorServer(coordinator, address, authkey) as server:
+        # Spawned workers don't inherit the threads of the server
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=run_worker, args=(server.address, server.authkey))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    return coordinator.report()
+
+
+def _address(args: argparse.Namespace):
+    return args.unix if args.unix else (args.host, args.port)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="enigmachine-search",
+        description="Distributed, resumable Enigma key search.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50000)
+    parser.add_argument("--unix", help="Use this Unix socket instead of TCP")
+    parser.add_argument(
+        "--authkey",
+        default=os.environ.get("ENIGMA_SEARCH_AUTHKEY"),
+        help=(
+            "Secret key shared by the coordinator and workers (or "
+            "$ENIGMA_SEARCH_AUTHKEY), generated and printed by default when serving"
+        ),
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Coordinate a search")
+    serve.add_argument("ciphertext", help="Ciphertext, in capital letters")
+    serve.add_argument("--checkpoint", help="JSON file to checkpoint and resume from")
+    serve.add_argument(
+        "--rotor-set", action="append", dest="rotor_sets", help="Rotor set to search"
+    )
+    serve.add_argument("--rotors", type=int, default=3, help="Number of rotors")
+    serve.add_argument(
+        "--reflector", action="append", dest="reflectors", help="Reflector to search"
+    )
+    serve.add_argument(
+        "--plugboard", type=parse_plugboard, help="Known pairs, e.g. AB,CD"
+    )
+    serve.add_argument("--top-k", type=int, default=10)
+    serve.add_argument(
+        "--workers", type=int, default=0, help="Local worker processes, by default none"
+    )
+
+    work = commands.add_parser("work", help="Work for a coordinator")
+    work.add_argument("--max-units", type=int, help="Stop after this many units")
+    args = parser.parse_args(argv)
+    if args.authkey:
+        authkey = args.authkey.encode()
+    elif args.command == "work":
+        parser.error("work requires the --authkey printed by the coordinator")
+    else:
+        authkey = secrets.token_hex().encode()
+        print(f"enigmachine-search: authkey {authkey.decode()}", file=sys.stderr)
+
+    try:
+        if args.command == "work":
+            run_worker(_address(args), authkey, args.max_units)
+            return 0
+        if args.workers:
+            report = distributed_search(
+                args.ciphertext,
+                args.checkpoint,
+                args.workers,
+                args.rotor_sets,
+                args.rotors,
+                args.reflectors,
+                args.plugboard,
+                args.top_k,
+                _address(args),
+                authkey,
+            )
+        else:
+            coordinator = KeyspaceCoordinator(
+                args.ciphertext,
+                args.checkpoint,
+                args.rotor_sets,
+                args.rotors,
+                args.reflectors,
+                args.plugboard,
+                args.top_k,
+            )
+            with CoordinatorServer(coordinator, _address(args), authkey):
+                coordinator.wait()
+            report = coordinator.report()
+    except KeyboardInterrupt:
+        return 130
+    except (AssertionError, OSError, multiprocessing.AuthenticationError) as error:
+        print(f"enigmachine-search: error: {error}", file=sys.stderr)
+        return 1
+    for candidate in report.candidates:
+        print(candidate)
+    return 0
+
+
+def run():
+    sys.exit(main())
+
+
+if __name__ == "__main__":
+    run()
@@ -1,7 +1,30 @@
-from .object import MachineObject, LETTERS, Rotor, RotorMechanism, PlugBoard, Reflector
+import copy
+import os
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .object import (
+    MachineObject,
+    LETTERS,
+    Rotor,
+    RotorMechanism,
+    PlugBoard,
+    Reflector,
+    is_capital_letters,
+)
 from .configurations import ReflectorConfig, RotorConfig
+from .normalize import merge_letters, normalize, split_letters
+from .compiled import CompiledEnigma, advance_offsets
+from .stepping import stepping_table
+from .tracing import PrintTracer, Tracer
+from .vectorized import encrypt_array, np
 from tabulate import tabulate
 
+__all__ = ["Machine", "MachineState", "RotorMachine", "EnigmaMachine"]
+
+# Buffers at least this long are encrypted with NumPy when it is installed
+VECTORIZED_SIZE = 512
+
 
 class Machine:
     """Class representing an Enigma machine."""
@@ -18,6 +41,7 @@ class Machine:
             [isinstance(component, MachineObject) for component in config]
         ), "Config must be a list of RotorMechanism, Reflector or PlugBoard instances"
         self.config = config
+        self.tracer = None
 
     def __str__(self):
         return f"Machine instance with components: {self.config}"
@@ -42,16 +66,199 @@ class Machine:
         AssertionError
             If the letter is not a capital English letter.
         """
-        assert all(
-            [l in LETTERS for l in letters]
-        ), "Letter must be a capital english letter"
-        encrypted_letters = ""
+        assert is_capital_letters(letters), "Letter must be a capital english letter"
+        if verbose or self.tracer is not None:
+            return self._encrypt_traced(
+                letters, PrintTracer() if verbose else self.tracer
+            )
+
+        encrypted_letters = []
         for letter_ in letters:
             for component in self.config:
-                letter_ = component.forward(letter_, verbose)
-            encrypted_letters += letter_
+                letter_ = component.forward(letter_)
+            encrypted_letters.append(letter_)
+
+        return "".join(encrypted_letters)
+
+    def _encrypt_traced(self, letters: str, tracer: Tracer) -> str:
+        """Encrypt letters walking the components and reporting to a tracer."""
+        start = perf_counter()
+        encrypted_letters = []
+        for letter in letters:
+            letter_ = letter
+            for component in self.config:
+                letter_ = component.trace(letter_, tracer)
+            tracer.letter(letter, letter_)
+            encrypted_letters.append(letter_)
+        tracer.call(self, len(letters), perf_counter() - start)
+
+        return "".join(encrypted_letters)
+
+    def attach_tracer(self, tracer: Tracer):
+        """Report every following ``encrypt`` call to a tracer.
+
+        While a tracer is attached, encryption walks the components one by
+        one. Without it, the encryption path has no tracing overhead.
+
+        Parameters
+        ----------
+        tracer : Tracer
+            The tracer receiving the events.
+        """
+        assert isinstance(tracer, Tracer), "Tracer must be a Tracer instance"
+        self.tracer = tracer
+
+    def detach_tracer(self) -> Tracer:
+        """Stop tracing and return the tracer that was attached."""
+        tracer, self.tracer = self.tracer, None
+        return tracer
+
+    def encrypt_text(self, text, keep_non_letters: bool = False):
+        """Encrypt real-world text, normalizing it in bulk first.
+
+        Lowercase English letters are uppercased. Any other character is
+        dropped, or passed through unchanged at its original position with
+        ``keep_non_letters``; in both cases it doesn't advance the rotors.
+
+        Parameters
+        ----------
+        text : str or bytes-like
+            The text to encrypt. Bytes are ASCII codes.
+        keep_non_letters : bool, optional
+            If True, characters that are not English letters are kept in
+            place, by default False.
+
+        Returns
+        -------
+        str or bytes
+            The encrypted text, of the same type as the input.
+        """
+        if not keep_non_letters:
+            letters, pieces = normalize(text), None
+        else:
+            letters, pieces = split_letters(text)
+        if isinstance(letters, str):
+            encrypted = self.encrypt(letters)
+        else:
+            encrypted = self.encrypt(letters.decode("ascii")).encode("ascii")
+        return encrypted if pieces is None else merge_letters(encrypted, pieces)
+
+    def encrypt_into(self, letters, out) -> int:
+        """Encrypt ASCII letters from a buffer into a preallocated one.
+
+        Any object supporting the buffer protocol works on both sides
+        (``bytes``, ``bytearray``, ``memoryview``, ``mmap``, arrays), and no
+        string of the whole message is built.
+
+        Parameters
+        ----------
+        letters : bytes-like
+            The ASCII codes of the letters to encrypt.
+        out : writable bytes-like
+            Buffer receiving the ASCII codes of the encrypted letters, at
+            least as long as ``letters``. It may be ``letters`` itself.
+
+        Returns
+        -------
+        int
+            The number of letters encrypted.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter, or ``out`` is
+            read-only or too small. Nothing is written in that case.
+        """
+        source = memoryview(letters).cast("B")
+        target = memoryview(out).cast("B")
+        assert not target.readonly, "Output buffer must be writable"
+        assert len(target) >= len(source), "Output buffer is smaller than the letters"
+        assert is_capital_letters(source), "Letter must be a capital english letter"
+        if self.tracer is not None:
+            encrypted = self._encrypt_traced(bytes(source).decode("ascii"), self.tracer)
+            target[: len(source)] = encrypted.encode("ascii")
+            return len(source)
+        for position, code in enumerate(source):
+            letter = LETTERS[code - 65]
+            for component in self.config:
+                letter = component.forward(letter)
+            target[position] = ord(letter)
+        return len(source)
+
+    def encrypt_inplace(self, letters) -> int:
+        """Encrypt ASCII letters in a writable buffer, overwriting them.
+
+        Parameters
+        ----------
+        letters : writable bytes-like
+            The ASCII codes of the letters to encrypt.
+
+        Returns
+        -------
+        int
+            The number of letters encrypted.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter or the buffer is
+            read-only.
+        """
+        return self.encrypt_into(letters, letters)
+
+    def iter_encrypt(self, chunks):
+        """Encrypt an iterable of chunks, carrying the rotor state across them.
+
+        Parameters
+        ----------
+        chunks : iterable
+            Chunks of letters, as ``str`` or ASCII ``bytes``.
+
+        Yields
+        ------
+        str or bytes
+            The encrypted chunks, of the same type as the input chunks.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                yield self.encrypt(chunk)
+            else:
+                yield self.encrypt(bytes(chunk).decode("ascii")).encode("ascii")
+
+    def encrypt_stream(self, source, sink, chunk_size: int = 1 << 16) -> int:
+        """Encrypt a file-like object into another one in constant memory.
+
+        Parameters
+        ----------
+        source : file-like
+            Text or binary object with a ``read`` method.
+        sink : file-like
+            Text or binary object with a ``write`` method, matching the type
+            of ``source``.
+        chunk_size : int, optional
+            Number of letters read at a time, by default 65536.
+
+        Returns
+        -------
+        int
+            The number of letters encrypted.
 
-        return encrypted_letters
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        total = 0
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+        for encrypted in self.iter_encrypt(chunks):
+            sink.write(encrypted)
+            total += len(encrypted)
+        return total
 
     def get_config(self):
         table = []
@@ -73,7 +280,160 @@ class Machine:
         print(tabulate(table, headers=["Component", "Details"], tablefmt="grid"))
 
 
-class EnigmaMachine(Machine):
+class MachineState:
+    """Rotor offsets and click counter of a RotorMachine.
+
+    The offsets are stored as bytes, so a state takes a few dozen bytes and
+    can be hashed and compared.
+    """
+
+    __slots__ = ("offsets", "clicks")
+
+    def __init__(self, offsets: bytes, clicks: int = 0):
+        """Initialize the state.
+
+        Parameters
+        ----------
+        offsets : bytes
+            The rotor offsets, fastest rotor first.
+        clicks : int, optional
+            The click counter of the rotor mechanism, by default 0.
+        """
+        self.offsets = bytes(offsets)
+        self.clicks = clicks
+
+    def __str__(self):
+        return (
+            f"MachineState instance with offsets: {list(self.offsets)} "
+            f"and clicks: {self.clicks}"
+        )
+
+    def __repr__(self):
+        return f"MachineState({self.offsets!r}, {self.clicks})"
+
+    def __eq__(self, other):
+        if not isinstance(other, MachineState):
+            return NotImplemented
+        return self.offsets == other.offsets and self.clicks == other.clicks
+
+    def __hash__(self):
+        return hash((self.offsets, self.clicks))
+
+    def __getstate__(self):
+        return self.offsets, self.clicks
+
+    def __setstate__(self, state):
+        self.offsets, self.clicks = state
+
+
+class RotorMachine(Machine):
+    """Machine whose rotor state can be captured, restored and moved at will.
+
+    The rotor offsets after any number of keypresses are computed rather
+    than stepped through, by default like an odometer over the alphabet of
+    the rotors. Subclasses set ``initial_state`` once built.
+    """
+
+    def tell(self) -> int:
+        """Return the current stream position.
+
+        Returns
+        -------
+        int
+            The number of symbols encrypted since the initial rotor state.
+        """
+        return self._clicking_mechanism().clicks
+
+    def seek(self, position: int):
+        """Move the rotor mechanism directly to a stream position.
+
+        The offset of every rotor is computed from the click count, or
+        looked up in the stepping table with the notch model, so seeking
+        costs the same regardless of the distance.
+
+        Parameters
+        ----------
+        position : int
+            The stream position, counted in symbols from the initial rotor
+            state.
+
+        Raises
+        ------
+        AssertionError
+            If the position is negative, or with the notch model before the
+            last state restored or set by hand.
+        """
+        assert position >= 0, "Stream position must be positive"
+        offsets, clicks = self._rotor_state()
+        self._advance(offsets, clicks, position - clicks)
+
+    def snapshot(self) -> "MachineState":
+        """Capture the current rotor state.
+
+        Returns
+        -------
+        MachineState
+            Compact, immutable copy of the rotor offsets and click counter.
+        """
+        rotor_mechanism = self._clicking_mechanism()
+        return MachineState(
+            bytes(rotor.offset for rotor in rotor_mechanism.rotors),
+            rotor_mechanism.clicks,
+        )
+
+    def restore(self, state: "MachineState"):
+        """Move the rotor mechanism back to a captured state.
+
+        Parameters
+        ----------
+        state : MachineState
+            A state captured with ``snapshot``.
+
+        Raises
+        ------
+        AssertionError
+            If the state doesn't have one offset per rotor.
+        """
+        rotor_mechanism = self._clicking_mechanism()
+        assert len(state.offsets) == len(
+            rotor_mechanism.rotors
+        ), "State must have one offset per rotor"
+        for rotor, offset in zip(rotor_mechanism.rotors, state.offsets):
+            rotor.offset = offset
+        rotor_mechanism.clicks = state.clicks
+
+    def reset(self):
+        """Move the rotor mechanism back to the state it was built with."""
+        self.restore(self.initial_state)
+
+    def _clicking_mechanism(self) -> RotorMechanism:
+        """Return the rotor mechanism that moves the rotors and counts clicks."""
+        return self.config[3]
+
+    def _rotor_state(self) -> tuple:
+        """Return the current rotor offsets and click counter."""
+        rotor_mechanism = self._clicking_mechanism()
+        return [
+            rotor.offset for rotor in rotor_mechanism.rotors
+        ], rotor_mechanism.clicks
+
+    def _offsets_after(self, offsets: list[int], clicks: int, steps: int) -> list[int]:
+        """Rotor offsets a number of keypresses later."""
+        return advance_offsets(
+            offsets, clicks, steps, len(self._clicking_mechanism().alphabet)
+        )
+
+    def _advance(self, offsets: list[int], clicks: int, steps: int):
+        """Move the rotor mechanism forward by a number of keypresses."""
+        rotor_mechanism = self._clicking_mechanism()
+        for rotor, offset in zip(
+            rotor_mechanism.rotors, self._offsets_after(offsets, clicks, steps)
+        ):
+            rotor.offset = offset
+        rotor_mechanism.clicks = clicks + steps
+
+
+class EnigmaMachine(RotorMachine):
     """Class representing an Enigma machine, inheriting from Machine class."""
 
     def __init__(
@@ -82,8 +442,11 @@ class EnigmaMachine(Machine):
         rotor_offsets: list[int],
         reflector_wirings: str,
         plugboard_wirings: dict = None,
-        rotor_names: list[str] = ["R", "M", "L"],
+        rotor_names: list[str] = None,
         reflector_name: str = None,
+        rotor_notches: list[str] = None,
+        stepping: str = "odometer",
+        ring_settings: list[int] = None,
     ):
         """
         Initialize an Enigma machine.
@@ -99,10 +462,22 @@ class EnigmaMachine(Machine):
         plugboard_wirings : dict, optional
             Plugboard wiring, by default None.
         rotor_names : list[str], optional
-            List of rotor names, by default ["R", "M", "L"].
+            List of rotor names, by default ["R", "M", "L"] and no name for
+            the following rotors.
         reflector_name : str, optional
             Reflector name, by default None.
-
+        rotor_notches : list[str], optional
+            Notch letters of every rotor, used by the notch stepping model,
+            by default no notches.
+        stepping : str, optional
+            "odometer" (the default) steps the rotors like an odometer after
+            every letter. "notch" models the historical machines: the first
+            three rotors step through their notches before every letter,
+            double step included, and the rotor wirings turn with the rotors.
+            With the catalog rotors and ring settings, its output matches
+            the Enigma I, M3 and M4.
+        ring_settings : list[int], optional
+            Ring setting of every rotor, 0 for A, by default all 0.
 
         Raises
         ------
@@ -118,16 +493,36 @@ class EnigmaMachine(Machine):
             [wiring.isalpha() for wiring in rotor_wirings]
         ), "Rotor wirings must be strings"
 
+        rotor_notches = rotor_notches or [""] * len(rotor_wirings)
+        ring_settings = ring_settings or [0] * len(rotor_wirings)
+        assert len(ring_settings) == len(
+            rotor_wirings
+        ), "Rotor wirings and ring settings must have the same length"
+        rotor_names = list(rotor_names or ["R", "M", "L"][: len(rotor_wirings)])
+        rotor_names += [None] * (len(rotor_wirings) - len(rotor_names))
         rotors = [
-            Rotor(offset=offset, wiring=wiring, name=name)
-            for offset, wiring, name in zip(rotor_offsets, rotor_wirings, rotor_names)
+            Rotor(
+                offset=offset,
+                wiring=wiring,
+                name=name,
+                notches=notches,
+                ring=ring,
+                exit_shift=stepping == "notch",
+            )
+            for offset, wiring, name, notches, ring in zip(
+                rotor_offsets, rotor_wirings, rotor_names, rotor_notches, ring_settings
+            )
         ]
 
-        rotor_mechanism = RotorMechanism(rotors=rotors)
+        rotor_mechanism = RotorMechanism(rotors=rotors, stepping=stepping)
         rotor_mechanism_inverted = RotorMechanism(
             rotors=rotors,
             inversed=True,
+            stepping=stepping,
         )
+        self.engine = None
+        self.stepping = stepping
+        self._stepping_table = None
         # Initialize Enigma machine using Machine superclass
         super().__init__(
             [
@@ -138,6 +533,329 @@ class EnigmaMachine(Machine):
                 PlugBoard(wiring=plugboard_wirings),
             ]
         )
+        self.initial_state = self.snapshot()
+
+    def compile(self, cache_size: int = 4096):
+        """Compile the machine into integer lookup tables.
+
+        Once compiled, ``encrypt`` performs a single table lookup per letter
+        instead of walking the components. The rotor offsets and clicks are
+        still read from and written back to the rotor mechanism, but the
+        wirings are captured at compile time: call ``compile`` again after
+        changing any wiring.
+
+        Parameters
+        ----------
+        cache_size : int, optional
+            Maximum number of substitution pages kept in memory,
+            by default 4096.
+
+        Returns
+        -------
+        EnigmaMachine
+            The machine itself, to allow chaining.
+        """
+        plugboard, rotor_mechanism, reflector = self.config[:3]
+        self.engine = CompiledEnigma(
+            rotor_wirings=[rotor.wiring for rotor in rotor_mechanism.rotors],
+            reflector_wiring=reflector.wiring,
+            plugboard_wirings=plugboard.wiring,
+            cache_size=cache_size,
+            rings=[rotor.ring for rotor in rotor_mechanism.rotors],
+            exit_shift=self.stepping == "notch",
+        )
+        return self
+
+    def encrypt(self, letters: str, verbose: bool = False, start: int = None) -> str:
+        """Encrypt letters, using the compiled engine when available.
+
+        Parameters
+        ----------
+        letters : str
+            The letters to encrypt.
+        verbose : bool, optional
+            If True, prints the encryption process. Verbose mode, like an
+            attached tracer, always walks the components.
+        start : int, optional
+            Stream position of the first letter. If given, the machine
+            seeks to it before encrypting, by default None.
+
+        Returns
+        -------
+        str
+            The encrypted letters.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        if start is not None:
+            self.seek(start)
+        if self.engine is None or verbose or self.tracer is not None:
+            return super().encrypt(letters, verbose)
+
+        offsets, clicks = self._rotor_state()
+        encrypted = self.engine.encrypt(
+            letters, offsets, clicks, self._stepping(offsets, clicks)
+        )
+        self._advance(offsets, clicks, len(letters))
+        return encrypted
+
+    def encrypt_bytes(self, letters) -> bytearray:
+        """Encrypt ASCII letters held in a bytes-like object.
+
+        The machine is compiled if needed and the rotor state is advanced
+        as with ``encrypt``.
+
+        Parameters
+        ----------
+        letters : bytes-like
+            The ASCII codes of the letters to encrypt.
+
+        Returns
+        -------
+        bytearray
+            The ASCII codes of the encrypted letters.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        if self.engine is None:
+            self.compile()
+        offsets, clicks = self._rotor_state()
+        encrypted = self.engine.encrypt_bytes(
+            letters, offsets, clicks, self._stepping(offsets, clicks)
+        )
+        self._advance(offsets, clicks, len(encrypted))
+        return encrypted
+
+    def encrypt_into(self, letters, out) -> int:
+        """Encrypt ASCII letters from a buffer into a preallocated one.
+
+        The machine is compiled if needed and the rotor state is advanced
+        as with ``encrypt``. Long buffers are encrypted with NumPy when it
+        is installed, writing straight into ``out``.
+
+        Parameters
+        ----------
+        letters : bytes-like
+            The ASCII codes of the letters to encrypt.
+        out : writable bytes-like
+            Buffer receiving the ASCII codes of the encrypted letters, at
+            least as long as ``letters``. It may be ``letters`` itself.
+
+        Returns
+        -------
+        int
+            The number of letters encrypted.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter, or ``out`` is
+            read-only or too small. Nothing is written in that case.
+        """
+        if self.tracer is not None:
+            return super().encrypt_into(letters, out)
+        if self.engine is None:
+            self.compile()
+        offsets, clicks = self._rotor_state()
+        stepping = self._stepping(offsets, clicks)
+        length = memoryview(letters).nbytes
+        if np is not None and length >= VECTORIZED_SIZE:
+            target = np.frombuffer(out, dtype=np.uint8)
+            assert len(target) >= length, "Output buffer is smaller than the letters"
+            assert target.flags.writeable, "Output buffer must be writable"
+            encrypt_array(
+                self.engine,
+                np.frombuffer(letters, dtype=np.uint8),
+                offsets,
+                clicks,
+                stepping,
+                out=target[:length],
+            )
+        else:
+            self.engine.encrypt_into(letters, out, offsets, clicks, stepping)
+        self._advance(offsets, clicks, length)
+        return length
+
+    def encrypt_array(self, letters, store=None):
+        """Encrypt a whole message with vectorized NumPy gathers.
+
+        The output is identical to ``encrypt`` and the rotor state is
+        advanced in the same way. The machine is compiled if needed.
+
+        Parameters
+        ----------
+        letters : np.ndarray
+            uint8 array with the ASCII codes of the letters to encrypt.
+        store : TableStore, optional
+            Store of precomputed scrambler tables. If given, each letter is
+            a lookup into the shared, memory-mapped table of the rotor
+            wirings instead of a pass through every rotor.
+
+        Returns
+        -------
+        np.ndarray
+            uint8 array with the ASCII codes of the encrypted letters.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        ImportError
+            If NumPy is not installed.
+        """
+        if self.engine is None:
+            self.compile()
+        offsets, clicks = self._rotor_state()
+        function = encrypt_array if store is None else store.encrypt_array
+        encrypted = function(
+            self.engine, letters, offsets, clicks, self._stepping(offsets, clicks)
+        )
+        self._advance(offsets, clicks, len(encrypted))
+        return encrypted
+
+    def encrypt_parallel(
+        self, letters: str, workers: int = None, chunk_size: int = None
+    ) -> str:
+        """Encrypt a long message using several processes.
+
+        The message is split into chunks and every worker receives a copy
+        of the machine moved to the stream position of its chunk. The
+        outputs are joined in order and this machine is left in the same
+        state as after a serial ``encrypt``.
+
+        Parameters
+        ----------
+        letters : str
+            The letters to encrypt.
+        workers : int, optional
+            Number of worker processes, by default ``os.cpu_count()``.
+        chunk_size : int, optional
+            Number of letters per chunk, by default the message is split
+            evenly among the workers.
+
+        Returns
+        -------
+        str
+            The encrypted letters.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        workers = workers or os.cpu_count() or 1
+        chunk_size = chunk_size or -(-len(letters) // workers)
+        if workers == 1 or len(letters) <= chunk_size:
+            return self.encrypt(letters)
+        assert is_capital_letters(letters), "Letter must be a capital english letter"
+
+        if self.engine is None:
+            self.compile()
+        start = self.tell()
+        positions = range(0, len(letters), chunk_size)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            encrypted = executor.map(
+                _encrypt_chunk,
+                [self] * len(positions),
+                [letters[i : i + chunk_size] for i in positions],
+                [start + i for i in positions],
+            )
+            encrypted = "".join(encrypted)
+        self.seek(start + len(letters))
+        return encrypted
+
+    def clone(self, rotor_offsets: list[int] = None) -> "EnigmaMachine":
+        """Create an independent machine without validating the wirings again.
+
+        The clone has its own rotors and rotor state, and shares the
+        immutable wirings and the compiled engine with this machine.
+
+        Parameters
+        ----------
+        rotor_offsets : list[int], optional
+            Initial rotor offsets of the clone. By default the clone keeps
+            the current rotor state.
+
+        Returns
+        -------
+        EnigmaMachine
+            The new machine.
+
+        Raises
+        ------
+        AssertionError
+            If the offsets don't match the rotors or are not between 0 and 25.
+        """
+        clone = copy.copy(self)
+        clone.config = [copy.copy(component) for component in self.config]
+        rotors = [copy.copy(rotor) for rotor in self.config[1].rotors]
+        clone.config[1].rotors = clone.config[3].rotors = rotors
+        if rotor_offsets is not None:
+            assert len(rotor_offsets) == len(
+                rotors
+            ), "Rotor wirings and offsets must have the same length"
+            assert all(
+                0 <= offset <= 25 for offset in rotor_offsets
+            ), "Rotor position must be between 0 and 25"
+            clone.restore(MachineState(rotor_offsets))
+            clone.initial_state = clone.snapshot()
+        return clone
+
+    def initial_stepping_table(self):
+        """Return the stepping table anchored at the initial state.
+
+        Returns
+        -------
+        SteppingTable
+            The rotor offsets of every keypress from the initial state, or
+            None with the odometer model.
+        """
+        if self.stepping == "odometer":
+            return None
+        return stepping_table(
+            tuple(self.initial_state.offsets),
+            self._notches(),
+            self.initial_state.clicks,
+        )
+
+    def _clicking_mechanism(self) -> RotorMechanism:
+        """Return the rotor mechanism that moves the rotors and counts clicks."""
+        return self.config[3] if self.stepping == "odometer" else self.config[1]
+
+    def _stepping(self, offsets: list[int], clicks: int):
+        """Return the stepping table of the current state, None for an odometer.
+
+        The table is anchored at the initial state when the current state
+        lies on its sequence, otherwise at the current state.
+        """
+        if self.stepping == "odometer":
+            return None
+        for table in (self._stepping_table, self.initial_stepping_table()):
+            if (
+                table is not None
+                and clicks >= table.clicks
+                and table.offsets(clicks) == offsets
+            ):
+                self._stepping_table = table
+                return table
+        self._stepping_table = stepping_table(tuple(offsets), self._notches(), clicks)
+        return self._stepping_table
+
+    def _notches(self) -> tuple:
+        return tuple(rotor.notches for rotor in self.config[1].rotors)
+
+    def _offsets_after(self, offsets: list[int], clicks: int, steps: int) -> list[int]:
+        """Rotor offsets a number of keypresses later, with either stepping."""
+        stepping = self._stepping(offsets, clicks)
+        if stepping is None:
+            return super()._offsets_after(offsets, clicks, steps)
+        return stepping.offsets(clicks + steps)
 
     @classmethod
     def from_configuration(
@@ -146,6 +864,8 @@ class EnigmaMachine(Machine):
         rotor_offsets: list[int],
         reflector_config: ReflectorConfig,
         plugboard_wirings: dict = None,
+        stepping: str = "odometer",
+        ring_settings: list[int] = None,
     ):
         """
         Create a new EnigmaMachine instance from configuration settings.
@@ -162,6 +882,11 @@ class EnigmaMachine(Machine):
             Dictionary representing the plugboard wirings,
             where keys and values correspond to connected letters,
             by default None
+        stepping : str, optional
+            Stepping model, "odometer" or "notch", by default "odometer".
+            The notch model uses the notches of the rotor configurations.
+        ring_settings : list[int], optional
+            Ring setting of every rotor, 0 for A, by default all 0.
 
         Returns
         -------
@@ -187,4 +912,12 @@ class EnigmaMachine(Machine):
             plugboard_wirings=plugboard_wirings,
             rotor_names=[r_c.name for r_c in rotor_config],
             reflector_name=reflector_config.name,
+            rotor_notches=[r_c.notches for r_c in rotor_config],
+            stepping=stepping,
+            ring_settings=ring_settings,
         )
+
+
+def _encrypt_chunk(machine: EnigmaMachine, letters: str, start: int) -> str:
+    """Encrypt one chunk of a message in a worker process."""
+    return machine.encrypt(letters, start=start)
@@ -0,0 +1,97 @@
+import re
+from string import ascii_lowercase, ascii_uppercase
+
+from .object import LETTERS
+
+__all__ = ["casefold", "normalize", "split_letters", "merge_letters"]
+
+# Case-folding tables for str.translate and bytes.translate
+CASEFOLD = str.maketrans(ascii_lowercase, ascii_uppercase)
+BYTES_CASEFOLD = bytes.maketrans(ascii_lowercase.encode(), ascii_uppercase.encode())
+# Every byte that is not the ASCII code of a capital English letter
+NON_LETTERS = bytes(b for b in range(256) if chr(b) not in LETTERS)
+
+_NON_LETTER_RUNS = re.compile("([^A-Z]+)")
+_BYTES_NON_LETTER_RUNS = re.compile(b"([^A-Z]+)")
+
+
+def casefold(text):
+    """Uppercase the English letters of a text, leaving everything else.
+
+    Parameters
+    ----------
+    text : str or bytes-like
+        The text to fold.
+
+    Returns
+    -------
+    str or bytes
+        The folded text, of the same length.
+    """
+    if isinstance(text, str):
+        return text.translate(CASEFOLD)
+    return bytes(text).translate(BYTES_CASEFOLD)
+
+
+def normalize(text):
+    """Case-fold a text and drop every character that is not an English letter.
+
+    Parameters
+    ----------
+    text : str or bytes-like
+        The text to normalize.
+
+    Returns
+    -------
+    str or bytes
+        The capital English letters of the text, in order.
+    """
+    if isinstance(text, str):
+        return _NON_LETTER_RUNS.sub("", text.translate(CASEFOLD))
+    return bytes(text).translate(BYTES_CASEFOLD, NON_LETTERS)
+
+
+def split_letters(text) -> tuple:
+    """Separate the letters of a text from the characters between them.
+
+    Parameters
+    ----------
+    text : str or bytes-like
+        The text to split. It is case-folded first.
+
+    Returns
+    -------
+    tuple
+        The capital English letters of the text and the list of
+        alternating letter runs and separators, as ``re.split`` returns it.
+    """
+    folded = casefold(text)
+    pattern = _NON_LETTER_RUNS if isinstance(folded, str) else _BYTES_NON_LETTER_RUNS
+    pieces = pattern.split(folded)
+    letters = folded[:0].join(pieces[::2])
+    return letters, pieces
+
+
+def merge_letters(letters, pieces: list):
+    """Put encrypted letters back in place of the letter runs of a text.
+
+    Parameters
+    ----------
+    letters : str or bytes
+        The encrypted letters, as many as in the letter runs of ``pieces``.
+    pieces : list
+        The pieces returned by ``split_letters``.
+
+    Returns
+    -------
+    str or bytes
+        The text with its letters replaced.
+    """
+    merged, position = [], 0
+    for i, piece in enumerate(pieces):
+        if i % 2:
+            merged.append(piece)
+        else:
+            merged.append(letters[position : position + len(piece)])
+            position += len(piece)
+    return letters[:0].join(merged)
@@ -1,20 +1,144 @@
 from abc import ABC, abstractmethod
+from time import perf_counter
+
+__all__ = [
+    "LETTERS",
+    "BYTES",
+    "PAWLS",
+    "STEPPING_MODELS",
+    "is_capital_letters",
+    "notch_step",
+    "MachineObject",
+    "Rotor",
+    "RotorMechanism",
+    "PlugBoard",
+    "Reflector",
+]
 
 LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
+# Alphabet of the byte machines: every byte value is a symbol
+BYTES = bytes(range(256))
+
+# Number of rotors driven by a pawl in the notch stepping model
+PAWLS = 3
+
+STEPPING_MODELS = ("odometer", "notch")
+
+
+def is_capital_letters(letters) -> bool:
+    """Check in bulk that a text only holds capital English letters.
+
+    Parameters
+    ----------
+    letters : str or bytes-like
+        The text to check. Bytes are ASCII codes.
+
+    Returns
+    -------
+    bool
+        True if every character is in LETTERS (or the text is empty).
+    """
+    if not letters:
+        return True
+    if isinstance(letters, str):
+        return letters.isascii() and letters.isalpha() and letters.isupper()
+    letters = bytes(letters)
+    return letters.isalpha() and letters.isupper()
+
+
+def _symbols(alphabet) -> str:
+    """Describe the symbols of an alphabet for error messages."""
+    if alphabet == LETTERS:
+        return "capital english letters"
+    if alphabet == BYTES:
+        return "byte values"
+    return f"symbols of {alphabet!r}"
+
+
+def notch_step(
+    offsets: list[int], notches: list[str], pawls: int = PAWLS, alphabet=LETTERS
+) -> list[int]:
+    """Compute the rotor offsets after one keypress of a notched mechanism.
+
+    The fastest rotor always steps. The pawl of every other driven rotor
+    engages when the previous rotor shows a notch letter, and then pushes
+    both rotors: this is the double step of the middle rotor. Rotors past
+    the last pawl, like the fourth rotor of the M4, never move.
+
+    Parameters
+    ----------
+    offsets : list[int]
+        The current rotor offsets, fastest rotor first.
+    notches : list[str]
+        The notch letters of every rotor.
+    pawls : int, optional
+        Number of rotors driven by a pawl, by default 3.
+    alphabet : str or bytes, optional
+        The symbols of the rotors, by default LETTERS.
+
+    Returns
+    -------
+    list[int]
+        The rotor offsets after the keypress.
+    """
+    driven = min(len(offsets), pawls)
+    steps = [0] * len(offsets)
+    if driven:
+        steps[0] = 1
+    for i in range(1, driven):
+        if alphabet[offsets[i - 1]] in notches[i - 1]:
+            steps[i] = steps[i - 1] = 1
+    return [(offset + step) % len(alphabet) for offset, step in zip(offsets, steps)]
+
 
 class MachineObject(ABC):
+    """Component of the signal path of a machine.
+
+    Components don't check their letters one by one: ``Machine.encrypt``
+    validates the whole message before it reaches them.
+    """
+
     @abstractmethod
     def forward(self, letter: str) -> str:
         pass
 
+    def trace(self, letter: str, tracer) -> str:
+        """Encrypt a letter, reporting the step to a tracer.
+
+        Parameters
+        ----------
+        letter : str
+            The letter to encrypt.
+        tracer : Tracer
+            The tracer receiving the events.
+
+        Returns
+        -------
+        str
+            The encrypted letter.
+        """
+        start = perf_counter()
+        encrypted = self.forward(letter)
+        tracer.component(self, letter, encrypted, perf_counter() - start)
+        return encrypted
+
 
 class Rotor(MachineObject):
     """Class representing a rotor in an Enigma machine.
     A rotor is characterized by its position
     """
 
-    def __init__(self, offset: int, wiring: str, name: str = None):
+    def __init__(
+        self,
+        offset: int,
+        wiring: str,
+        name: str = None,
+        notches: str = "",
+        alphabet=LETTERS,
+        ring: int = 0,
+        exit_shift: bool = False,
+    ):
         """_summary_
 
         Parameters
@@ -25,23 +149,67 @@ class Rotor(MachineObject):
             The ordering of the letters in the rotor
         name: str, optional
             The name of the rotor, by default None
+        notches: str, optional
+            The letters at which the rotor carries to the next one in the
+            notch stepping model, by default ""
+        alphabet: str or bytes, optional
+            The symbols the rotor permutes, by default LETTERS. With BYTES
+            the wiring is a bytes permutation and symbols are byte values.
+        ring: int, optional
+            The ring setting (Ringstellung), 0 for A, by default 0. The
+            wiring is turned back by the ring setting against the position.
+        exit_shift: bool, optional
+            If True, the wiring turns with the rotor like in the historical
+            machines, so the signal is shifted back by the position on its
+            way out as well as in, by default False.
 
         Raises
         ------
         AssertionError
-            If the position is not within the valid range.
+            If the position or ring setting is not within the valid range.
         """
         self.name = name
-        assert 0 <= offset <= 25, "Rotor position must be between 0 and 25"
+        size = len(alphabet)
+        assert 0 <= offset < size, f"Rotor position must be between 0 and {size - 1}"
+        assert 0 <= ring < size, f"Ring setting must be between 0 and {size - 1}"
+        self.ring = ring
+        self.exit_shift = exit_shift
+        # (mechanism, level) pairs notified when the rotor moves
+        self._mechanisms = []
         self.offset = offset
         assert all(
-            [len(wiring) == 26, set(wiring) == set(LETTERS)]
-        ), "Letter ordering must contain exactly 26 letters in wiring"
+            [len(wiring) == size, set(wiring) == set(alphabet)]
+        ), f"Letter ordering must contain exactly {size} letters in wiring"
         self.wiring = wiring
+        assert set(notches) <= set(alphabet), f"Notches must be {_symbols(alphabet)}"
+        self.notches = notches
+        self.alphabet = alphabet
+        self.size = size
 
     def __str__(self):
         return f"Rotor instance {self.name if self.name is not None else ''} with offset: {self.offset} and wiring: {self.wiring}"
 
+    def __getstate__(self):
+        # Copies belong to no mechanism until one takes them
+        state = self.__dict__.copy()
+        del state["_mechanisms"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._mechanisms = []
+
+    @property
+    def offset(self) -> int:
+        """The position of the rotor."""
+        return self._offset
+
+    @offset.setter
+    def offset(self, offset: int):
+        self._offset = offset
+        for mechanism, level in self._mechanisms:
+            mechanism._moved(level)
+
     def change_position(self, offset: int):
         """Change the position of the rotor.
 
@@ -60,73 +228,67 @@ class Rotor(MachineObject):
 
     def click_rotor(self):
         """Rotate the rotor by one position."""
-        self.offset = (self.offset + 1) % 26
+        self.offset = (self._offset + 1) % self.size
 
-    def forward(self, letter: str, verbose: bool = False) -> str:
+    def forward(self, letter: str) -> str:
         """Encrypt a letter using the current rotor position.
 
         Parameters
         ----------
         letter : str
             The letter to encrypt.
-        verbose : bool, optional
-            If True, prints the encryption process.
 
         Returns
         -------
         str
             The encrypted letter.
-
-        Raises
-        ------
-        AssertionError
-            If the letter is not a capital English letter.
         """
-        assert letter in self.wiring, "Letter must be a capital english letter"
-        letter_index = LETTERS.index(letter)
-        encrypted_letter_index = (letter_index + self.offset) % 26
-        if verbose:
-            print(
-                f"Encrypting {letter} to {self.wiring[encrypted_letter_index]} with rotor {self.name if self.name is not None else ''} at offset {self.offset}"
-            )
-        return self.wiring[encrypted_letter_index]
-
-    def inverse(self, letter: str, verbose: bool = False) -> str:
+        shift = (self._offset - self.ring) % self.size
+        letter_index = self.alphabet.index(letter)
+        encrypted_letter = self.wiring[(letter_index + shift) % self.size]
+        if not self.exit_shift:
+            return encrypted_letter
+        return self.alphabet[
+            (self.alphabet.index(encrypted_letter) - shift) % self.size
+        ]
+
+    def inverse(self, letter: str) -> str:
         """Encrypt a letter using the current rotor position.
 
         Parameters
         ----------
         letter : str
             The letter to encrypt.
-        verbose : bool, optional
-            If True, prints the encryption process.
 
         Returns
         -------
         str
             The encrypted letter.
-
-        Raises
-        ------
-        AssertionError
-            If the letter is not a capital English letter.
         """
-        assert letter in self.wiring, "Letter must be a capital english letter"
+        shift = (self._offset - self.ring) % self.size
+        if self.exit_shift:
+            letter = self.alphabet[(self.alphabet.index(letter) + shift) % self.size]
         letter_index = self.wiring.index(letter)
-        encrypted_letter_index = (letter_index - self.offset) % 26
-        if verbose:
-            print(
-                f"Encrypting {letter} to {LETTERS[encrypted_letter_index]} with rotor {self.name} at offset {self.offset}"
-            )
-        return LETTERS[encrypted_letter_index]
+        return self.alphabet[(letter_index - shift) % self.size]
 
 
 class RotorMechanism(MachineObject):
     """
     Class representing a rotor mechanism in an Enigma machine.
+
+    Only the fastest rotor moves at every letter. The mechanism keeps the
+    composed permutation of the rotors after each one, and a slow rotor
+    that moves only invalidates the compositions up to its level, so a
+    letter costs one rotor and one lookup whatever the number of rotors.
     """
 
-    def __init__(self, rotors: list, inversed: bool = False) -> None:
+    def __init__(
+        self,
+        rotors: list,
+        inversed: bool = False,
+        stepping: str = "odometer",
+        alphabet=LETTERS,
+    ) -> None:
         """
         Initialize an Enigma machine.
 
@@ -137,23 +299,110 @@ class RotorMechanism(MachineObject):
         inversed : bool, optional
             Indicates whether the machine is operating in inverse mode.
             Defaults to False.
+        stepping : str, optional
+            "odometer" steps the rotors like an odometer after every letter.
+            "notch" steps them through their notches before every letter,
+            like the historical machines. Defaults to "odometer".
+        alphabet : str or bytes, optional
+            The symbols of the rotors, by default LETTERS.
 
         Raises
         ------
         AssertionError
-            If any element in rotors is not an instance of the Rotor class.
+            If any element in rotors is not an instance of the Rotor class
+            with this alphabet, or the stepping model is unknown.
         """
-        assert all(isinstance(rotor, Rotor) for rotor in rotors)
-        self.rotors = rotors
+        assert all(
+            isinstance(rotor, Rotor) and rotor.alphabet == alphabet for rotor in rotors
+        )
+        assert stepping in STEPPING_MODELS, f"Stepping must be one of {STEPPING_MODELS}"
+        self.alphabet = alphabet
         self.clicks = 0
         self.inverse = inversed
+        self.stepping = stepping
+        self.rotors = rotors
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_composed"], state["_valid"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.rotors = self._rotors
+
+    @property
+    def rotors(self) -> list:
+        """The rotors of the mechanism, fastest rotor first."""
+        return self._rotors
+
+    @rotors.setter
+    def rotors(self, rotors: list):
+        for rotor in getattr(self, "_rotors", []):
+            rotor._mechanisms[:] = [
+                pair for pair in rotor._mechanisms if pair[0] is not self
+            ]
+        self._rotors = rotors
+        for level, rotor in enumerate(rotors[1:], start=1):
+            rotor._mechanisms.append((self, level))
+        # _composed[level] maps a letter through the rotors from that level
+        # on, in the direction of the mechanism. Levels from _valid on are
+        # up to date, the last one is the identity
+        self._composed = [None] * len(rotors) + [{s: s for s in self.alphabet}]
+        self._valid = len(rotors)
+
+    def _moved(self, level: int):
+        """Invalidate the compositions including the rotor at a level."""
+        if level >= self._valid:
+            self._valid = level + 1
+
+    def _compose(self):
+        """Recompose the invalidated levels, from the slowest one down."""
+        composed = self._composed
+        for level in range(self._valid - 1, 0, -1):
+            rotor, following = self._rotors[level], composed[level + 1]
+            if self.inverse:
+                composed[level] = {
+                    s: rotor.inverse(following[s]) for s in self.alphabet
+                }
+            else:
+                composed[level] = {
+                    s: following[rotor.forward(s)] for s in self.alphabet
+                }
+        self._valid = 1
+
+    @property
+    def clicking(self) -> bool:
+        """Whether this mechanism moves the rotors.
+
+        The forward and inverse mechanisms of a machine share their rotors:
+        with the odometer model the inverse one clicks after each letter,
+        with the notch model the forward one clicks before each letter.
+        """
+        return self.inverse == (self.stepping == "odometer")
 
     def click(self):
         """Advance the rotors of the Enigma machine by one position."""
         self.clicks += 1
-        for i in range(len(self.rotors)):
-            if self.clicks % (26**i) == 0:
-                self.rotors[i].click_rotor()
+        if self.stepping == "notch":
+            driven = self._rotors[:PAWLS]
+            offsets = notch_step(
+                [rotor.offset for rotor in driven],
+                [rotor.notches for rotor in driven],
+                alphabet=self.alphabet,
+            )
+            for rotor, offset in zip(driven, offsets):
+                if rotor.offset != offset:
+                    rotor.offset = offset
+            return
+        # Rotor i steps when the counter is a multiple of size**i: carry
+        # through the rotors while the counter divides
+        clicks, size = self.clicks, len(self.alphabet)
+        for rotor in self._rotors:
+            rotor.click_rotor()
+            if clicks % size:
+                break
+            clicks //= size
 
     def __str__(self):
         s = "RotorMechanism instance with rotors:"
@@ -161,15 +410,13 @@ class RotorMechanism(MachineObject):
             s += f"\n{rotor}"
         return s
 
-    def forward(self, letter: str, verbose: bool = False) -> str:
+    def forward(self, letter: str) -> str:
         """Encrypt a letter using the Enigma machine.
 
         Parameters
         ----------
         letter : str
             The letter to encrypt.
-        verbose : bool, optional
-            If True, prints the encryption process.
 
         Returns
         -------
@@ -177,72 +424,94 @@ class RotorMechanism(MachineObject):
             The encrypted letter.
         """
         if self.inverse:
-            return self._inverse(letter, verbose)
+            return self._inverse(letter)
         else:
-            return self._forward(letter, verbose)
+            return self._forward(letter)
 
-    def _forward(self, letter: str, verbose: bool = False) -> str:
+    def _forward(self, letter: str) -> str:
         """Encrypt a letter in the forward direction using the Enigma machine.
 
         Parameters
         ----------
         letter : str
             The letter to encrypt.
-        verbose : bool, optional
-            If True, prints the encryption process.
 
         Returns
         -------
         str
             The encrypted letter.
-
-        Raises
-        ------
-        AssertionError
-            If the letter is not a capital English letter.
         """
-        assert letter in LETTERS, "Letter must be a capital english letter"
-        for rotor in self.rotors:
-            letter = rotor.forward(letter, verbose)
-        return letter
-
-    def _inverse(self, letter: str, verbose: bool = False) -> str:
+        if self.clicking:
+            self.click()
+        if not self._rotors:
+            return letter
+        if self._valid > 1:
+            self._compose()
+        return self._composed[1][self._rotors[0].forward(letter)]
+
+    def _inverse(self, letter: str) -> str:
         """Encrypt a letter in the inverse direction using the Enigma machine.
 
         Parameters
         ----------
         letter : str
             The letter to encrypt.
-        verbose : bool, optional
-            If True, prints the encryption process.
 
         Returns
         -------
         str
              The encrypted letter.
+        """
+        if self._rotors:
+            if self._valid > 1:
+                self._compose()
+            letter = self._rotors[0].inverse(self._composed[1][letter])
+        if self.clicking:
+            self.click()
+        return letter
 
-        Raises
-        ------
-        AssertionError
-            If the letter is not a capital English letter.
+    def trace(self, letter: str, tracer) -> str:
+        """Encrypt a letter, reporting every rotor and the stepping to a tracer.
+
+        Parameters
+        ----------
+        letter : str
+            The letter to encrypt.
+        tracer : Tracer
+            The tracer receiving the events.
+
+        Returns
+        -------
+        str
+            The encrypted letter.
         """
-        assert letter in LETTERS, "Letter must be a capital english letter"
-        for rotor in reversed(self.rotors):
-            letter = rotor.inverse(letter, verbose)
-        self.click()
+        if self.clicking and not self.inverse:
+            self.click()
+            tracer.step(self)
+        rotors = reversed(self.rotors) if self.inverse else self.rotors
+        for rotor in rotors:
+            start = perf_counter()
+            encrypted = rotor.inverse(letter) if self.inverse else rotor.forward(letter)
+            tracer.component(rotor, letter, encrypted, perf_counter() - start)
+            letter = encrypted
+        if self.clicking and self.inverse:
+            self.click()
+            tracer.step(self)
         return letter
 
 
 class PlugBoard(MachineObject):
     """Class representing a plugboard in an Enigma machine."""
 
-    def __init__(self, wiring: dict = None):
+    def __init__(self, wiring: dict = None, alphabet=LETTERS):
         """Initialize the plugboard with given wiring.
 
         Parameters
         ----------
         wiring : dict, optional
             A string representing wiring in the plugboard, by default None
+        alphabet : str or bytes, optional
+            The symbols of the machine, by default LETTERS.
 
         Raises
         ------
@@ -252,54 +521,47 @@ class PlugBoard(MachineObject):
         """
         if wiring is not None:
             assert isinstance(wiring, dict), "Wiring must be a dictionary"
-            assert all(
-                [key in LETTERS for key in wiring.keys()]
-            ), "Wiring must be a dictionary containing english letters"
+            assert set(wiring) <= set(
+                alphabet
+            ), f"Wiring must be a dictionary containing {_symbols(alphabet)}"
             self.wiring = wiring
         else:
             self.wiring = {}
+        self.alphabet = alphabet
 
     def __str__(self):
         return f"PlugBoard instance with wiring: {self.wiring}"
 
-    def forward(self, letter: str, verbose: bool = False) -> str:
+    def forward(self, letter: str) -> str:
         """Encrypt a letter using the plugboard.
 
         Parameters
         ----------
         letter : str
             The letter to encrypt.
-        verbose : bool, optional
-            If True, prints the encryption process.
 
         Returns
         -------
         str
             The encrypted letter.
-
-        Raises
-        ------
-        AssertionError
-            If the letter is not a capital English letter.
         """
-        assert letter in LETTERS, "Letter must be a capital english letter"
-        if verbose:
-            print(
-                f"Encrypting {letter} to {self.wiring.get(letter, letter)} with plugboard"
-            )
         return self.wiring.get(letter, letter)
 
 
 class Reflector(MachineObject):
     """Class representing a reflector in an Enigma machine."""
 
-    def __init__(self, wiring: str, name: str = None):
+    def __init__(self, wiring: str, name: str = None, alphabet=LETTERS):
         """Initialize the reflector.
 
         Parameters
         ----------
         wiring : dict
             A dictionary representing wiring in the reflector, by default None
+        name : str, optional
+            The name of the reflector, by default None
+        alphabet : str or bytes, optional
+            The symbols the reflector permutes, by default LETTERS.
 
         Raises
         ------
@@ -308,36 +570,27 @@ class Reflector(MachineObject):
             the requirements for a valid wiring dictionary.
         """
         assert all(
-            [len(wiring) == 26, set(wiring) == set(LETTERS)]
-        ), "Letter ordering must contain exactly 26 letters"
+            [len(wiring) == len(alphabet), set(wiring) == set(alphabet)]
+        ), f"Letter ordering must contain exactly {len(alphabet)} letters"
         self.wiring = wiring
         self.name = name
+        self.alphabet = alphabet
 
     def __str__(self):
         return f"Reflector instance {self.name if self.name is not None else ''} with wiring: {self.wiring}"
 
-    def forward(self, letter: str, verbose: bool = False) -> str:
+    def forward(self, letter: str) -> str:
         """Encrypt a letter using the reflector.
 
         Parameters
         ----------
         letter : str
             The letter to encrypt.
-        verbose : bool, optional
-            If True, prints the encryption process.
 
         Returns
         -------
         str
             The encrypted letter.
-
-        Raises
-        ------
-        AssertionError
-            If the letter is not a capital English letter.
         """
-        assert letter in self.wiring, "Letter must be a capital english letter"
-        letter_index = LETTERS.index(letter)
-        if verbose:
-            print(f"Encrypting {letter} to {self.wiring[letter_index]} with reflector")
+        letter_index = self.alphabet.index(letter)
         return self.wiring[letter_index]
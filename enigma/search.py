@@ -0,0 +1,300 @@
+import heapq
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from .configurations import REFLECTOR_CONFIGURATIONS, ReflectorConfig, RotorConfig
+from .machine import EnigmaMachine
+from .object import LETTERS, is_capital_letters
+from .vectorized import np, require_numpy, scrambler_tables
+
+__all__ = [
+    "Candidate",
+    "SearchReport",
+    "index_of_coincidence",
+    "letter_counts",
+    "decrypt_positions",
+    "search_unit",
+    "brute_force",
+]
+
+# Number of rotor positions decrypted together in one vectorized pass
+BLOCK_SIZE = 4096
+
+# Ciphertext letters decrypted together in one pass, bounds temporary memory
+COLUMN_SIZE = 512
+
+
+@dataclass(order=True)
+class Candidate:
+    """A scored key found by a key search."""
+
+    score: float
+    rotor_config: list[RotorConfig] = field(compare=False)
+    rotor_offsets: list[int] = field(compare=False)
+    reflector_config: ReflectorConfig = field(compare=False)
+    plugboard_wirings: dict = field(default_factory=dict, compare=False)
+
+    def __str__(self):
+        return (
+            f"Candidate with score {self.score:.5f}: rotors "
+            f"{[r_c.name for r_c in self.rotor_config]}, offsets "
+            f"{self.rotor_offsets}, reflector {self.reflector_config.name}"
+        )
+
+    def machine(self) -> EnigmaMachine:
+        """Build the EnigmaMachine of this candidate, at its initial position."""
+        return EnigmaMachine.from_configuration(
+            rotor_config=list(self.rotor_config),
+            rotor_offsets=list(self.rotor_offsets),
+            reflector_config=self.reflector_config,
+            plugboard_wirings=self.plugboard_wirings,
+        )
+
+
+@dataclass
+class SearchReport:
+    """Best candidates of a key search and its throughput."""
+
+    candidates: list[Candidate]
+    tested: int
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        """Candidates tested per second."""
+        return self.tested / self.elapsed if self.elapsed else 0.0
+
+
+def index_of_coincidence(letters: "np.ndarray") -> "np.ndarray":
+    """Index of coincidence of every row of an array of letter indexes.
+
+    Parameters
+    ----------
+    letters : np.ndarray
+        Integer array of shape (rows, length) with values between 0 and 25.
+
+    Returns
+    -------
+    np.ndarray
+        The index of coincidence of every row.
+    """
+    require_numpy()
+    return _coincidence(letter_counts(letters), letters.shape[1])
+
+
+def letter_counts(letters: "np.ndarray") -> "np.ndarray":
+    """Count the letters of every row of an array of letter indexes.
+
+    Parameters
+    ----------
+    letters : np.ndarray
+        Integer array of shape (rows, length) with values between 0 and 25.
+
+    Returns
+    -------
+    np.ndarray
+        int64 array of shape (rows, 26) with the count of every letter.
+    """
+    require_numpy()
+    rows = letters.shape[0]
+    flat = (np.arange(rows)[:, None] * 26 + letters).ravel()
+    return np.bincount(flat, minlength=rows * 26).reshape(rows, 26)
+
+
+def _coincidence(counts: "np.ndarray", length: int) -> "np.ndarray":
+    return (counts * (counts - 1)).sum(axis=1) / max(length * (length - 1), 1)
+
+
+def decrypt_positions(
+    ciphertext: "np.ndarray",
+    rotor_wirings: list[str],
+    reflector_wiring: str,
+    positions: "np.ndarray",
+    plugboard_wirings: dict = None,
+    start: int = 0,
+) -> "np.ndarray":
+    """Decrypt one ciphertext at many starting rotor positions at once.
+
+    The whole ciphertext is decrypted in one pass through
+    ``scrambler_tables``, callers bound memory by passing it in columns.
+
+    Parameters
+    ----------
+    ciphertext : np.ndarray
+        Integer array with the letter indexes (0 to 25) of the ciphertext.
+    rotor_wirings : list[str]
+        List of rotor wirings, fastest rotor first.
+    reflector_wiring : str
+        Reflector wiring.
+    positions : np.ndarray
+        Integer array of shape (rows, rotors) with starting rotor offsets.
+    plugboard_wirings : dict, optional
+        Plugboard wiring, by default None.
+    start : int, optional
+        Stream position of the first letter, counted from the starting
+        rotor offsets, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        uint8 array of shape (rows, length) with the decrypted letter
+        indexes.
+    """
+    require_numpy()
+    plugboard_wirings = plugboard_wirings or {}
+    plugboard = np.array(
+        [LETTERS.index(plugboard_wirings.get(l, l)) for l in LETTERS], dtype=np.uint8
+    )
+    letters = plugboard[np.asarray(ciphertext)]
+    x = scrambler_tables(
+        rotor_wirings,
+        reflector_wiring,
+        np.asarray(positions, dtype=np.int64),
+        np.arange(start, start + len(letters)),
+        letters,
+    )
+    return plugboard[x]
+
+
+def search_unit(
+    ciphertext: "np.ndarray",
+    rotor_config: list[RotorConfig],
+    reflector_config: ReflectorConfig,
+    plugboard_wirings: dict = None,
+    top_k: int = 10,
+) -> list[Candidate]:
+    """Score every starting position of one rotor order and reflector.
+
+    Parameters
+    ----------
+    ciphertext : np.ndarray
+        Integer array with the letter indexes (0 to 25) of the ciphertext.
+    rotor_config : list[RotorConfig]
+        The rotor order, fastest rotor first.
+    reflector_config : ReflectorConfig
+        The reflector.
+    plugboard_wirings : dict, optional
+        Known plugboard wiring, by default None.
+    top_k : int, optional
+        Number of candidates to keep, by default 10.
+
+    Returns
+    -------
+    list[Candidate]
+        The best candidates, highest index of coincidence first.
+    """
+    require_numpy()
+    n_rotors = len(rotor_config)
+    total = 26**n_rotors
+    best = []
+    for start in range(0, total, BLOCK_SIZE):
+        index = np.arange(start, min(start + BLOCK_SIZE, total))
+        positions = np.stack([index // 26**r % 26 for r in range(n_rotors)], axis=1)
+        # Letter counts are accumulated column by column, in bounded memory
+        counts = np.zeros((len(positions), 26), dtype=np.int64)
+        for column in range(0, len(ciphertext), COLUMN_SIZE):
+            counts += letter_counts(
+                decrypt_positions(
+                    ciphertext[column : column + COLUMN_SIZE],
+                    [r_c.wiring for r_c in rotor_config],
+                    reflector_config.wiring,
+                    positions,
+                    plugboard_wirings,
+                    start=column,
+                )
+            )
+        scores = _coincidence(counts, len(ciphertext))
+        keep = np.argsort(scores)[::-1][:top_k]
+        best.extend(
+            Candidate(
+                score=float(scores[i]),
+                rotor_config=list(rotor_config),
+                rotor_offsets=[int(p) for p in positions[i]],
+                reflector_config=reflector_config,
+                plugboard_wirings=dict(plugboard_wirings or {}),
+            )
+            for i in keep
+        )
+        best = heapq.nlargest(top_k, best)
+    return best
+
+
+def _search_unit(args: tuple) -> list[Candidate]:
+    return search_unit(*args)
+
+
+def brute_force(
+    ciphertext: str,
+    rotor_set: list[RotorConfig],
+    n_rotors: int = 3,
+    reflectors: list[ReflectorConfig] = None,
+    plugboard_wirings: dict = None,
+    top_k: int = 10,
+    workers: int = None,
+) -> SearchReport:
+    """Ciphertext-only key search scored by index of coincidence.
+
+    Every rotor order drawn from ``rotor_set``, every combination of rotor
+    offsets and every reflector is tried. Each (rotor order, reflector)
+    pair is a unit of work for a process pool. The rotors step like an
+    odometer with all ring settings at 0, see ``scrambler_tables``.
+
+    Parameters
+    ----------
+    ciphertext : str
+        The ciphertext, in capital English letters.
+    rotor_set : list[RotorConfig]
+        Rotors to draw the rotor orders from, e.g. an entry of
+        ROTOR_CONFIGURATIONS.
+    n_rotors : int, optional
+        Number of rotors in the machine, by default 3.
+    reflectors : list[ReflectorConfig], optional
+        Reflectors to try, by default every entry of REFLECTOR_CONFIGURATIONS.
+    plugboard_wirings : dict, optional
+        Known plugboard wiring, by default None.
+    top_k : int, optional
+        Number of candidates to return, by default 10.
+    workers : int, optional
+        Number of worker processes, by default ``os.cpu_count()``. With a
+        single worker the search runs in this process.
+
+    Returns
+    -------
+    SearchReport
+        The best candidates, highest index of coincidence first, with the
+        number of candidates tested and the elapsed time.
+
+    Raises
+    ------
+    AssertionError
+        If any letter is not a capital English letter.
+    """
+    require_numpy()
+    assert ciphertext and is_capital_letters(
+        ciphertext
+    ), "Letter must be a capital english letter"
+    letters = np.frombuffer(ciphertext.encode("ascii"), dtype=np.uint8) - 65
+    reflectors = reflectors or list(REFLECTOR_CONFIGURATIONS.values())
+    units = [
+        (letters, list(order), reflector, plugboard_wirings, top_k)
+        for order in itertools.permutations(rotor_set, n_rotors)
+        for reflector in reflectors
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = map(_search_unit, units)
+        candidates = heapq.nlargest(top_k, itertools.chain.from_iterable(results))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_search_unit, units)
+            candidates = heapq.nlargest(top_k, itertools.chain.from_iterable(results))
+    return SearchReport(
+        candidates=candidates,
+        tested=len(units) * 26**n_rotors,
+        elapsed=time.perf_counter() - start,
+    )
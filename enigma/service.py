@@ -0,0 +1,493 @@
+"""Asyncio encryption service with named, persistent machine sessions.
+
+Requests are JSON lines. ``encrypt`` requests carry ``length`` raw ASCII
+letters after the line, and the response streams the encrypted letters back
+as frames (a decimal length line followed by that many bytes) terminated by
+an empty ``0`` frame. Every request ends with a JSON status line:
+``{"ok": true, ...}`` or ``{"ok": false, "error": "..."}``.
+
+Operations:
+
+- ``open``: create (or replace) a session. Fields: ``session``, ``rotors``
+  (name of a rotor set), ``rotor_order``, ``reflector``, ``offsets``,
+  ``rings``, ``plugboard`` (pairs ``"AB,CD"`` or a dictionary) and
+  ``stepping``.
+- ``encrypt``: encrypt ``length`` letters with a session.
+- ``seek``, ``reset``: move the rotors of a session.
+- ``stats``: throughput and latency of a session, or of all of them.
+- ``close``: drop a session.
+
+Run a service locally with ``python -m enigma.service --port 8765`` or
+``python -m enigma.service --unix /tmp/enigma.sock``.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from .cache import MACHINE_CACHE
+from .cli import parse_plugboard
+from .configurations import REFLECTOR_CONFIGURATIONS, ROTOR_CONFIGURATIONS
+from .machine import EnigmaMachine
+
+DEFAULT_PORT = 8765
+
+# Letters read, encrypted and written back per frame of a streamed request
+CHUNK_SIZE = 1 << 16
+
+# Frames at least this long are encrypted in the executor
+OFFLOAD_SIZE = 1 << 14
+
+# Number of recent request latencies kept per session for percentiles
+LATENCY_WINDOW = 1024
+
+
+@dataclass
+class SessionStats:
+    """Throughput and latency of the requests served by a session."""
+
+    requests: int = 0
+    letters: int = 0
+    busy: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    @property
+    def rate(self) -> float:
+        """Letters encrypted per second spent encrypting."""
+        return self.letters / self.busy if self.busy else 0.0
+
+    def record(self, letters: int, busy: float, latency: float):
+        """Account for one served request.
+
+        Parameters
+        ----------
+        letters : int
+            Number of letters encrypted.
+        busy : float
+            Seconds spent encrypting.
+        latency : float
+            Seconds from the request line to the end of the response.
+        """
+        self.requests += 1
+        self.letters += letters
+        self.busy += busy
+        self.latencies.append(latency)
+
+    def summary(self) -> dict:
+        """Counters, throughput and latency percentiles, in seconds."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return latencies[min(int(p * len(latencies)), len(latencies) - 1)]
+
+        return {
+            "requests": self.requests,
+            "letters": self.letters,
+            "letters_per_second": self.rate,
+            "latency": (
+                {
+                    "mean": sum(latencies) / len(latencies),
+                    "p50": percentile(0.5),
+                    "p99": percentile(0.99),
+                    "max": latencies[-1],
+                }
+                if latencies
+                else None
+            ),
+        }
+
+
+class Session:
+    """A named machine whose rotor state persists across requests."""
+
+    def __init__(self, name: str, machine: EnigmaMachine):
+        self.name = name
+        self.machine = machine
+        # Requests of a session are served one at a time, in arrival order
+        self.lock = asyncio.Lock()
+        self.stats = SessionStats()
+
+    def __str__(self):
+        return f"Session instance {self.name} at position {self.machine.tell()}"
+
+
+class EncryptionService:
+    """Pool of named sessions served over asyncio streams."""
+
+    def __init__(
+        self,
+        max_sessions: int = 1024,
+        chunk_size: int = CHUNK_SIZE,
+        offload_size: int = OFFLOAD_SIZE,
+        executor=None,
+    ):
+        """Initialize the service.
+
+        Parameters
+        ----------
+        max_sessions : int, optional
+            Maximum number of sessions kept. Opening more evicts the least
+            recently used one, by default 1024.
+        chunk_size : int, optional
+            Letters per frame of a streamed request, by default 65536.
+        offload_size : int, optional
+            Frames at least this long are encrypted in the executor so the
+            event loop keeps serving other connections, by default 16384.
+        executor : concurrent.futures.Executor, optional
+            Executor for large frames, by default the loop's thread pool.
+        """
+        self.max_sessions = max_sessions
+        self.chunk_size = chunk_size
+        self.offload_size = offload_size
+        self.executor = executor
+        self.sessions = OrderedDict()
+        self._handlers = {
+            "open": self._open,
+            "encrypt": self._encrypt,
+            "seek": self._seek,
+            "reset": self._reset,
+            "stats": self._stats,
+            "close": self._close,
+        }
+
+    def __str__(self):
+        return f"EncryptionService instance with {len(self.sessions)} sessions"
+
+    def session(self, name: str) -> Session:
+        """Return a session, marking it as recently used.
+
+        Raises
+        ------
+        KeyError
+            If there is no session with this name.
+        """
+        if name not in self.sessions:
+            raise KeyError(f"Unknown session: {name}")
+        self.sessions.move_to_end(name)
+        return self.sessions[name]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one connection until it is closed."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    handler = self._handlers[request["op"]]
+                    if handler == self._encrypt and not (
+                        isinstance(request.get("length"), int)
+                        and request["length"] >= 0
+                    ):
+                        raise ValueError(
+                            "encrypt requests must give the payload length"
+                        )
+                except (ValueError, KeyError, TypeError) as error:
+                    # The framing of the stream is lost: answer and hang up
+                    await _respond(
+                        writer, {"ok": False, "error": f"Bad request: {error}"}
+                    )
+                    break
+                try:
+                    response = {"ok": True, **await handler(request, reader, writer)}
+                except (
+                    AssertionError,
+                    KeyError,
+                    ValueError,
+                    TypeError,
+                    IndexError,
+                    argparse.ArgumentTypeError,
+                ) as error:
+                    response = {"ok": False, "error": str(error)}
+                await _respond(writer, response)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _open(self, request: dict, reader, writer) -> dict:
+        rotor_set = ROTOR_CONFIGURATIONS[request["rotors"]]
+        order = request.get("rotor_order") or range(len(rotor_set))
+        rotor_config = [rotor_set[i] for i in order]
+        plugboard = request.get("plugboard") or {}
+        if isinstance(plugboard, str):
+            plugboard = parse_plugboard(plugboard)
+        machine = MACHINE_CACHE.from_configuration(
+            rotor_config=rotor_config,
+            rotor_offsets=request.get("offsets") or [0] * len(rotor_config),
+            reflector_config=REFLECTOR_CONFIGURATIONS[request["reflector"]],
+            plugboard_wirings=plugboard,
+            stepping=request.get("stepping", "odometer"),
+            ring_settings=request.get("rings"),
+        )
+        name = str(request["session"])
+        self.sessions[name] = Session(name, machine)
+        self.sessions.move_to_end(name)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        return {"session": name, "position": machine.tell()}
+
+    async def _encrypt(self, request: dict, reader, writer) -> dict:
+        received = perf_counter()
+        length = request["length"]
+        try:
+            session = self.session(request.get("session"))
+        except KeyError:
+            await _discard(reader, length)
+            writer.write(b"0\n")
+            raise
+
+        async with session.lock:
+            machine = session.machine
+            state = machine.snapshot()
+            busy, error = 0.0, None
+            remaining = length
+            while remaining:
+                chunk = await reader.readexactly(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                if error is not None:
+                    continue
+                start = perf_counter()
+                try:
+                    if len(chunk) >= self.offload_size:
+                        loop = asyncio.get_running_loop()
+                        encrypted = await loop.run_in_executor(
+                            self.executor, machine.encrypt_bytes, chunk
+                        )
+                    else:
+                        encrypted = machine.encrypt_bytes(chunk)
+                except AssertionError as exception:
+                    # Keep reading the payload, but leave the session as it was
+                    error = exception
+                    machine.restore(state)
+                    continue
+                busy += perf_counter() - start
+                writer.write(b"%d\n" % len(encrypted))
+                writer.write(encrypted)
+                await writer.drain()
+            writer.write(b"0\n")
+            if error is not None:
+                raise error
+            session.stats.record(length, busy, perf_counter() - received)
+            return {"position": machine.tell(), "letters": length}
+
+    async def _seek(self, request: dict, reader, writer) -> dict:
+        session = self.session(request.get("session"))
+        async with session.lock:
+            session.machine.seek(int(request["position"]))
+            return {"position": session.machine.tell()}
+
+    async def _reset(self, request: dict, reader, writer) -> dict:
+        session = self.session(request.get("session"))
+        async with session.lock:
+            session.machine.reset()
+            return {"position": session.machine.tell()}
+
+    async def _stats(self, request: dict, reader, writer) -> dict:
+        if request.get("session") is not None:
+            return {"stats": self.session(request["session"]).stats.summary()}
+        return {
+            "stats": {
+                name: session.stats.summary() for name, session in self.sessions.items()
+            }
+        }
+
+    async def _close(self, request: dict, reader, writer) -> dict:
+        session = self.session(request.get("session"))
+        del self.sessions[session.name]
+        return {"session": session.name}
+
+
+async def _respond(writer: asyncio.StreamWriter, response: dict):
+    writer.write(json.dumps(response).encode("ascii") + b"\n")
+    await writer.drain()
+
+
+async def _discard(reader: asyncio.StreamReader, length: int):
+    """Read and drop a payload, one chunk at a time."""
+    while length:
+        length -= len(await reader.readexactly(min(CHUNK_SIZE, length)))
+
+
+async def serve(
+    service: EncryptionService = None,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    path: str = None,
+    backlog: int = 4096,
+) -> asyncio.AbstractServer:
+    """Start serving over TCP, or over a Unix socket if a path is given.
+
+    Parameters
+    ----------
+    service : EncryptionService, optional
+        The service, by default a new one with default settings.
+    host : str, optional
+        TCP host, by default "127.0.0.1".
+    port : int, optional
+        TCP port, by default 8765. Use 0 to pick a free port.
+    path : str, optional
+        Path of a Unix socket, by default None (TCP).
+    backlog : int, optional
+        Maximum number of pending connections, by default 4096.
+
+    Returns
+    -------
+    asyncio.AbstractServer
+        The started server.
+    """
+    service = service or EncryptionService()
+    if path is not None:
+        return await asyncio.start_unix_server(
+            service.handle, path=path, backlog=backlog
+        )
+    return await asyncio.start_server(service.handle, host, port, backlog=backlog)
+
+
+class EncryptionClient:
+    """Client of an EncryptionService connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        """Connect to a service over TCP."""
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path: str):
+        """Connect to a service over a Unix socket."""
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def request(self, op: str, **fields) -> dict:
+        """Send a request without payload and return its status.
+
+        Raises
+        ------
+        AssertionError
+            If the service reports an error.
+        """
+        self.writer.write(json.dumps({"op": op, **fields}).encode("ascii") + b"\n")
+        await self.writer.drain()
+        return await self._status()
+
+    async def open(self, session: str, rotors: str, reflector: str, **settings) -> dict:
+        """Open a session, see the module documentation for the settings."""
+        return await self.request(
+            "open", session=session, rotors=rotors, reflector=reflector, **settings
+        )
+
+    async def encrypt(self, session: str, letters, chunk_size: int = CHUNK_SIZE):
+        """Encrypt letters with a session.
+
+        The payload is sent while the response is read, so that neither side
+        blocks on a full socket buffer.
+
+        Parameters
+        ----------
+        session : str
+            Name of the session.
+        letters : str or bytes-like
+            The letters to encrypt.
+        chunk_size : int, optional
+            Bytes written per drain of the connection, by default 65536.
+
+        Returns
+        -------
+        str or bytes
+            The encrypted letters, of the same type as the input.
+
+        Raises
+        ------
+        AssertionError
+            If the service reports an error, e.g. an invalid letter. The
+            session is then left in its state before the request.
+        """
+        data = letters.encode("ascii") if isinstance(letters, str) else bytes(letters)
+        header = {"op": "encrypt", "session": session, "length": len(data)}
+        self.writer.write(json.dumps(header).encode("ascii") + b"\n")
+
+        async def send():
+            for start in range(0, len(data), chunk_size):
+                self.writer.write(data[start : start + chunk_size])
+                await self.writer.drain()
+
+        sending = asyncio.create_task(send())
+        frames = []
+        try:
+            while True:
+                size = int(await self.reader.readline())
+                if not size:
+                    break
+                frames.append(await self.reader.readexactly(size))
+        finally:
+            await sending
+        await self._status()
+        encrypted = b"".join(frames)
+        return encrypted.decode("ascii") if isinstance(letters, str) else encrypted
+
+    async def _status(self) -> dict:
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("The service closed the connection")
+        response = json.loads(line)
+        assert response.pop("ok"), response["error"]
+        return response
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="enigmachine-service", description="Serve Enigma machine sessions."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Serve over this Unix socket instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    async def run_forever():
+        service = EncryptionService(max_sessions=args.max_sessions)
+        server = await serve(service, args.host, args.port, args.unix)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run_forever())
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        print(f"enigmachine-service: error: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run():
+    sys.exit(main())
+
+
+if __name__ == "__main__":
+    run()
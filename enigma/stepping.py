@@ -0,0 +1,173 @@
+from array import array
+from functools import lru_cache
+
+from .object import PAWLS, notch_step
+from .vectorized import np, require_numpy
+
+__all__ = ["SteppingTable", "stepping_table"]
+
+
+class SteppingTable:
+    """Rotor positions of a notched mechanism, precomputed over a full period.
+
+    The positions of the driven rotors are iterated from a starting state
+    until one repeats. The sequence is stored as one base-26 code per
+    keypress: a transient (the double step can leave states that are never
+    reached again) followed by a cycle, at most 26**3 keypresses long for
+    three driven rotors. The offsets at any keypress are then a lookup.
+    """
+
+    def __init__(
+        self,
+        offsets: list[int],
+        notches: list[str],
+        clicks: int = 0,
+        pawls: int = PAWLS,
+    ):
+        """Iterate the stepping sequence.
+
+        Parameters
+        ----------
+        offsets : list[int]
+            The rotor offsets of the starting state, fastest rotor first.
+        notches : list[str]
+            The notch letters of every rotor.
+        clicks : int, optional
+            The click counter of the starting state, by default 0.
+        pawls : int, optional
+            Number of rotors driven by a pawl, by default 3.
+
+        Raises
+        ------
+        AssertionError
+            If there isn't one notch string per rotor.
+        """
+        assert len(notches) == len(offsets), "Notches must be given for every rotor"
+        self.clicks = clicks
+        self.driven = min(len(offsets), pawls)
+        self.fixed = list(offsets[self.driven :])
+        self.n_rotors = len(offsets)
+
+        seen = {}
+        self.codes = array("I")
+        state = list(offsets[: self.driven])
+        code = _encode(state)
+        while code not in seen:
+            seen[code] = len(self.codes)
+            self.codes.append(code)
+            state = notch_step(state, notches[: self.driven], pawls)
+            code = _encode(state)
+        self.transient = seen[code]
+        self.period = len(self.codes) - self.transient
+
+        # Number of keypresses, from every entry, before the slow rotors move
+        self.run_lengths = array("I", [1]) * len(self.codes)
+        for k in range(len(self.codes) - 2, -1, -1):
+            if self.codes[k] // 26 == self.codes[k + 1] // 26:
+                self.run_lengths[k] = self.run_lengths[k + 1] + 1
+
+    def __str__(self):
+        return (
+            f"SteppingTable instance with {self.driven} driven rotors, transient "
+            f"{self.transient} and period {self.period}"
+        )
+
+    def _index(self, keypresses: int) -> int:
+        """Entry of the table after a number of keypresses from the start."""
+        assert keypresses >= 0, "Stream position must be after the table start"
+        if keypresses < len(self.codes):
+            return keypresses
+        return self.transient + (keypresses - self.transient) % self.period
+
+    def offsets(self, clicks: int) -> list[int]:
+        """Rotor offsets once the click counter reaches a value.
+
+        Parameters
+        ----------
+        clicks : int
+            The click counter, not before the starting state.
+
+        Returns
+        -------
+        list[int]
+            The rotor offsets, fastest rotor first.
+        """
+        return (
+            _decode(self.codes[self._index(clicks - self.clicks)], self.driven)
+            + self.fixed
+        )
+
+    def runs(self, clicks: int, length: int):
+        """Rotor positions of consecutive letters, grouped by slow rotors.
+
+        The rotors step before each letter, so the letter typed at click
+        counter ``clicks`` is encrypted at the offsets of ``clicks + 1``.
+
+        Parameters
+        ----------
+        clicks : int
+            The click counter before the first letter.
+        length : int
+            The number of letters.
+
+        Yields
+        ------
+        tuple
+            ``(slow_offsets, fast_offset, run)``: ``run`` letters, at most
+            26, are encrypted with the slow rotors at ``slow_offsets`` while
+            the fastest rotor advances by one per letter from ``fast_offset``.
+        """
+        keypresses = clicks + 1 - self.clicks
+        while length > 0:
+            index = self._index(keypresses)
+            run = min(self.run_lengths[index], length, 26)
+            offsets = _decode(self.codes[index], self.driven) + self.fixed
+            yield tuple(offsets[1:]), offsets[0] if offsets else 0, run
+            keypresses += run
+            length -= run
+
+    def offsets_array(self, clicks: int, length: int) -> "np.ndarray":
+        """Rotor offsets for a whole message at once.
+
+        Parameters
+        ----------
+        clicks : int
+            The click counter before the first letter.
+        length : int
+            The number of letters.
+
+        Returns
+        -------
+        np.ndarray
+            Array of shape (rotors, length) with the offset of every rotor
+            while each letter is encrypted.
+        """
+        require_numpy()
+        keypresses = np.arange(length, dtype=np.int64) + (clicks + 1 - self.clicks)
+        wrapped = keypresses >= len(self.codes)
+        keypresses[wrapped] = (
+            self.transient + (keypresses[wrapped] - self.transient) % self.period
+        )
+        codes = np.frombuffer(self.codes, dtype=np.uint32)[keypresses]
+        result = np.empty((self.n_rotors, length), dtype=np.uint8)
+        for i in range(self.driven):
+            result[i] = codes // 26**i % 26
+        for i, offset in enumerate(self.fixed, start=self.driven):
+            result[i] = offset
+        return result
+
+
+def _encode(offsets: list[int]) -> int:
+    return sum(offset * 26**i for i, offset in enumerate(offsets))
+
+
+def _decode(code: int, length: int) -> list[int]:
+    return [code // 26**i % 26 for i in range(length)]
+
+
+@lru_cache(maxsize=256)
+def stepping_table(
+    offsets: tuple, notches: tuple, clicks: int = 0, pawls: int = PAWLS
+) -> SteppingTable:
+    """Stepping table of a starting state, shared by the machines using it."""
+    return SteppingTable(list(offsets), list(notches), clicks, pawls)
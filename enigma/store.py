@@ -0,0 +1,224 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+from .compiled import CompiledEnigma, advance_offsets
+from .vectorized import CHUNK_SIZE, np, require_numpy, rotor_offsets_array
+
+__all__ = ["default_cache_dir", "TableStore", "TABLE_STORE"]
+
+# Version of the file layout, part of every table name
+STORE_VERSION = 2
+
+# Rotor positions computed together while building a table
+BLOCK_SIZE = 1 << 14
+
+
+def default_cache_dir() -> str:
+    """Directory of the shared tables.
+
+    ``$ENIGMA_CACHE_DIR`` if set, else ``enigmachine`` in ``$XDG_CACHE_HOME``
+    or ``~/.cache``.
+    """
+    if os.environ.get("ENIGMA_CACHE_DIR"):
+        return os.environ["ENIGMA_CACHE_DIR"]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "enigmachine")
+
+
+class TableStore:
+    """On-disk store of full-period scrambler tables, memory-mapped read-only.
+
+    The table of a set of rotors (wirings, ring settings and signal path)
+    and a reflector holds the
+    permutation of the rotors and reflector at every rotor position, one row
+    of 26 uint8 per position: 26**3 rows (457 KB) for three rotors. Row
+    ``sum(offset[i] * 26**i)`` is the permutation at those offsets, so a
+    single table serves every starting position and stepping model, and the
+    plugboard is applied around it.
+
+    A table is built once, written atomically to the store directory and
+    then mapped read-only, so every process using the store shares one copy
+    in the page cache.
+    """
+
+    def __init__(self, directory: str = None, max_size: int = 1 << 26):
+        """Initialize the store.
+
+        Parameters
+        ----------
+        directory : str, optional
+            Directory of the tables, created when the first table is built.
+            By default ``default_cache_dir()``.
+        max_size : int, optional
+            Largest table built, in bytes, by default 64 MiB (four rotors
+            take 11.9 MB, five 309 MB).
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_size = max_size
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return (
+            f"TableStore instance in {self.directory} "
+            f"with {len(self._tables)} mapped tables"
+        )
+
+    def __getstate__(self):
+        # Mappings and locks are per process: workers map the files again
+        return {"directory": self.directory, "max_size": self.max_size}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def key(self, engine: CompiledEnigma) -> str:
+        """Name of the table of the rotors and reflector of an engine."""
+        n_rotors = len(engine.forward_offset_tables)
+        digest = hashlib.sha256(bytes([STORE_VERSION, n_rotors]))
+        for tables in engine.forward_offset_tables:
+            for permutation in tables:
+                digest.update(bytes(permutation))
+        digest.update(bytes(engine.reflector_table))
+        return f"scrambler-{n_rotors}-{digest.hexdigest()[:32]}.npy"
+
+    def table(self, rotor_wirings: list[str], reflector_wiring: str) -> "np.ndarray":
+        """Return the mapped table of rotor wirings and a reflector.
+
+        The table is built and saved first if the store doesn't have it.
+
+        Parameters
+        ----------
+        rotor_wirings : list[str]
+            List of rotor wirings, fastest rotor first.
+        reflector_wiring : str
+            Reflector wiring.
+
+        Returns
+        -------
+        np.ndarray
+            Read-only uint8 array of shape (26**rotors, 26).
+
+        Raises
+        ------
+        AssertionError
+            If any wiring is invalid or the table would exceed ``max_size``.
+        """
+        return self._table(CompiledEnigma(rotor_wirings, reflector_wiring))
+
+    def _table(self, engine: CompiledEnigma) -> "np.ndarray":
+        require_numpy()
+        name = self.key(engine)
+        with self._lock:
+            table = self._tables.get(name)
+        if table is not None:
+            return table
+
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            self._build(path, engine)
+        table = np.load(path, mmap_mode="r")
+        n_rotors = len(engine.forward_offset_tables)
+        assert table.shape == (26**n_rotors, 26), f"Corrupted table {path}"
+        with self._lock:
+            return self._tables.setdefault(name, table)
+
+    def _build(self, path: str, engine: CompiledEnigma):
+        """Compute a table into a temporary file and move it into place."""
+        n_rotors = len(engine.forward_offset_tables)
+        rows = 26**n_rotors
+        assert rows * 26 <= self.max_size, "Table exceeds the maximum size of the store"
+        os.makedirs(self.directory, exist_ok=True)
+        forward = np.array(engine.forward_offset_tables, dtype=np.uint8).reshape(
+            -1, 26, 26
+        )
+        inverse = np.array(engine.inverse_offset_tables, dtype=np.uint8).reshape(
+            -1, 26, 26
+        )
+        reflector = np.array(engine.reflector_table, dtype=np.uint8)
+
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            table = np.lib.format.open_memmap(
+                temporary, mode="w+", dtype=np.uint8, shape=(rows, 26)
+            )
+            for start in range(0, rows, BLOCK_SIZE):
+                index = np.arange(start, min(start + BLOCK_SIZE, rows))
+                positions = [(index // 26**r % 26)[:, None] for r in range(n_rotors)]
+                x = np.broadcast_to(np.arange(26, dtype=np.uint8), (len(index), 26))
+                for tables, offset in zip(forward, positions):
+                    x = tables[offset, x]
+                x = reflector[x]
+                for tables, offset in zip(inverse[::-1], positions[::-1]):
+                    x = tables[offset, x]
+                table[start : start + len(index)] = x
+            table.flush()
+            del table
+            # Concurrent builders race harmlessly: the replace is atomic
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def clear(self):
+        """Forget the mapped tables and delete the files of the store."""
+        with self._lock:
+            self._tables.clear()
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.startswith("scrambler-") and name.endswith(".npy"):
+                os.unlink(os.path.join(self.directory, name))
+
+    def encrypt_array(
+        self,
+        engine: CompiledEnigma,
+        letters: "np.ndarray",
+        offsets: list[int],
+        clicks: int = 0,
+        stepping=None,
+    ) -> "np.ndarray":
+        """Encrypt an array of ASCII capital letters with the stored table.
+
+        Same arguments and result as ``vectorized.encrypt_array``: the rows
+        of the table are gathered at the rotor positions of the letters, and
+        the plugboard is applied before and after.
+
+        Raises
+        ------
+        AssertionError
+            If any letter is not a capital English letter.
+        """
+        require_numpy()
+        letters = np.asarray(letters, dtype=np.uint8).ravel()
+        assert np.all(
+            (letters >= 65) & (letters <= 90)
+        ), "Letter must be a capital english letter"
+        table = self._table(engine)
+        plugboard = np.array(engine.plugboard_table, dtype=np.uint8)
+        weights = 26 ** np.arange(len(engine.forward_offset_tables), dtype=np.int64)
+
+        encrypted = np.empty_like(letters)
+        for start in range(0, len(letters), CHUNK_SIZE):
+            chunk = letters[start : start + CHUNK_SIZE]
+            if stepping is None:
+                rotor_offsets = rotor_offsets_array(
+                    advance_offsets(offsets, clicks, start), clicks + start, len(chunk)
+                )
+            else:
+                rotor_offsets = stepping.offsets_array(clicks + start, len(chunk))
+            rows = weights @ rotor_offsets.astype(np.int64).reshape(
+                len(weights), len(chunk)
+            )
+            encrypted[start : start + len(chunk)] = (
+                plugboard[table[rows, plugboard[chunk - 65]]] + 65
+            )
+        return encrypted
+
+
+# Process-wide store in the default cache directory
+TABLE_STORE = TableStore()
@@ -0,0 +1,148 @@
+import json
+from collections import defaultdict, deque
+
+from .object import MachineObject, PlugBoard, Reflector, Rotor, RotorMechanism
+
+__all__ = ["component_name", "Tracer", "PrintTracer", "RecordingTracer"]
+
+
+def component_name(component: MachineObject) -> str:
+    """Readable name of a component, used in trace records."""
+    if isinstance(component, Rotor):
+        return f"Rotor {component.name if component.name is not None else ''}".strip()
+    if isinstance(component, Reflector):
+        return (
+            f"Reflector {component.name if component.name is not None else ''}".strip()
+        )
+    if isinstance(component, PlugBoard):
+        return "PlugBoard"
+    return type(component).__name__
+
+
+class Tracer:
+    """Base class of the tracers that can be attached to a Machine.
+
+    Every method is a no-op, subclasses override the events they need.
+    """
+
+    def component(
+        self, component: MachineObject, letter: str, encrypted: str, elapsed: float
+    ):
+        """A component (or a single rotor) encrypted a letter."""
+
+    def step(self, rotor_mechanism: RotorMechanism):
+        """A rotor mechanism clicked."""
+
+    def letter(self, letter: str, encrypted: str):
+        """The machine encrypted a letter."""
+
+    def call(self, machine, letters: int, elapsed: float):
+        """An encrypt call of the machine finished."""
+
+
+class PrintTracer(Tracer):
+    """Tracer printing every step, as the verbose mode does."""
+
+    def component(self, component, letter, encrypted, elapsed):
+        if isinstance(component, Rotor):
+            name = component.name if component.name is not None else ""
+            print(
+                f"Encrypting {letter} to {encrypted} with rotor {name} "
+                f"at offset {component.offset}"
+            )
+        elif isinstance(component, Reflector):
+            print(f"Encrypting {letter} to {encrypted} with reflector")
+        elif isinstance(component, PlugBoard):
+            print(f"Encrypting {letter} to {encrypted} with plugboard")
+        else:
+            print(
+                f"Encrypting {letter} to {encrypted} with {component_name(component)}"
+            )
+
+
+class RecordingTracer(Tracer):
+    """Tracer keeping structured records and counters of the encryption."""
+
+    def __init__(self, record_components: bool = True, max_records: int = None):
+        """Initialize the tracer.
+
+        Parameters
+        ----------
+        record_components : bool, optional
+            If False, only steps and calls are recorded, component events
+            only update the counters, by default True.
+        max_records : int, optional
+            Maximum number of records kept, the oldest are dropped,
+            by default unlimited.
+        """
+        self.record_components = record_components
+        self.records = deque(maxlen=max_records)
+        self.letters = 0
+        self.calls = 0
+        self.steps = 0
+        self.counts = defaultdict(int)
+        self.timings = defaultdict(float)
+
+    def __str__(self):
+        return f"RecordingTracer instance with {len(self.records)} records"
+
+    def component(self, component, letter, encrypted, elapsed):
+        name = component_name(component)
+        self.counts[name] += 1
+        self.timings[name] += elapsed
+        if self.record_components:
+            self.records.append(
+                {
+                    "event": "component",
+                    "index": self.letters,
+                    "component": name,
+                    "offset": getattr(component, "offset", None),
+                    "input": letter,
+                    "output": encrypted,
+                }
+            )
+
+    def step(self, rotor_mechanism):
+        self.steps += 1
+        self.records.append(
+            {
+                "event": "step",
+                "index": self.letters,
+                "clicks": rotor_mechanism.clicks,
+                "offsets": [rotor.offset for rotor in rotor_mechanism.rotors],
+            }
+        )
+
+    def letter(self, letter, encrypted):
+        self.letters += 1
+
+    def call(self, machine, letters, elapsed):
+        self.calls += 1
+        self.records.append({"event": "call", "letters": letters, "elapsed": elapsed})
+
+    def summary(self) -> dict:
+        """Counters of the traced encryptions.
+
+        Returns
+        -------
+        dict
+            Number of letters, calls and steps, and for every component the
+            number of letters it encrypted and the time it took.
+        """
+        return {
+            "letters": self.letters,
+            "calls": self.calls,
+            "steps": self.steps,
+            "components": {
+                name: {"letters": self.counts[name], "elapsed": self.timings[name]}
+                for name in self.counts
+            },
+        }
+
+    def export(self) -> dict:
+        """Summary and records as JSON-serializable data."""
+        return {"summary": self.summary(), "records": list(self.records)}
+
+    def to_json(self, fh):
+        """Write the summary and records as JSON to a text file object."""
+        json.dump(self.export(), fh)
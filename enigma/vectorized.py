@@ -0,0 +1,211 @@
+import importlib.util
+import sys
+from functools import lru_cache
+
+from .compiled import CompiledEnigma, advance_offsets
+
+__all__ = ["require_numpy", "rotor_offsets_array", "encrypt_array", "scrambler_tables"]
+
+
+def _lazy_import(name: str):
+    """Import a module on first attribute access, None if it isn't installed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:  # pragma: no cover
+        return None
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# NumPy is optional and only loaded once a vectorized path runs
+np = _lazy_import("numpy")
+
+# Number of letters processed per vectorized pass, bounds temporary memory
+CHUNK_SIZE = 1 << 20
+
+
+def require_numpy():
+    """Raise an ImportError if NumPy is not installed."""
+    if np is None:
+        raise ImportError(
+            "NumPy is required for vectorized encryption: "
+            "pip install enigmachine[numpy]"
+        )
+
+
+def rotor_offsets_array(offsets: list[int], clicks: int, length: int) -> "np.ndarray":
+    """Compute the rotor offsets for a whole message at once.
+
+    Parameters
+    ----------
+    offsets : list[int]
+        The rotor offsets before the first letter, fastest rotor first.
+    clicks : int
+        The click counter of the rotor mechanism before the first letter.
+    length : int
+        The number of letters.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (rotors, length) with the offset of every rotor
+        while each letter is encrypted.
+    """
+    require_numpy()
+    # Rotor i has moved by positions // 26**i: carry the quotient from one
+    # rotor to the next, as 26**i overflows int64 from 14 rotors up
+    quotients = np.arange(clicks, clicks + length, dtype=np.int64)
+    result = np.empty((len(offsets), length), dtype=np.uint8)
+    for i, offset in enumerate(offsets):
+        result[i] = (offset - clicks + quotients) % 26
+        quotients //= 26
+        clicks //= 26
+    return result
+
+
+def encrypt_array(
+    engine: CompiledEnigma,
+    letters: "np.ndarray",
+    offsets: list[int],
+    clicks: int = 0,
+    stepping=None,
+    out: "np.ndarray" = None,
+) -> "np.ndarray":
+    """Encrypt an array of ASCII capital letters with fancy-indexing gathers.
+
+    Parameters
+    ----------
+    engine : CompiledEnigma
+        The compiled tables of the machine.
+    letters : np.ndarray
+        uint8 array with the ASCII codes of the letters to encrypt.
+    offsets : list[int]
+        The rotor offsets before the first letter, fastest rotor first.
+    clicks : int, optional
+        The click counter of the rotor mechanism, by default 0.
+    stepping : SteppingTable, optional
+        Stepping table of a notched mechanism, by default None (the rotors
+        step like an odometer).
+    out : np.ndarray, optional
+        One-dimensional uint8 array of the length of ``letters`` receiving
+        the encrypted letters, possibly ``letters`` itself. By default a new
+        array.
+
+    Returns
+    -------
+    np.ndarray
+        uint8 array with the ASCII codes of the encrypted letters.
+
+    Raises
+    ------
+    AssertionError
+        If any letter is not a capital English letter, or ``out`` doesn't
+        fit the letters. Nothing is written in that case.
+    """
+    require_numpy()
+    letters = np.asarray(letters, dtype=np.uint8).ravel()
+    assert np.all(
+        (letters >= 65) & (letters <= 90)
+    ), "Letter must be a capital english letter"
+    if out is None:
+        out = np.empty_like(letters)
+    assert (
+        out.dtype == np.uint8 and out.shape == letters.shape and out.flags.writeable
+    ), "Output must be a writable uint8 array of the length of the letters"
+
+    # Permutation of every rotor at every offset, entry ``offset * 26 + letter``
+    forward = np.array(engine.forward_offset_tables, dtype=np.uint8).reshape(-1, 676)
+    inverse = np.array(engine.inverse_offset_tables, dtype=np.uint8).reshape(-1, 676)
+    reflector = np.array(engine.reflector_table, dtype=np.uint8)
+    plugboard = np.array(engine.plugboard_table, dtype=np.uint8)
+
+    for start in range(0, len(letters), CHUNK_SIZE):
+        chunk = letters[start : start + CHUNK_SIZE]
+        if stepping is None:
+            rotor_offsets = rotor_offsets_array(
+                advance_offsets(offsets, clicks, start), clicks + start, len(chunk)
+            )
+        else:
+            rotor_offsets = stepping.offsets_array(clicks + start, len(chunk))
+        rows = rotor_offsets.astype(np.intp) * 26
+        x = plugboard[chunk - 65]
+        for table, row in zip(forward, rows):
+            x = table[row + x]
+        x = reflector[x]
+        for table, row in zip(inverse[::-1], rows[::-1]):
+            x = table[row + x]
+        np.add(plugboard[x], 65, out=out[start : start + len(chunk)])
+    return out
+
+
+@lru_cache(maxsize=64)
+def _wiring_tables(rotor_wirings: tuple, reflector_wiring: str) -> tuple:
+    """Forward, inverse and reflector index tables of a set of wirings."""
+    forward = [
+        np.frombuffer(w.encode("ascii"), dtype=np.uint8) - 65 for w in rotor_wirings
+    ]
+    inverse = [np.argsort(table).astype(np.uint8) for table in forward]
+    reflector = np.frombuffer(reflector_wiring.encode("ascii"), dtype=np.uint8) - 65
+    return forward, inverse, reflector
+
+
+def scrambler_tables(
+    rotor_wirings: list[str],
+    reflector_wiring: str,
+    positions: "np.ndarray",
+    steps: "np.ndarray",
+    letters: "np.ndarray" = None,
+) -> "np.ndarray":
+    """Permutation of the rotors and reflector, without plugboard.
+
+    The rotors step like an odometer with all ring settings at 0, the
+    model of ``EnigmaMachine`` by default: the key searches built on these
+    tables don't cover the notch model or ring settings.
+
+    Parameters
+    ----------
+    rotor_wirings : list[str]
+        List of rotor wirings, fastest rotor first.
+    reflector_wiring : str
+        Reflector wiring.
+    positions : np.ndarray
+        Integer array of shape (rows, rotors) with starting rotor offsets.
+    steps : np.ndarray
+        Integer array with the stream positions, counted from the starting
+        rotor offsets, where the permutation is needed.
+    letters : np.ndarray, optional
+        Integer array with one letter index (0 to 25) per step. Only these
+        letters go through the scrambler, by default the whole alphabet.
+
+    Returns
+    -------
+    np.ndarray
+        uint8 array of shape (rows, len(steps), 26) with the letter index
+        each letter index is encrypted to, or of shape (rows, len(steps))
+        with the encrypted ``letters``.
+    """
+    require_numpy()
+    forward, inverse, reflector = _wiring_tables(tuple(rotor_wirings), reflector_wiring)
+
+    quotients = np.array(steps, dtype=np.int64)
+    offsets = []
+    for r in range(len(rotor_wirings)):
+        offsets.append(((positions[:, [r]] + quotients) % 26).astype(np.uint8))
+        quotients //= 26
+    if letters is None:
+        offsets = [offset[:, :, None] for offset in offsets]
+        letters = np.arange(26, dtype=np.uint8)
+        shape = (len(positions), len(steps), 26)
+    else:
+        shape = (len(positions), len(steps))
+    x = np.broadcast_to(np.asarray(letters, dtype=np.uint8), shape)
+    for table, offset in zip(forward, offsets):
+        x = table[(x + offset) % 26]
+    x = reflector[x]
+    for table, offset in zip(reversed(inverse), reversed(offsets)):
+        x = (table[x] + 26 - offset) % 26
+    return x
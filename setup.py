@@ -8,9 +8,21 @@ setup(
     name="enigmachine",
     version="1.0",
     packages=find_packages(),
+    package_data={"enigma": ["data/*.txt"]},
     install_requires=[
         "tabulate",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+    },
+    entry_points={
+        "console_scripts": [
+            "enigmachine=enigma.cli:run",
+            "enigmachine-service=enigma.service:run",
+            "enigmachine-search=enigma.keyspace:run",
+            "enigmachine-jobs=enigma.jobs:run",
+        ],
+    },
     description="Engima chiper machine",
     author="Fernando Cortés",
     author_email="fcsancho14@gmail.com",
@@ -0,0 +1,57 @@
+import random
+
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaKey,
+    EnigmaMachine,
+    encrypt_batch,
+)
+
+
+def random_pair(rng: random.Random):
+    rotor_set = rng.choice(list(ROTOR_CONFIGURATIONS.values()))
+    rotor_config = rng.sample(rotor_set, min(3, len(rotor_set)))
+    settings = dict(
+        rotor_config=rotor_config,
+        rotor_offsets=[rng.randrange(26) for _ in rotor_config],
+        reflector_config=rng.choice(list(REFLECTOR_CONFIGURATIONS.values())),
+        plugboard_wirings={"A": rng.choice(LETTERS), "K": "L", "L": "K"},
+    )
+    message = "".join(rng.choice(LETTERS) for _ in range(rng.randrange(0, 800)))
+    return settings, message
+
+
+def test_encrypt_batch_matches_machines():
+    rng = random.Random(0)
+    pairs = [random_pair(rng) for _ in range(60)]
+    messages = [m if i % 2 else m.encode() for i, (_, m) in enumerate(pairs)]
+
+    encrypted = encrypt_batch(
+        [(EnigmaKey.from_configuration(**s), m) for (s, _), m in zip(pairs, messages)],
+        batch_size=16,
+    )
+
+    for (settings, message), result, original in zip(pairs, encrypted, messages):
+        expected = EnigmaMachine.from_configuration(**settings).encrypt(message)
+        assert result == (expected if isinstance(original, str) else expected.encode())
+
+
+def test_encrypt_batch_matches_notch_machines_with_rings():
+    rng = random.Random(1)
+    pairs = []
+    for _ in range(40):
+        settings, message = random_pair(rng)
+        settings["stepping"] = rng.choice(["odometer", "notch"])
+        settings["ring_settings"] = [
+            rng.randrange(26) for _ in settings["rotor_config"]
+        ]
+        pairs.append((settings, message))
+
+    encrypted = encrypt_batch(
+        [(EnigmaKey.from_configuration(**s), m) for s, m in pairs], batch_size=16
+    )
+
+    for (settings, message), result in zip(pairs, encrypted):
+        assert result == EnigmaMachine.from_configuration(**settings).encrypt(message)
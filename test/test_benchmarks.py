@@ -0,0 +1,27 @@
+import importlib.util
+import os
+
+import pytest
+
+PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "bench_machine.py")
+
+
+@pytest.fixture
+def bench():
+    spec = importlib.util.spec_from_file_location("bench_machine", PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_benchmark_runs_and_detects_regressions(bench, tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--sizes", "10", "100", "--rotor-counts", "3", "4", "--repeat", "1"]
+    args += ["--case-size", "100", "--setup-calls", "2"]
+
+    assert bench.main(args + ["--save", str(baseline)]) == 0
+    assert bench.main(args + ["--compare", str(baseline), "--threshold", "100"]) == 0
+
+    results = {"encrypt/object/size=10": {"seconds": 2.0}, "components": {}}
+    assert bench.compare(results, {"encrypt/object/size=10": {"seconds": 1.0}}, 0.2)
+    assert not bench.compare(results, {"encrypt/object/size=10": {"seconds": 1.9}}, 0.2)
@@ -0,0 +1,88 @@
+import os
+
+import pytest
+from enigma import (
+    BYTES,
+    ByteEnigmaMachine,
+    PlugBoard,
+    RecordingTracer,
+    Reflector,
+    Rotor,
+)
+
+
+def reference(machine: ByteEnigmaMachine) -> ByteEnigmaMachine:
+    """Make a machine walk its components instead of the translation tables."""
+    machine.attach_tracer(RecordingTracer(record_components=False))
+    return machine
+
+
+@pytest.mark.parametrize("n_rotors", [0, 1, 3, 5])
+@pytest.mark.parametrize("position", [0, 65536 - 1300])
+def test_tables_match_components(n_rotors, position):
+    offsets = [250, 255, 255, 4, 5][:n_rotors]
+    data = os.urandom(3000)
+    machine = ByteEnigmaMachine.generate(n_rotors, seed=n_rotors, rotor_offsets=offsets)
+    expected = reference(
+        ByteEnigmaMachine.generate(n_rotors, seed=n_rotors, rotor_offsets=offsets)
+    )
+    machine.seek(position)
+    expected.seek(position)
+
+    encrypted = machine.encrypt(data[:1000]) + machine.encrypt(bytearray(data[1000:]))
+    assert encrypted == expected.encrypt(data)
+    assert machine.snapshot() == expected.snapshot()
+
+
+def test_round_trip_and_types():
+    data = bytes(range(256)) * 100
+    encrypted = ByteEnigmaMachine.generate(seed="key").encrypt(data)
+    assert isinstance(encrypted, bytes) and encrypted != data
+    decrypted = ByteEnigmaMachine.generate(seed="key").encrypt(bytearray(encrypted))
+    assert isinstance(decrypted, bytearray) and decrypted == data
+    with pytest.raises(TypeError, match="encrypt instead"):
+        ByteEnigmaMachine.generate(seed="key").encrypt_text(data)
+
+
+def test_stream_position():
+    data = os.urandom(70000)
+    machine = ByteEnigmaMachine.generate(seed="key", rotor_offsets=[3, 255, 7])
+    expected = machine.encrypt(data)
+
+    machine.seek(66000)
+    assert machine.tell() == 66000
+    state = machine.snapshot()
+    assert machine.encrypt(data[66000:]) == expected[66000:]
+    machine.restore(state)
+    assert machine.encrypt(data[66000:67000]) == expected[66000:67000]
+    machine.reset()
+    assert machine.tell() == 0 and machine.encrypt(data[:10]) == expected[:10]
+
+
+def test_components_accept_any_alphabet():
+    alphabet = "0123456789"
+    rotor = Rotor(offset=9, wiring="3057192846", alphabet=alphabet)
+    assert rotor.inverse(rotor.forward("4")) == "4"
+    with pytest.raises(AssertionError, match="between 0 and 9"):
+        Rotor(offset=10, wiring="3057192846", alphabet=alphabet)
+    with pytest.raises(AssertionError, match="exactly 256 letters"):
+        Reflector(wiring=BYTES[:255], alphabet=BYTES)
+    with pytest.raises(AssertionError, match="Notches must be symbols of '0123456789'"):
+        Rotor(offset=0, wiring="3057192846", notches="A", alphabet=alphabet)
+    with pytest.raises(AssertionError, match="containing byte values"):
+        PlugBoard(wiring={"A": "B", "B": "A"}, alphabet=BYTES)
+
+
+def test_encrypt_into():
+    data = os.urandom(5000)
+    expected = ByteEnigmaMachine.generate(seed="key").encrypt(data)
+    machine = ByteEnigmaMachine.generate(seed="key")
+    buffer = bytearray(data)
+    assert (
+        machine.encrypt_into(memoryview(buffer)[:1234], memoryview(buffer)[:1234])
+        == 1234
+    )
+    machine.encrypt_inplace(memoryview(buffer)[1234:])
+    assert buffer == expected
+    with pytest.raises(AssertionError):
+        machine.encrypt_into(data, bytes(5000))
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from enigma import (
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    build_menu,
+    crib_attack,
+    crib_positions,
+)
+
+PLAINTEXT = "WETTERVORHERSAGEBISKAYAXNULLSECHSHUNDERTUHR"
+PLUGBOARD = {
+    "A": "M",
+    "M": "A",
+    "E": "Q",
+    "Q": "E",
+    "T": "Z",
+    "Z": "T",
+    "R": "K",
+    "K": "R",
+}
+
+
+def test_crib_attack_finds_settings():
+    rotors = ROTOR_CONFIGURATIONS["Enigma I"]
+    rotor_config = [rotors[2], rotors[0], rotors[1]]
+    ciphertext = EnigmaMachine.from_configuration(
+        rotor_config=rotor_config,
+        rotor_offsets=[21, 3, 14],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings=PLUGBOARD,
+    ).encrypt(PLAINTEXT)
+
+    report = crib_attack(
+        ciphertext,
+        crib="WETTERVORHERSAGE",
+        rotor_set=rotors,
+        reflectors=[REFLECTOR_CONFIGURATIONS["B"]],
+        workers=2,
+    )
+
+    assert report.tested == 6 * 26**3
+    assert len(report.candidates) < 1000
+    found = [
+        c
+        for c in report.candidates
+        if [r.name for r in c.rotor_config] == ["III", "I", "II"]
+        and c.rotor_offsets == [21, 3, 14]
+    ]
+    assert found
+    assert any(
+        all(PLUGBOARD.get(k, k) == v for k, v in c.plugboard_wirings.items())
+        for c in found
+    )
+
+
+def test_menu_rejects_self_encryption():
+    with pytest.raises(AssertionError):
+        build_menu("ABC", "XBZ")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_crib_positions_matches_double_loop(chunk_size):
+    rng = np.random.default_rng(3)
+    ciphertext = rng.integers(0, 26, 500, dtype=np.uint8)
+    cribs = ["WETTER", "A", "OBERKOMMANDODERWEHRMACHT", "X" * 501]
+
+    positions = crib_positions(ciphertext, cribs, chunk_size=chunk_size)
+
+    for crib in cribs:
+        expected = [
+            offset
+            for offset in range(len(ciphertext) - len(crib) + 1)
+            if all(ciphertext[offset + i] != ord(p) - 65 for i, p in enumerate(crib))
+        ]
+        assert positions[crib].tolist() == expected
+
+
+def test_crib_positions_memmap_feeds_crib_attack(tmp_path):
+    ciphertext = EnigmaMachine.from_configuration(
+        rotor_config=ROTOR_CONFIGURATIONS["Enigma I"][:3],
+        rotor_offsets=[5, 9, 2],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+    ).encrypt(PLAINTEXT)
+    path = tmp_path / "corpus.idx"
+    path.write_bytes(bytes(ord(c) - 65 for c in ciphertext))
+    corpus = np.memmap(path, dtype=np.uint8, mode="r")
+
+    crib = "WETTERVORHERSAGE"
+    offsets = crib_positions(corpus, [crib], chunk_size=16)[crib]
+
+    assert offsets[0] == 0
+    report = crib_attack(
+        ciphertext,
+        crib=crib,
+        rotor_set=ROTOR_CONFIGURATIONS["Enigma I"][:3],
+        n_rotors=3,
+        reflectors=[REFLECTOR_CONFIGURATIONS["B"]],
+        workers=1,
+        crib_offsets=offsets[:2],
+    )
+    assert report.tested == 2 * 6 * 26**3
+    assert any(c.rotor_offsets == [5, 9, 2] for c in report.candidates)
+
+
+def test_crib_attack_rejects_inadmissible_offsets():
+    with pytest.raises(AssertionError):
+        crib_attack("ABC", "XBZ", ROTOR_CONFIGURATIONS["Enigma I"], crib_offsets=[0])
@@ -0,0 +1,38 @@
+from enigma import (
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    MachineCache,
+)
+
+ROTORS = ROTOR_CONFIGURATIONS["Enigma I"]
+REFLECTOR = REFLECTOR_CONFIGURATIONS["B"]
+
+
+def test_cached_machines_are_independent():
+    cache = MachineCache(maxsize=4)
+    first = cache.from_configuration(ROTORS, [1, 2, 3], REFLECTOR, {"A": "B", "B": "A"})
+    second = cache.from_configuration(
+        ROTORS, [1, 2, 3], REFLECTOR, {"B": "A", "A": "B"}
+    )
+    expected = EnigmaMachine.from_configuration(
+        ROTORS, [1, 2, 3], REFLECTOR, {"A": "B", "B": "A"}
+    ).encrypt("HELLOWORLD" * 10)
+
+    assert first.encrypt("HELLOWORLD" * 10) == expected
+    assert second.encrypt("HELLOWORLD" * 10) == expected
+    assert first.engine is second.engine
+    assert cache.cache_info().hits == 1 and cache.cache_info().misses == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = MachineCache(maxsize=2)
+    for reflector in ["A", "B", "A", "C"]:
+        cache.from_configuration(ROTORS, [0, 0, 0], REFLECTOR_CONFIGURATIONS[reflector])
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 3, 2)
+    cache.from_configuration(ROTORS, [0, 0, 0], REFLECTOR_CONFIGURATIONS["A"])
+    assert cache.cache_info().hits == 2
+    cache.from_configuration(ROTORS, [0, 0, 0], REFLECTOR_CONFIGURATIONS["B"])
+    assert cache.cache_info().misses == 4
@@ -0,0 +1,75 @@
+import os
+import stat
+
+import pytest
+from enigma import (
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    vectorized,
+)
+from enigma.cli import main
+
+ARGS = [
+    "-r",
+    "Enigma I",
+    "--rotor-order",
+    "2,0,1",
+    "-f",
+    "B",
+    "--offsets",
+    "3,7,1",
+    "-p",
+    "AZ,QW",
+]
+
+
+def test_cli_encrypts_to_output_and_in_place(tmp_path, capsys):
+    message = b"THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG" * 100
+    source, output = tmp_path / "message.txt", tmp_path / "encrypted.txt"
+    source.write_bytes(message)
+
+    assert main([str(source), "-o", str(output), "--chunk-size", "1000"] + ARGS) == 0
+    assert "Encrypted 3500 letters" in capsys.readouterr().err
+    rotors = ROTOR_CONFIGURATIONS["Enigma I"]
+    expected = EnigmaMachine.from_configuration(
+        rotor_config=[rotors[2], rotors[0], rotors[1]],
+        rotor_offsets=[3, 7, 1],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings={"A": "Z", "Z": "A", "Q": "W", "W": "Q"},
+    ).encrypt(message.decode())
+    assert output.read_text() == expected
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert stat.S_IMODE(output.stat().st_mode) == 0o666 & ~umask
+
+    assert main([str(output)] + ARGS) == 0
+    assert output.read_bytes() == message
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_cli_passes_non_letters_through(tmp_path, monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(vectorized, "np", None)
+    source = tmp_path / "message.txt"
+    source.write_bytes(b"Hello, World!\nHELLOWORLD\n")
+
+    assert main([str(source), "--chunk-size", "8"] + ARGS) == 0
+    rotors = ROTOR_CONFIGURATIONS["Enigma I"]
+    letters = EnigmaMachine.from_configuration(
+        rotor_config=[rotors[2], rotors[0], rotors[1]],
+        rotor_offsets=[3, 7, 1],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings={"A": "Z", "Z": "A", "Q": "W", "W": "Q"},
+    ).encrypt("HELLOWORLDHELLOWORLD")
+    expected = f"{letters[:5]}, {letters[5:10]}!\n{letters[10:]}\n"
+    assert source.read_text() == expected
+
+
+def test_cli_failure_leaves_input_untouched(tmp_path):
+    source = tmp_path / "message.txt"
+    source.write_bytes(b"HELLO")
+
+    assert main([str(source), "-r", "Enigma I", "-f", "B", "--offsets", "1,2"]) == 1
+    assert source.read_bytes() == b"HELLO"
+    assert [p.name for p in tmp_path.iterdir()] == ["message.txt"]
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+)
+
+
+def build(compiled: bool, rotor_offsets=(3, 24, 11), n_rotors=3):
+    rotor_config = ROTOR_CONFIGURATIONS["German Railway (Rocket)"][:n_rotors]
+    machine = EnigmaMachine.from_configuration(
+        rotor_config=rotor_config,
+        rotor_offsets=list(rotor_offsets)[:n_rotors],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings={"A": "Q", "Q": "A", "E": "Z", "Z": "E", "K": "M"},
+    )
+    return machine.compile() if compiled else machine
+
+
+@pytest.mark.parametrize("n_rotors", [1, 2, 3])
+def test_compiled_matches_object_graph(n_rotors):
+    message = "".join(random.Random(n_rotors).choice(LETTERS) for _ in range(2000))
+    reference, compiled = build(False, n_rotors=n_rotors), build(
+        True, n_rotors=n_rotors
+    )
+
+    assert compiled.encrypt(message) == reference.encrypt(message)
+    assert [r.offset for r in compiled.config[3].rotors] == [
+        r.offset for r in reference.config[3].rotors
+    ]
+    assert compiled.config[3].clicks == reference.config[3].clicks
+
+
+def test_compiled_keeps_state_across_calls():
+    message = "THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG" * 5
+    reference, compiled = build(False), build(True)
+
+    expected = reference.encrypt(message)
+    assert (
+        "".join(compiled.encrypt(message[i : i + 7]) for i in range(0, len(message), 7))
+        == expected
+    )
+
+
+def test_compiled_rejects_invalid_letters():
+    with pytest.raises(AssertionError):
+        build(True).encrypt("hello")
+
+
+def test_encrypt_parallel_matches_serial():
+    message = "".join(random.Random(1).choice(LETTERS) for _ in range(3000))
+    reference, machine = build(False), build(False)
+    reference.encrypt("AB")
+    machine.encrypt("AB")
+
+    assert machine.encrypt_parallel(
+        message, workers=3, chunk_size=700
+    ) == reference.encrypt(message)
+    assert machine.tell() == reference.tell()
+    assert machine._rotor_state() == reference._rotor_state()
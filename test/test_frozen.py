@@ -0,0 +1,84 @@
+import dataclasses
+import random
+import threading
+
+import numpy as np
+import pytest
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    FrozenEnigma,
+)
+
+
+def build(stepping):
+    return EnigmaMachine.from_configuration(
+        rotor_config=ROTOR_CONFIGURATIONS["Enigma I"],
+        rotor_offsets=[20, 3, 0],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings={"A": "Q", "Q": "A"},
+        stepping=stepping,
+    )
+
+
+@pytest.mark.parametrize("stepping", ["odometer", "notch"])
+def test_frozen_matches_machine(stepping):
+    rng = random.Random(0)
+    message = "".join(rng.choice(LETTERS) for _ in range(3000))
+    machine = build(stepping)
+    frozen = FrozenEnigma.from_machine(machine)
+    assert (frozen.stepping is None) == (stepping == "odometer")
+
+    for start in (0, 17, 20000):
+        expected = machine.encrypt(message, start=start)
+        assert frozen.encrypt(message, start) == (expected, start + 3000)
+        out = bytearray(3000)
+        assert frozen.encrypt_into(message.encode("ascii"), out, start) == start + 3000
+        assert out.decode("ascii") == expected
+        short = bytearray(message[:50].encode("ascii"))
+        assert frozen.encrypt_into(short, short, start) == start + 50
+        assert short.decode("ascii") == expected[:50]
+        encrypted, end = frozen.encrypt_array(
+            np.frombuffer(message.encode("ascii"), dtype=np.uint8), start
+        )
+        assert encrypted.tobytes().decode("ascii") == expected and end == start + 3000
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        frozen.offsets = (0, 0, 0)
+
+
+def test_frozen_shared_between_threads():
+    rng = random.Random(1)
+    frozen = FrozenEnigma.from_machine(build("notch"))
+    messages = [
+        "".join(rng.choice(LETTERS) for _ in range(rng.randrange(1, 2000)))
+        for _ in range(64)
+    ]
+    starts = [rng.randrange(100000) for _ in messages]
+    machine = build("notch")
+    expected = [
+        (machine.encrypt(m, start=s), s + len(m)) for m, s in zip(messages, starts)
+    ]
+
+    assert frozen.encrypt_many(messages, starts, workers=8) == expected
+    as_bytes = frozen.encrypt_many(
+        [m.encode("ascii") for m in messages], starts, workers=8
+    )
+    assert [e.decode("ascii") for e, _ in as_bytes] == [e for e, _ in expected]
+
+    errors = []
+
+    def hammer(seed):
+        order = random.Random(seed).sample(range(len(messages)), len(messages))
+        for i in order:
+            if frozen.encrypt(messages[i], starts[i]) != expected[i]:
+                errors.append(i)
+
+    threads = [threading.Thread(target=hammer, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,102 @@
+import numpy as np
+from enigma import (
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    NgramTable,
+    PlugboardClimber,
+    english_ngrams,
+    recover_plugboard,
+)
+from enigma.hillclimb import _swap
+
+PLAINTEXT = (
+    "THEWEATHERREPORTFORTHENORTHERNSECTORINDICATESSTRONGWINDSFROMTHEWESTAND"
+    "HEAVYRAINDURINGTHENIGHTALLUNITSARETOREPORTTHEIRPOSITIONSTOHEADQUARTERS"
+    "ATSIXHUNDREDHOURSTHECONVOYWILLPROCEEDALONGTHECOASTANDAWAITFURTHERORDERS"
+    "ATTHEHARBOURSUPPLIESOFFUELANDAMMUNITIONMUSTBECHECKEDBEFOREDEPARTURE"
+)
+PLUGBOARD = {
+    a: b
+    for x, y in ["AR", "GK", "OX", "BJ", "CD", "LV", "NQ", "PT"]
+    for a, b in ((x, y), (y, x))
+}
+
+
+def test_ngram_table_round_trip(tmp_path):
+    table = NgramTable.from_text("the theme then", 2)
+    table.save(tmp_path / "bigrams.npy")
+    loaded = NgramTable.load(tmp_path / "bigrams.npy")
+
+    assert loaded.n == 2
+    assert np.array_equal(loaded.log_probs, table.log_probs)
+    th = np.array([19, 7])
+    assert table.score(th) > table.score(np.array([25, 16]))
+
+
+def test_incremental_score_matches_full_score():
+    rng = np.random.default_rng(0)
+    climber = PlugboardClimber(
+        rng.integers(0, 26, 300), rng.integers(0, 26, (300, 26)), english_ngrams(3)
+    )
+    plugboard = _swap(_swap(np.arange(26), 1, 5), 7, 20)
+    score, change = climber.evaluate(plugboard)
+    climber.accept(score, change)
+
+    reference = PlugboardClimber(
+        climber.ciphertext, climber.scrambler, english_ngrams(3)
+    )
+    reference.reset(plugboard)
+    assert np.isclose(score, reference.score)
+    assert np.array_equal(climber.plaintext, reference.plaintext)
+
+
+def test_position_indexes_follow_accepted_swaps():
+    rng = np.random.default_rng(1)
+    climber = PlugboardClimber(
+        rng.integers(0, 26, 400), rng.integers(0, 26, (400, 26)), english_ngrams(2)
+    )
+    for a, b in rng.integers(0, 26, (30, 2)):
+        if a != b:
+            climber.accept(*climber.evaluate(_swap(climber.plugboard, a, b)))
+
+    reference = PlugboardClimber(
+        climber.ciphertext, climber.scrambler, english_ngrams(2)
+    )
+    reference.reset(climber.plugboard)
+    assert np.isclose(climber.score, reference.score, rtol=1e-5)
+    assert np.array_equal(climber.windows, reference.windows)
+    assert np.array_equal(climber.inner_keys, reference.inner_keys)
+    for letter in range(26):
+        assert np.array_equal(
+            climber._inner_positions(letter), np.flatnonzero(reference.inner == letter)
+        )
+
+
+def test_recover_plugboard():
+    rotors = ROTOR_CONFIGURATIONS["Enigma I"]
+    settings = dict(
+        rotor_config=rotors,
+        rotor_offsets=[5, 17, 2],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+    )
+    ciphertext = EnigmaMachine.from_configuration(
+        **settings, plugboard_wirings=PLUGBOARD
+    ).encrypt(PLAINTEXT)
+
+    candidate = recover_plugboard(ciphertext, **settings, restarts=4, workers=1)
+
+    assert candidate.plugboard_wirings == PLUGBOARD
+    assert candidate.machine().encrypt(ciphertext) == PLAINTEXT
+
+
+def test_english_ngrams_are_marginals_of_quadgrams():
+    probs = [np.exp(english_ngrams(n).log_probs.astype(np.float64)) for n in (1, 2, 4)]
+
+    assert all(np.isclose(p.sum(), 1) for p in probs)
+    assert np.allclose(probs[1].reshape(26, 26).sum(axis=1), probs[0], atol=1e-4)
+    assert np.argmax(probs[0]) == 4
+    assert (
+        english_ngrams(2).log_probs[19 * 26 + 7]
+        > english_ngrams(2).log_probs[25 * 26 + 16]
+    )
@@ -0,0 +1,80 @@
+import json
+import os
+import random
+import stat
+
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+)
+from enigma.jobs import JOURNAL_NAME, run_manifest
+
+
+def write_manifest(path, jobs):
+    with open(path, "w") as file:
+        for job in jobs:
+            file.write(json.dumps(job) + "\n")
+
+
+def expected(job, message):
+    rotor_set = ROTOR_CONFIGURATIONS[job["rotors"]]
+    return EnigmaMachine.from_configuration(
+        rotor_config=[rotor_set[i] for i in job["rotor_order"]],
+        rotor_offsets=job["rotor_offsets"],
+        reflector_config=REFLECTOR_CONFIGURATIONS[job["reflector"]],
+        plugboard_wirings={"A": "Z", "Z": "A"} if job.get("plugboard") else None,
+    ).encrypt(message)
+
+
+def test_run_manifest(tmp_path):
+    rng = random.Random(0)
+    inputs, outputs = tmp_path / "inputs", tmp_path / "outputs"
+    inputs.mkdir()
+    jobs, messages = [], {}
+    for i in range(8):
+        name = f"msg-{i}.txt"
+        messages[name] = "".join(
+            rng.choice(LETTERS) for _ in range(rng.randrange(1, 3000))
+        )
+        # Text files usually end with a newline, which passes through
+        (inputs / name).write_text(messages[name] + "\n" * (i % 2))
+        jobs.append(
+            {
+                "input": f"inputs/{name}",
+                "rotors": "Enigma I",
+                "rotor_order": [2, 0, 1] if i % 2 else [0, 1, 2],
+                "reflector": "B",
+                "rotor_offsets": [i, 2 * i, 3],
+                "plugboard": "AZ" if i % 2 else None,
+            }
+        )
+    bad = dict(jobs[0], input="inputs/missing.txt", id="bad")
+    manifest = tmp_path / "manifest.jsonl"
+    write_manifest(manifest, jobs + [bad])
+
+    report = run_manifest(str(manifest), str(outputs), workers=2, task_size=4000)
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert [result.id for result in report.failed] == ["bad"]
+    assert not (outputs / "missing.txt").exists()
+    assert not [name for name in os.listdir(outputs) if name.endswith(".tmp")]
+    for job in jobs:
+        name = os.path.basename(job["input"])
+        newline = "\n" * (jobs.index(job) % 2)
+        assert (outputs / name).read_text() == expected(job, messages[name]) + newline
+        assert stat.S_IMODE((outputs / name).stat().st_mode) == 0o666 & ~umask
+    assert report.letters == sum(len(message) for message in messages.values())
+    assert "msg-" in report.summary()
+
+    # Resuming skips the completed jobs and reruns changed or failed ones
+    jobs[3]["rotor_offsets"] = [7, 7, 7]
+    write_manifest(manifest, jobs + [bad])
+    report = run_manifest(str(manifest), str(outputs), workers=1)
+    rerun = [result.id for result in report.results if not result.skipped]
+    assert rerun == ["inputs/msg-3.txt", "bad"]
+    assert (outputs / "msg-3.txt").read_text() == expected(
+        jobs[3], messages["msg-3.txt"]
+    ) + "\n"
+    assert (outputs / JOURNAL_NAME).exists()
@@ -0,0 +1,108 @@
+import json
+import multiprocessing
+import threading
+
+import pytest
+from enigma import REFLECTOR_CONFIGURATIONS, ROTOR_CONFIGURATIONS, EnigmaMachine
+from enigma.keyspace import (
+    CoordinatorClient,
+    CoordinatorServer,
+    KeyspaceCoordinator,
+    distributed_search,
+    keyspace_units,
+    run_worker,
+)
+
+PLAINTEXT = (
+    "ITWASTHEBESTOFTIMESITWASTHEWORSTOFTIMESITWASTHEAGEOFWISDOMITWASTHEAGEOF"
+    "FOOLISHNESSITWASTHEEPOCHOFBELIEFITWASTHEEPOCHOFINCREDULITYITWASTHESEASON"
+)
+ROTOR_SET = "Commercial Enigma A, B"
+
+
+@pytest.fixture
+def ciphertext():
+    rotors = ROTOR_CONFIGURATIONS[ROTOR_SET]
+    return EnigmaMachine.from_configuration(
+        rotor_config=[rotors[2], rotors[0], rotors[1]],
+        rotor_offsets=[7, 21, 3],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+    ).encrypt(PLAINTEXT)
+
+
+def test_keyspace_units():
+    units = keyspace_units([ROTOR_SET], reflectors=["A", "B"])
+    assert [unit.index for unit in units] == list(range(12))
+    assert [r_c.name for r_c in units[3].rotor_config] == ["IC", "IIIC", "IIC"]
+    assert units[3].reflector_config.name == "B"
+    assert len(keyspace_units()) == (6 + 60 + 60 + 6 + 6) * len(
+        REFLECTOR_CONFIGURATIONS
+    )
+
+
+def test_expired_leases(ciphertext):
+    coordinator = KeyspaceCoordinator(
+        ciphertext, rotor_sets=[ROTOR_SET], reflectors=["B"], lease_timeout=0
+    )
+    leased = [coordinator.lease().index for _ in range(6)]
+    assert leased == list(range(6))
+    # Every unit is leased, the silent ones are handed out again
+    assert coordinator.lease().index == 0
+    coordinator.complete(0, [(0.1, [1, 2, 3])])
+    coordinator.complete(0, [(0.9, [1, 2, 3])])
+    assert coordinator.lease().index == 1
+    assert coordinator.progress()["completed"] == 1
+    assert coordinator.report().candidates[0].score == 0.1
+
+
+def test_search_resumes(tmp_path, ciphertext):
+    checkpoint = str(tmp_path / "search.json")
+    search = dict(rotor_sets=[ROTOR_SET], reflectors=["B"], top_k=3)
+
+    # A run interrupted after two units
+    coordinator = KeyspaceCoordinator(ciphertext, checkpoint, **search)
+    with CoordinatorServer(coordinator, str(tmp_path / "coordinator.sock")) as server:
+        worker = threading.Thread(
+            target=run_worker,
+            args=(server.address, server.authkey),
+            kwargs={"max_units": 2},
+        )
+        worker.start()
+        worker.join()
+    with open(checkpoint) as file:
+        assert len(json.load(file)["completed"]) == 2
+
+    with pytest.raises(AssertionError):
+        KeyspaceCoordinator(ciphertext[1:], checkpoint, **search)
+
+    report = distributed_search(ciphertext, checkpoint, workers=2, **search)
+    best = report.candidates[0]
+    assert report.tested == 4 * 26**3
+    assert [r_c.name for r_c in best.rotor_config] == ["IIIC", "IC", "IIC"]
+    assert best.rotor_offsets == [7, 21, 3]
+    assert best.machine().encrypt(ciphertext) == PLAINTEXT
+    with open(checkpoint) as file:
+        assert json.load(file)["completed"] == list(range(6))
+
+
+def test_server_rejects_strangers_and_forged_units(tmp_path, ciphertext):
+    coordinator = KeyspaceCoordinator(
+        ciphertext, rotor_sets=[ROTOR_SET], reflectors=["B"]
+    )
+    with CoordinatorServer(coordinator) as server:
+        assert len(server.authkey) >= 32
+        with pytest.raises(multiprocessing.AuthenticationError):
+            CoordinatorClient(server.address, b"enigmachine")
+        with CoordinatorClient(server.address, server.authkey) as client:
+            for index, results in [
+                (6, []),
+                (-1, []),
+                ("0", []),
+                (0, [(0.5, [1, 2])]),
+                (0, [(0.5, [1, 2, 26])]),
+                (0, [("high", [1, 2, 3])]),
+                (0, None),
+            ]:
+                with pytest.raises(AssertionError):
+                    client.request("complete", index, results)
+            assert client.request("progress")["completed"] == 0
@@ -1,5 +1,11 @@
+import array
+import io
+import json
+import mmap
+import random
+
 import pytest
-from ..enigma_machine import EnigmaMachine
+from enigma import LETTERS, EnigmaMachine, RecordingTracer
 
 
 @pytest.fixture
@@ -34,3 +40,132 @@ def test_enigma_encryption_decryption(enigma_sender, enigma_receiver):
     decrypted_msg = enigma_receiver.encrypt(encrypted_msg)
 
     assert decrypted_msg == original_message
+
+
+def test_enigma_seek(enigma_sender, enigma_receiver):
+    message = "THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG" * 30
+    encrypted_msg = enigma_sender.encrypt(message)
+
+    assert enigma_sender.tell() == len(message)
+    assert enigma_receiver.encrypt(encrypted_msg[700:], start=700) == message[700:]
+    enigma_receiver.seek(0)
+    assert [rotor.offset for rotor in enigma_receiver.config[1].rotors] == [0, 0, 0]
+    assert enigma_receiver.encrypt(encrypted_msg) == message
+
+
+def test_enigma_encrypt_stream(enigma_sender, enigma_receiver):
+    message = "THEQUICKBROWNFOXJUMPSOVERTHELAZYDOG" * 30
+    source, sink = io.BytesIO(message.encode()), io.BytesIO()
+
+    assert enigma_sender.encrypt_stream(source, sink, chunk_size=100) == len(message)
+    decrypted = enigma_receiver.iter_encrypt(
+        sink.getvalue().decode()[i : i + 64] for i in range(0, len(message), 64)
+    )
+    assert "".join(decrypted) == message
+
+
+def test_enigma_snapshot_restore_reset(enigma_sender):
+    state = enigma_sender.snapshot()
+    encrypted_msg = enigma_sender.encrypt("HELLOWORLD")
+    after = enigma_sender.snapshot()
+
+    enigma_sender.restore(state)
+    assert enigma_sender.encrypt("HELLOWORLD") == encrypted_msg
+    assert enigma_sender.snapshot() == after
+    enigma_sender.reset()
+    assert enigma_sender.snapshot() == state
+    assert enigma_sender.tell() == 0
+
+
+def test_enigma_tracer(enigma_sender, enigma_receiver, capsys):
+    tracer = RecordingTracer()
+    enigma_sender.compile().attach_tracer(tracer)
+    encrypted_msg = enigma_sender.encrypt("HELLO")
+
+    assert encrypted_msg == enigma_receiver.encrypt("HELLO")
+    summary = tracer.summary()
+    assert (summary["letters"], summary["calls"], summary["steps"]) == (5, 1, 5)
+    assert summary["components"]["Rotor R"]["letters"] == 10
+    assert summary["components"]["PlugBoard"]["letters"] == 10
+    assert json.loads(json.dumps(tracer.export()))["records"][-1]["letters"] == 5
+    assert enigma_sender.detach_tracer() is tracer
+
+    enigma_receiver.encrypt("A", verbose=True)
+    assert "with reflector" in capsys.readouterr().out
+
+
+def test_enigma_encrypt_text(enigma_sender, enigma_receiver):
+    encrypted = enigma_sender.encrypt_text("Hello, World! 42", keep_non_letters=True)
+
+    assert encrypted == "ZSIAH, ZUQXI! 42"
+    assert enigma_receiver.encrypt("HELLOWORLD") == "ZSIAHZUQXI"
+    enigma_receiver.reset()
+    assert enigma_receiver.encrypt_text(encrypted.encode()) == b"HELLOWORLD"
+
+
+def test_enigma_many_rotors():
+    rng = random.Random(12)
+    machine = EnigmaMachine(
+        rotor_wirings=["".join(rng.sample(LETTERS, 26)) for _ in range(12)],
+        rotor_offsets=[rng.randrange(26) for _ in range(12)],
+        reflector_wirings="YRUHQSLDPXNGOKMIEBFZCWVJAT",
+    )
+    assert len(machine.config[1].rotors) == 12
+    assert [rotor.name for rotor in machine.config[1].rotors[2:4]] == ["L", None]
+
+    # Around carries into the slow rotors, the cached compositions must
+    # follow the rotors moved by seek and by the stepping itself
+    message = "".join(rng.choice(LETTERS) for _ in range(1500))
+    reference = machine.clone().compile()
+    for start in (26**3 - 700, 26**4 - 40, 0, 26**2 - 3):
+        expected = reference.encrypt(message, start=start)
+        assert machine.encrypt(message, start=start) == expected
+
+    # Tracing walks every rotor separately
+    machine.seek(26**3 - 10)
+    traced = machine.clone()
+    traced.attach_tracer(RecordingTracer())
+    assert traced.encrypt(message[:40]) == machine.encrypt(message[:40])
+
+
+@pytest.mark.parametrize("length", [300, 5000])
+def test_enigma_encrypt_into(enigma_sender, enigma_receiver, length):
+    message = "".join(random.Random(length).choice(LETTERS) for _ in range(length))
+    expected = enigma_receiver.encrypt(message).encode("ascii")
+
+    out = bytearray(length + 10)
+    assert enigma_sender.encrypt_into(message[:100].encode("ascii"), out) == 100
+    target = memoryview(out)[100:]
+    assert enigma_sender.encrypt_into(memoryview(message.encode("ascii"))[100:], target)
+    assert out[:length] == expected and out[length:] == bytes(10)
+
+    # In place, in a mapping and in an array of bytes
+    enigma_sender.reset()
+    with mmap.mmap(-1, length) as buffer:
+        buffer[:] = message.encode("ascii")
+        assert enigma_sender.encrypt_inplace(buffer) == length
+        assert buffer[:] == expected
+    enigma_sender.reset()
+    letters = array.array("B", message.encode("ascii"))
+    enigma_sender.encrypt_inplace(letters)
+    assert letters.tobytes() == expected
+    assert enigma_sender.tell() == length
+
+
+def test_enigma_encrypt_into_errors(enigma_sender):
+    buffer = bytearray(b"HELLOWORLd")
+    with pytest.raises(AssertionError):
+        enigma_sender.encrypt_inplace(buffer)
+    with pytest.raises(AssertionError):
+        enigma_sender.encrypt_into(b"HELLO", bytes(5))
+    with pytest.raises(AssertionError):
+        enigma_sender.encrypt_into(b"HELLO", bytearray(4))
+    assert buffer == b"HELLOWORLd" and enigma_sender.tell() == 0
+
+    # With a tracer, the components are walked
+    enigma_sender.attach_tracer(RecordingTracer())
+    out = bytearray(5)
+    enigma_sender.encrypt_into(b"HELLO", out)
+    enigma_sender.detach_tracer()
+    enigma_sender.reset()
+    assert out.decode("ascii") == enigma_sender.encrypt("HELLO")
@@ -0,0 +1,64 @@
+import numpy as np
+from enigma import (
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    brute_force,
+)
+from enigma import search
+
+PLAINTEXT = (
+    "ITWASTHEBESTOFTIMESITWASTHEWORSTOFTIMESITWASTHEAGEOFWISDOMITWASTHEAGEOF"
+    "FOOLISHNESSITWASTHEEPOCHOFBELIEFITWASTHEEPOCHOFINCREDULITYITWASTHESEASON"
+    "OFLIGHTITWASTHESEASONOFDARKNESSITWASTHESPRINGOFHOPEITWASTHEWINTEROFDESPAIR"
+)
+
+
+def test_brute_force_finds_key():
+    rotors = ROTOR_CONFIGURATIONS["Enigma I"]
+    rotor_config = [rotors[1], rotors[2], rotors[0]]
+    ciphertext = EnigmaMachine.from_configuration(
+        rotor_config=rotor_config,
+        rotor_offsets=[4, 19, 11],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+    ).encrypt(PLAINTEXT)
+
+    report = brute_force(
+        ciphertext,
+        rotors,
+        reflectors=[REFLECTOR_CONFIGURATIONS["A"], REFLECTOR_CONFIGURATIONS["B"]],
+        top_k=3,
+        workers=2,
+    )
+
+    best = report.candidates[0]
+    assert report.tested == 12 * 26**3
+    assert [r_c.name for r_c in best.rotor_config] == ["II", "III", "I"]
+    assert best.rotor_offsets == [4, 19, 11]
+    assert best.machine().encrypt(ciphertext) == PLAINTEXT
+
+
+def test_search_unit_in_columns(monkeypatch):
+    monkeypatch.setattr(search, "COLUMN_SIZE", 50)
+    rotors = ROTOR_CONFIGURATIONS["Enigma I"]
+    rotor_config = [rotors[1], rotors[2], rotors[0]]
+    ciphertext = EnigmaMachine.from_configuration(
+        rotor_config=rotor_config,
+        rotor_offsets=[4, 19, 11],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+    ).encrypt(PLAINTEXT)
+    letters = np.frombuffer(ciphertext.encode("ascii"), dtype=np.uint8) - 65
+
+    plaintexts = search.decrypt_positions(
+        letters,
+        [r_c.wiring for r_c in rotor_config],
+        REFLECTOR_CONFIGURATIONS["B"].wiring,
+        np.array([[4, 19, 11], [0, 0, 0]]),
+    )
+    assert bytes(plaintexts[0] + 65).decode() == PLAINTEXT
+
+    best = search.search_unit(
+        letters, rotor_config, REFLECTOR_CONFIGURATIONS["B"], top_k=1
+    )
+    assert best[0].rotor_offsets == [4, 19, 11]
+    assert best[0].score == search.index_of_coincidence(plaintexts[:1])[0]
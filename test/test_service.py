@@ -0,0 +1,92 @@
+import asyncio
+import random
+
+import pytest
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+)
+from enigma.service import EncryptionClient, EncryptionService, serve
+
+SETTINGS = {"rotors": "Enigma I", "reflector": "B", "plugboard": "AQ,EZ"}
+
+
+def reference(offsets):
+    return EnigmaMachine.from_configuration(
+        rotor_config=ROTOR_CONFIGURATIONS["Enigma I"],
+        rotor_offsets=list(offsets),
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings={"A": "Q", "Q": "A", "E": "Z", "Z": "E"},
+    )
+
+
+def message(seed, length):
+    rng = random.Random(seed)
+    return "".join(rng.choice(LETTERS) for _ in range(length))
+
+
+@pytest.mark.parametrize("transport", ["tcp", "unix"])
+def test_concurrent_connections(transport, tmp_path):
+    connections = 2000
+
+    async def client(connect, i):
+        offsets = [i % 26, i // 26 % 26, 3]
+        async with await connect() as client:
+            await client.open(f"s{i}", offsets=offsets, **SETTINGS)
+            first = await client.encrypt(f"s{i}", message(i, 100))
+            second = await client.encrypt(f"s{i}", message(i, 50).encode("ascii"))
+        machine = reference(offsets)
+        assert first == machine.encrypt(message(i, 100))
+        assert second == machine.encrypt(message(i, 50)).encode("ascii")
+
+    async def main():
+        service = EncryptionService(max_sessions=connections)
+        if transport == "unix":
+            path = str(tmp_path / "enigma.sock")
+            server = await serve(service, path=path)
+            connect = lambda: EncryptionClient.connect_unix(path)
+        else:
+            server = await serve(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            connect = lambda: EncryptionClient.connect(port=port)
+        async with server:
+            await asyncio.gather(*(client(connect, i) for i in range(connections)))
+        assert len(service.sessions) == connections
+        assert service.sessions["s7"].stats.summary()["requests"] == 2
+
+    asyncio.run(main())
+
+
+def test_sessions_persist_and_stream():
+    text = message(0, 300_000)
+
+    async def main():
+        server = await serve(EncryptionService(chunk_size=1 << 12), port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            async with await EncryptionClient.connect(port=port) as client:
+                await client.open("shared", offsets=[1, 2, 3], **SETTINGS)
+                first = await client.encrypt("shared", text[:1000])
+            async with await EncryptionClient.connect(port=port) as client:
+                rest = await client.encrypt("shared", text[1000:])
+
+                with pytest.raises(AssertionError, match="capital"):
+                    await client.encrypt("shared", "HELLO world")
+                status = await client.request("seek", session="shared", position=10)
+                assert status["position"] == 10
+                again = await client.encrypt("shared", text[10:20])
+
+                with pytest.raises(AssertionError, match="Unknown session"):
+                    await client.encrypt("missing", "ABC")
+                stats = (await client.request("stats", session="shared"))["stats"]
+        return first + rest, again, stats
+
+    encrypted, again, stats = asyncio.run(main())
+    expected = reference([1, 2, 3]).encrypt(text)
+    assert encrypted == expected
+    assert again == expected[10:20]
+    assert stats["requests"] == 3
+    assert stats["letters"] == len(text) + 10
+    assert stats["latency"]["max"] >= stats["latency"]["p50"] > 0
@@ -0,0 +1,160 @@
+import random
+
+import numpy as np
+import pytest
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    SteppingTable,
+    TableStore,
+    notch_step,
+)
+from enigma.cli import parse_plugboard
+
+ROTORS = {
+    r_c.name: r_c
+    for r_c in ROTOR_CONFIGURATIONS["Enigma I"] + ROTOR_CONFIGURATIONS["M3 Army"]
+}
+
+
+def build(rotor_config, rotor_offsets, compiled=False, ring_settings=None):
+    machine = EnigmaMachine.from_configuration(
+        rotor_config=rotor_config,
+        rotor_offsets=list(rotor_offsets),
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings={"A": "Q", "Q": "A", "E": "Z", "Z": "E"},
+        stepping="notch",
+        ring_settings=ring_settings,
+    )
+    return machine.compile() if compiled else machine
+
+
+def window(machine):
+    """Rotor letters as read in the window, slowest rotor on the left."""
+    return "".join(
+        LETTERS[rotor.offset] for rotor in reversed(machine.config[1].rotors)
+    )
+
+
+def test_double_step():
+    # Rotors I-II-III, left to right, at ADU: the middle rotor steps twice
+    i, ii, iii = ROTOR_CONFIGURATIONS["Enigma I"]
+    machine = build([iii, ii, i], [20, 3, 0])
+
+    windows = []
+    for _ in range(5):
+        machine.encrypt("A")
+        windows.append(window(machine))
+    assert windows == ["ADV", "AEW", "BFX", "BFY", "BFZ"]
+
+
+def test_stepping_table_period():
+    table = SteppingTable([0, 0, 0], ["V", "E", "Q"])
+    assert table.period == 26 * 25 * 26
+
+    offsets = [0, 0, 0]
+    for clicks in range(1, 2000):
+        offsets = notch_step(offsets, ["V", "E", "Q"])
+        assert table.offsets(clicks) == offsets
+    assert table.offsets(table.transient + 5 * table.period + 7) == table.offsets(
+        table.transient + 7
+    )
+
+
+def test_fourth_rotor_never_steps():
+    rotor_config = ROTOR_CONFIGURATIONS["Enigma I"] + ROTOR_CONFIGURATIONS["M4 R2"][:1]
+    machine = build(rotor_config, [25, 4, 16, 7])
+    machine.encrypt("A" * 20000)
+    assert machine.config[1].rotors[3].offset == 7
+
+
+@pytest.mark.parametrize("n_rotors", [1, 3, 4])
+def test_engines_match_object_graph(n_rotors):
+    rng = random.Random(n_rotors)
+    rotor_set = sum(ROTOR_CONFIGURATIONS.values(), [])
+    rotor_config = [rng.choice(rotor_set) for _ in range(n_rotors)]
+    rotor_offsets = [rng.randrange(26) for _ in range(n_rotors)]
+    rings = [rng.randrange(26) for _ in range(n_rotors)]
+    message = "".join(rng.choice(LETTERS) for _ in range(3000))
+
+    reference = build(rotor_config, rotor_offsets, ring_settings=rings)
+    expected = reference.encrypt(message)
+
+    compiled = build(rotor_config, rotor_offsets, compiled=True, ring_settings=rings)
+    assert (
+        compiled.encrypt(message[:1001]) + compiled.encrypt(message[1001:]) == expected
+    )
+    assert compiled.snapshot() == reference.snapshot()
+
+    vectorized = build(rotor_config, rotor_offsets, ring_settings=rings)
+    encrypted = vectorized.encrypt_array(
+        np.frombuffer(message.encode("ascii"), dtype=np.uint8)
+    )
+    assert encrypted.tobytes().decode("ascii") == expected
+    assert vectorized.snapshot() == reference.snapshot()
+
+    buffer = bytearray(message.encode("ascii"))
+    inplace = build(rotor_config, rotor_offsets, ring_settings=rings)
+    inplace.encrypt_inplace(memoryview(buffer)[:100])
+    inplace.encrypt_inplace(memoryview(buffer)[100:])
+    assert buffer.decode("ascii") == expected
+
+
+def test_seek_with_notches():
+    rotor_config = ROTOR_CONFIGURATIONS["M3 & M4 Naval (FEB 1942)"]
+    message = "".join(random.Random(0).choice(LETTERS) for _ in range(40000))
+    expected = build(rotor_config, [24, 11, 3]).encrypt(message)
+
+    machine = build(rotor_config, [24, 11, 3], compiled=True)
+    for start in (35000, 12, 20000, 0):
+        assert (
+            machine.encrypt(message[start : start + 50], start=start)
+            == expected[start : start + 50]
+        )
+    machine.seek(0)
+    assert window(machine) == "DLY"
+
+
+# Rotors left to right, ring settings, start position, plugboard, text and
+# its encryption on a real machine (reflector B)
+HISTORICAL_MESSAGES = [
+    ("I II III", "AAA", "AAA", "", "AAAAA", "BDZGO"),
+    ("I II III", "BBB", "AAA", "", "AAAAA", "EWTYX"),
+    # Operation Barbarossa, 1941
+    (
+        "II IV V",
+        "BUL",
+        "BLA",
+        "AV,BS,CG,DL,FU,HZ,IN,KM,OW,RX",
+        "EDPUDNRGYSZRCXNUYTPOMRMBOFKTBZREZKMLXLVEFGUEYSIOZVEQMIKUBPMMYLKLT"
+        "TDEISMDICAGYKUACTCDOMOHWXMUUIAUBSTSLRNBZSZWNRFXWFYSSXJZVIJHIDISHP"
+        "RKLKAYUPADTXQSPINQMATLPIFSVKDASCTACDPBOPVHJK",
+        "AUFKLXABTEILUNGXVONXKURTINOWAXKURTINOWAXNORDWESTLXSEBEZXSEBEZXUAF"
+        "FLIEGERSTRASZERIQTUNGXDUBROWKIXDUBROWKIXOPOTSCHKAXOPOTSCHKAXUMXEI"
+        "NSAQTDREINULLXUHRANGETRETENXANGRIFFXINFXRGTX",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "rotors, rings, start, plugboard, text, expected", HISTORICAL_MESSAGES
+)
+def test_historical_messages(tmp_path, rotors, rings, start, plugboard, text, expected):
+    def machine():
+        return EnigmaMachine.from_configuration(
+            rotor_config=[ROTORS[name] for name in reversed(rotors.split())],
+            rotor_offsets=[LETTERS.index(letter) for letter in reversed(start)],
+            reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+            plugboard_wirings=parse_plugboard(plugboard),
+            stepping="notch",
+            ring_settings=[LETTERS.index(letter) for letter in reversed(rings)],
+        )
+
+    assert machine().encrypt(text) == expected
+    assert machine().compile().encrypt(text) == expected
+    letters = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+    assert machine().encrypt_array(letters).tobytes().decode("ascii") == expected
+    encrypted = machine().encrypt_array(letters, store=TableStore(str(tmp_path)))
+    assert encrypted.tobytes().decode("ascii") == expected
@@ -0,0 +1,77 @@
+import os
+import random
+
+import numpy as np
+import pytest
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+    TableStore,
+)
+
+
+def build(n_rotors, stepping):
+    rotor_config = (ROTOR_CONFIGURATIONS["Enigma I"] + ROTOR_CONFIGURATIONS["M4 R2"])[
+        :n_rotors
+    ]
+    return EnigmaMachine.from_configuration(
+        rotor_config=rotor_config,
+        rotor_offsets=[5, 17, 24, 2][:n_rotors],
+        reflector_config=REFLECTOR_CONFIGURATIONS["B"],
+        plugboard_wirings={"A": "Q", "Q": "A", "E": "Z", "Z": "E"},
+        stepping=stepping,
+    )
+
+
+@pytest.mark.parametrize(
+    "n_rotors,stepping",
+    [(0, "odometer"), (1, "odometer"), (3, "odometer"), (3, "notch")],
+)
+def test_store_matches_encrypt_array(tmp_path, n_rotors, stepping):
+    store = TableStore(str(tmp_path))
+    message = "".join(random.Random(0).choice(LETTERS) for _ in range(20000))
+    letters = np.frombuffer(message.encode("ascii"), dtype=np.uint8)
+
+    reference = build(n_rotors, stepping)
+    expected = reference.encrypt_array(letters)
+
+    machine = build(n_rotors, stepping)
+    encrypted = np.concatenate(
+        [
+            machine.encrypt_array(letters[:7001], store=store),
+            machine.encrypt_array(letters[7001:], store=store),
+        ]
+    )
+    assert (encrypted == expected).all()
+    assert machine.snapshot() == reference.snapshot()
+
+
+def test_table_is_shared(tmp_path):
+    wirings = [config.wiring for config in ROTOR_CONFIGURATIONS["Enigma I"]]
+    reflector = REFLECTOR_CONFIGURATIONS["B"].wiring
+
+    table = TableStore(str(tmp_path)).table(wirings, reflector)
+    assert table.shape == (26**3, 26)
+    assert not table.flags.writeable
+    (name,) = os.listdir(tmp_path)
+    modified = os.stat(tmp_path / name).st_mtime_ns
+
+    # Another store maps the same file instead of building it again
+    other = TableStore(str(tmp_path)).table(wirings, reflector)
+    assert (other == table).all()
+    assert os.listdir(tmp_path) == [name]
+    assert os.stat(tmp_path / name).st_mtime_ns == modified
+
+    # Every row is the involution of the rotors and reflector at one position
+    row = table[5 + 17 * 26 + 24 * 26**2]
+    assert (row[row] == np.arange(26)).all()
+
+
+def test_store_limits(tmp_path):
+    store = TableStore(str(tmp_path), max_size=26**3)
+    wirings = [config.wiring for config in ROTOR_CONFIGURATIONS["Enigma I"]]
+    with pytest.raises(AssertionError):
+        store.table(wirings, REFLECTOR_CONFIGURATIONS["B"].wiring)
+    assert os.listdir(tmp_path) == []
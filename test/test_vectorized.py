@@ -0,0 +1,72 @@
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from enigma import (
+    LETTERS,
+    REFLECTOR_CONFIGURATIONS,
+    ROTOR_CONFIGURATIONS,
+    EnigmaMachine,
+)
+import enigma
+from enigma import vectorized
+
+
+def build():
+    return EnigmaMachine.from_configuration(
+        rotor_config=ROTOR_CONFIGURATIONS["Swiss K"],
+        rotor_offsets=[25, 0, 7, 13, 2],
+        reflector_config=REFLECTOR_CONFIGURATIONS["C"],
+        plugboard_wirings={"B": "X", "X": "B", "L": "O"},
+    )
+
+
+def test_encrypt_array_matches_encrypt(monkeypatch):
+    monkeypatch.setattr(vectorized, "CHUNK_SIZE", 1000)
+    message = "".join(random.Random(0).choice(LETTERS) for _ in range(5000))
+    reference, machine = build(), build()
+    reference.encrypt("ABC")
+    machine.encrypt("ABC")
+
+    encrypted = machine.encrypt_array(np.frombuffer(message.encode(), dtype=np.uint8))
+
+    assert encrypted.tobytes().decode() == reference.encrypt(message)
+    assert machine._rotor_state() == reference._rotor_state()
+
+
+def test_encrypt_array_with_many_rotors():
+    rng = random.Random(3)
+    machine = EnigmaMachine(
+        rotor_wirings=["".join(rng.sample(LETTERS, 26)) for _ in range(16)],
+        rotor_offsets=[rng.randrange(26) for _ in range(16)],
+        reflector_wirings=REFLECTOR_CONFIGURATIONS["B"].wiring,
+    )
+    message = "".join(rng.choice(LETTERS) for _ in range(2000))
+    start = 26**13 + 26**12 - 1000
+    expected = machine.encrypt(message, start=start)
+
+    machine.seek(start)
+    encrypted = machine.encrypt_array(np.frombuffer(message.encode(), dtype=np.uint8))
+    assert encrypted.tobytes().decode() == expected
+
+
+def test_encrypt_array_rejects_invalid_letters():
+    with pytest.raises(AssertionError):
+        build().encrypt_array(np.frombuffer(b"hello", dtype=np.uint8))
+
+
+def test_package_exports_public_names_and_loads_numpy_lazily():
+    for name in ("np", "os", "time", "itertools", "CHUNK_SIZE", "BLOCK_SIZE"):
+        assert not hasattr(enigma, name)
+    code = "import sys, enigma; print('numpy._core' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=os.path.dirname(os.path.dirname(enigma.__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"